@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Infrastructure CLI Startup Benchmark
+
+Times fresh interpreter runs of tools/infractl the way CI calls it: --help,
+plan against the local GoDaddy stand-in, a one-shot verify against a local
+resolver and security-check on a small tree. For comparison it also times a
+bare interpreter and the module set the old update_godaddy_dns.py imported
+before it could do anything (requests, the upstream client and the
+reconciler). Runs fully offline.
+
+Usage:
+    python benchmarks/cli_startup.py --runs 20
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_upstream import FakeUpstream
+from fake_dns_server import FakeDNSServer
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = [sys.executable, os.path.join(ROOT_DIR, 'tools', 'infractl')]
+EAGER_IMPORTS = ("import sys; sys.path.insert(0, 'scripts'); "
+                 "import upstream_client, dns_reconciler, rate_limiter, record_validator")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def time_command(command, runs, env, cwd):
+    timings = []
+    status = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        status = subprocess.run(command, env=env, cwd=cwd, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL).returncode
+        timings.append((time.perf_counter() - started) * 1000)
+    return {'median_ms': round(statistics.median(timings), 1), 'p90_ms': round(percentile(timings, 0.9), 1),
+            'exit_status': status}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start time of the infrastructure CLI')
+    parser.add_argument('--runs', type=int, default=20, help='fresh processes per command')
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+
+    upstream = FakeUpstream().start()
+    upstream.dns_zones['peacefulrobot.com'] = [
+        {'type': 'A', 'name': '@', 'data': '35.185.44.232', 'ttl': 600},
+        {'type': 'CNAME', 'name': 'www', 'data': 'peacefulrobot.github.io', 'ttl': 600}
+    ]
+    resolver = FakeDNSServer(records={('peacefulrobot.com', 'A'): ['35.185.44.232'],
+                                      ('www.peacefulrobot.com', 'CNAME'): ['peacefulrobot.github.io']}).start()
+    env = dict(os.environ, GODADDY_API_URL=upstream.url, GODADDY_API_KEY='benchmark', GODADDY_API_SECRET='benchmark',
+               DNS_VERIFY_RESOLVERS=resolver.resolver, SECRET_SCAN_CACHE='')
+    small_tree = tempfile.mkdtemp(prefix='cli_startup_')
+    with open(os.path.join(small_tree, 'README.md'), 'w') as f:
+        f.write('nothing secret here\n')
+
+    commands = [
+        ('python -c pass', [sys.executable, '-c', 'pass'], ROOT_DIR),
+        ('old script imports', [sys.executable, '-c', EAGER_IMPORTS], ROOT_DIR),
+        ('infractl --help', CLI + ['--help'], ROOT_DIR),
+        ('infractl plan --json', CLI + ['plan', '--json'], ROOT_DIR),
+        ('infractl verify --timeout 0', CLI + ['verify', '--timeout', '0', '--json'], ROOT_DIR),
+        ('infractl security-check', CLI + ['security-check', '--json'], small_tree)
+    ]
+    rows = []
+    try:
+        for name, command, cwd in commands:
+            rows.append(dict(time_command(command, args.runs, env, cwd), command=name))
+    finally:
+        upstream.stop()
+        resolver.stop()
+
+    print(f"{'command':<30} {'median ms':>10} {'p90 ms':>8} {'exit':>5}")
+    for row in rows:
+        print(f"{row['command']:<30} {row['median_ms']:>10} {row['p90_ms']:>8} {row['exit_status']:>5}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'runs': args.runs, 'results': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+DNS Propagation Verifier Benchmark
+
+Starts N local resolver stand-ins that keep serving the old apex A record
+until their (staggered) cache expiry, one of which drops a share of its
+queries, and times scripts/dns_propagation.py until a quorum has converged
+and until every resolver has. Reports each resolver's time to convergence,
+queries sent and how long a fixed sleep would have needed to be equally
+safe. Runs fully offline.
+
+Usage:
+    python benchmarks/dns_propagation.py --resolvers 5 --stagger 1.5 --loss-rate 0.3
+"""
+
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from fake_dns_server import FakeDNSServer
+from dns_propagation import check_propagation, expected_answers, print_report
+
+DOMAIN = 'peacefulrobot.com'
+OLD_RECORDS = {(DOMAIN, 'A'): ['185.199.108.153'], (f'www.{DOMAIN}', 'CNAME'): ['peacefulrobot.github.io']}
+NEW_RECORDS = {(DOMAIN, 'A'): ['35.185.44.232'], (f'www.{DOMAIN}', 'CNAME'): ['peacefulrobot.github.io']}
+
+
+def run(resolvers, stagger, loss_rate, timeout, backoff_base, wait_all):
+    servers = []
+    for index in range(resolvers):
+        server = FakeDNSServer(records=OLD_RECORDS, loss_rate=loss_rate if index == 0 else 0.0, seed=index).start()
+        server.publish(NEW_RECORDS, after=(index + 1) * stagger)
+        servers.append(server)
+    expected = expected_answers(DOMAIN, [
+        {'type': 'A', 'name': '@', 'data': '35.185.44.232'},
+        {'type': 'CNAME', 'name': 'www', 'data': 'peacefulrobot.github.io'}
+    ])
+    try:
+        report = check_propagation(expected, resolvers=[server.resolver for server in servers], timeout=timeout,
+                                   query_timeout=0.5, backoff_base=backoff_base, backoff_max=backoff_base * 8,
+                                   wait_all=wait_all)
+    finally:
+        for server in servers:
+            server.stop()
+    report['queries'] = sum(server.queries for server in servers)
+    report['dropped'] = sum(server.dropped for server in servers)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time DNS propagation checks against local resolver stand-ins')
+    parser.add_argument('--resolvers', type=int, default=5)
+    parser.add_argument('--stagger', type=float, default=1.5, help='resolver N serves the new data after N * stagger s')
+    parser.add_argument('--loss-rate', type=float, default=0.3, help='query loss on the first resolver')
+    parser.add_argument('--backoff-base', type=float, default=0.25)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+
+    rows = []
+    for mode, wait_all in (('quorum', False), ('all', True)):
+        report = run(args.resolvers, args.stagger, args.loss_rate, args.timeout, args.backoff_base, wait_all)
+        print(f"\n== until {mode} ==")
+        print_report(report)
+        print(f"{report['queries']} queries sent, {report['dropped']} dropped")
+        rows.append(dict(report, mode=mode))
+
+    worst_case = args.resolvers * args.stagger
+    print(f"\nA fixed sleep would need >= {worst_case}s (the slowest cache expiry) to be as sure as 'all'")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'resolvers': args.resolvers, 'stagger': args.stagger, 'loss_rate': args.loss_rate,
+                       'results': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
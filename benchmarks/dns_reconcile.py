@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Multi-Zone DNS Reconcile Benchmark
+
+Generates a config of N zones (a fraction of them drifted from the desired
+records), serves them from the local GoDaddy stand-in with a fixed per-call
+latency, and times scripts/dns_reconciler.py serially and on a worker pool.
+Runs fully offline.
+
+Usage:
+    python benchmarks/dns_reconcile.py --zones 50 --drift 0.5 --latency 0.2 --workers 1,16
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from fake_upstream import FakeUpstream
+from dns_reconciler import DnsReconciler, normalize_config, summarize
+
+
+def build_config(zones, calls_per_minute):
+    return normalize_config({
+        'accounts': {'default': {'calls_per_minute': calls_per_minute}},
+        'targets': {
+            'pages': [{'type': 'A', 'name': '@', 'data': '35.185.44.232'}],
+            'www': [{'type': 'CNAME', 'name': 'www', 'data': 'peacefulrobot.github.io'}]
+        },
+        'domains': {f'zone{index}.example.com': {'targets': ['pages', 'www']} for index in range(zones)}
+    })
+
+
+def seed_zones(upstream, config, drift):
+    """Start every zone at the desired state, except the first `drift` fraction which point elsewhere"""
+    drifted = int(len(config['domains']) * drift)
+    for index, (domain, spec) in enumerate(config['domains'].items()):
+        records = [dict(record) for record in spec['records']]
+        if index < drifted:
+            records[0]['data'] = '185.199.108.153'
+        records.append({'type': 'MX', 'name': '@', 'data': 'mx.example.com', 'ttl': 600})
+        upstream.dns_zones[domain] = records
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time multi-zone DNS reconciliation against a fake GoDaddy API')
+    parser.add_argument('--zones', type=int, default=50)
+    parser.add_argument('--drift', type=float, default=0.5, help='fraction of zones that need a write')
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per API call')
+    parser.add_argument('--workers', default='1,16', help='comma-separated pool sizes to compare')
+    parser.add_argument('--calls-per-minute', type=int, default=6000, help='account rate limit')
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(latency=args.latency).start()
+    config = build_config(args.zones, args.calls_per_minute)
+    runs = []
+    for workers in (int(value) for value in args.workers.split(',')):
+        seed_zones(upstream, config, args.drift)
+        upstream.reset()
+        reconciler = DnsReconciler(config, workers=workers, api_url=upstream.url)
+        started = time.perf_counter()
+        summary = summarize(reconciler.reconcile_all(), time.perf_counter() - started)
+        runs.append({'workers': workers, 'seconds': summary['seconds'], 'api_calls': summary['api_calls'],
+                     'by_status': summary['by_status']})
+        print(f"workers={workers:<3} {summary['seconds']:>7}s  calls={summary['api_calls']}  {summary['by_status']}")
+    upstream.stop()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'zones': args.zones, 'drift': args.drift, 'latency': args.latency, 'runs': runs}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Local Stand-In for a Recursive DNS Resolver
+
+Answers A, AAAA and CNAME questions over UDP from an in-memory record table.
+New records can be published with a delay, so until then the resolver keeps
+serving the stale data (like a public resolver holding a cached answer),
+and a configurable fraction of queries is dropped to mimic packet loss.
+Every query is counted. Used to exercise scripts/dns_propagation.py offline.
+
+    python benchmarks/fake_dns_server.py dns_zones.yaml --count 4 --base-port 5300 --stagger 5
+"""
+
+import os
+import sys
+import time
+import struct
+import random
+import argparse
+import threading
+import ipaddress
+import socketserver
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from dns_reconciler import load_config
+from dns_propagation import QTYPES, QTYPE_NAMES, CLASS_IN, RCODE_NXDOMAIN, encode_name, read_name, normalize_answer
+
+FLAG_RESPONSE = 0x8180  # QR, RD, RA
+
+
+def encode_rdata(qtype, value):
+    if qtype == 'A':
+        return ipaddress.IPv4Address(value).packed
+    if qtype == 'AAAA':
+        return ipaddress.IPv6Address(value).packed
+    return encode_name(value)
+
+
+class FakeDNSServer:
+    def __init__(self, host='127.0.0.1', port=0, records=None, ttl=60, loss_rate=0.0, latency=0.0, seed=None):
+        self.ttl = ttl
+        self.loss_rate = loss_rate
+        self.latency = latency
+        self.queries = 0
+        self.dropped = 0
+        self._records = self._table(records or {})
+        self._pending = None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = socketserver.ThreadingUDPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @staticmethod
+    def _table(records):
+        """{(name, type): [values]} with names and values normalized for lookup"""
+        return {(name.rstrip('.').lower(), qtype): [normalize_answer(qtype, str(value)) for value in values]
+                for (name, qtype), values in records.items()}
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    @property
+    def resolver(self):
+        return f'127.0.0.1:{self.port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def publish(self, records, after=0.0):
+        """Serve `records` (replacing the given record sets) once `after` seconds have passed"""
+        with self._lock:
+            self._pending = (time.monotonic() + after, self._table(records))
+
+    def lookup(self, name, qtype):
+        with self._lock:
+            if self._pending is not None and time.monotonic() >= self._pending[0]:
+                self._records.update(self._pending[1])
+                self._pending = None
+            return self._records.get((name, qtype)), any(key[0] == name for key in self._records)
+
+    def answer(self, data):
+        """Response bytes for a query, or None to drop it"""
+        with self._lock:
+            self.queries += 1
+            if self._random.random() < self.loss_rate:
+                self.dropped += 1
+                return None
+        qid, _, qdcount = struct.unpack_from('!HHH', data)
+        name, offset = read_name(data, 12)
+        qtype_code, _ = struct.unpack_from('!HH', data, offset)
+        question = data[12:offset + 4]
+        qtype = QTYPE_NAMES.get(qtype_code)
+        values, known = self.lookup(name.lower(), qtype) if qtype else (None, False)
+
+        answers = b''
+        for value in values or []:
+            rdata = encode_rdata(qtype, value)
+            answers += b'\xc0\x0c' + struct.pack('!HHIH', QTYPES[qtype], CLASS_IN, self.ttl, len(rdata)) + rdata
+        rcode = 0 if known else RCODE_NXDOMAIN
+        header = struct.pack('!HHHHHH', qid, FLAG_RESPONSE | rcode, qdcount, len(values or []), 0, 0)
+        if self.latency:
+            time.sleep(self.latency)
+        return header + question + answers
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                data, sock = self.request
+                try:
+                    response = fake.answer(data)
+                except (struct.error, IndexError, ValueError):
+                    return
+                if response is not None:
+                    sock.sendto(response, self.client_address)
+
+        return Handler
+
+
+def zone_records(config):
+    """Record table for every A, AAAA and CNAME set in a dns_reconciler config"""
+    records = {}
+    for domain, spec in config['domains'].items():
+        for record in spec['records']:
+            if record['type'] in QTYPES:
+                name = domain if record['name'] == '@' else f"{record['name']}.{domain}"
+                records.setdefault((name, record['type']), []).append(record['data'])
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local resolver stand-ins that converge on a zone config')
+    parser.add_argument('config', help='YAML or JSON zone config whose records are published')
+    parser.add_argument('--count', type=int, default=4, help='resolvers to run, on consecutive ports')
+    parser.add_argument('--base-port', type=int, default=5300)
+    parser.add_argument('--stagger', type=float, default=5.0, help='resolver N publishes after N * stagger seconds')
+    parser.add_argument('--loss-rate', type=float, default=0.0, help='fraction of queries dropped')
+    args = parser.parse_args()
+
+    records = zone_records(load_config(args.config))
+    servers = []
+    for index in range(args.count):
+        server = FakeDNSServer(port=args.base_port + index, loss_rate=args.loss_rate).start()
+        server.publish(records, after=index * args.stagger)
+        servers.append(server)
+    print(f"Resolvers: {','.join(server.resolver for server in servers)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
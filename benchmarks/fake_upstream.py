@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Local Stand-In for the GitHub, GitLab and GoDaddy APIs
+
+Answers the endpoints the webhook handler and DNS tools call, with
+configurable latency, error rate and 429 rate-limit behaviour, and counts
+every call by endpoint and status so benchmarks can report upstream load.
+
+    python benchmarks/fake_upstream.py --port 8081 --latency 0.1 --error-rate 0.05
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeUpstream:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, retry_after=1, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.calls = Counter()
+        self.dns_zones = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pipeline_id = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server.server_port
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+    def stats(self):
+        """Call counts as {'endpoint status': count} plus a total"""
+        with self._lock:
+            counts = {f'{endpoint} {status}': count for (endpoint, status), count in sorted(self.calls.items())}
+            counts['total'] = sum(self.calls.values())
+            return counts
+
+    def respond(self, method, path, body):
+        """Decide (status, headers, body) for a request"""
+        endpoint = self.endpoint_for(method, path)
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            roll = self._random.random()
+            if roll < self.rate_limit_rate:
+                status, headers, payload = 429, {'Retry-After': str(self.retry_after)}, {'message': 'rate limited'}
+            elif roll < self.rate_limit_rate + self.error_rate:
+                status, headers, payload = 502, {}, {'message': 'upstream error'}
+            else:
+                status, headers, payload = self._success(endpoint, path, body)
+            self.calls[(endpoint, status)] += 1
+        return status, headers, payload
+
+    @staticmethod
+    def endpoint_for(method, path):
+        if path.endswith('/dispatches'):
+            return 'github_dispatches'
+        if path.endswith('/trigger/pipeline'):
+            return 'gitlab_trigger_pipeline'
+        if '/v1/domains/' in path and '/records' in path:
+            return f'godaddy_records_{method.lower()}'
+        return f'unknown_{method.lower()}'
+
+    def _success(self, endpoint, path, body):
+        if endpoint == 'github_dispatches':
+            return 204, {}, None
+        if endpoint == 'gitlab_trigger_pipeline':
+            self._pipeline_id += 1
+            return 201, {}, {'id': self._pipeline_id, 'status': 'created'}
+        if endpoint.startswith('godaddy_records'):
+            domain = path.split('/v1/domains/', 1)[1].split('/', 1)[0]
+            zone = self.dns_zones.setdefault(domain, [])
+        if endpoint == 'godaddy_records_get':
+            return 200, {}, zone
+        if endpoint in ('godaddy_records_put', 'godaddy_records_patch'):
+            try:
+                records = json.loads(body or b'[]')
+            except ValueError:
+                return 400, {}, {'message': 'invalid JSON'}
+            record_set = path.split('/records', 1)[1].strip('/').split('/')
+            if endpoint == 'godaddy_records_put' and len(record_set) == 2:
+                # PUT /records/{type}/{name} replaces just that record set
+                record_type, name = record_set
+                self.dns_zones[domain] = [
+                    record for record in zone
+                    if (record['type'], record['name']) != (record_type, name)
+                ] + [dict(record, type=record_type, name=name) for record in records]
+            elif endpoint == 'godaddy_records_put':
+                self.dns_zones[domain] = records
+            else:
+                zone.extend(records)
+            return 200, {}, None
+        return 404, {}, {'message': 'not found'}
+
+    def _handler_class(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length) if length else b''
+                status, headers, payload = upstream.respond(self.command, self.path, body)
+                data = b'' if payload is None else json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if data:
+                    self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local GitHub/GitLab/GoDaddy API stand-in')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra uniform random seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 502 responses')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of 429 responses')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds on 429')
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(port=args.port, latency=args.latency, jitter=args.jitter,
+                            error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                            retry_after=args.retry_after)
+    print(f"Fake upstream listening on {upstream.url}")
+    try:
+        upstream.server.serve_forever()
+    except KeyboardInterrupt:
+        print(json.dumps(upstream.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the webhook handler benchmarks: starting the handler in
+either serving mode, waiting for its dispatch queue to drain, and latency
+percentiles.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import subprocess
+import http.client
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_env(upstream_url, **overrides):
+    """Environment pointing the handler at a fake upstream, with placeholder credentials"""
+    env = dict(
+        os.environ,
+        GITHUB_API_URL=upstream_url,
+        GITLAB_API_URL=upstream_url,
+        GITHUB_TOKEN='benchmark-token',
+        GITLAB_TOKEN='benchmark-token',
+        GITLAB_PROJECT_ID='1',
+        IDEMPOTENCY_DB=''
+    )
+    env.update({name: str(value) for name, value in overrides.items()})
+    return env
+
+
+def start_server(mode, port, env, workdir, workers=1):
+    """Run the handler under gunicorn (sync) or uvicorn (async) and wait for /health"""
+    if mode == 'sync':
+        command = [
+            sys.executable, '-m', 'gunicorn', '-c', os.path.join(SCRIPTS_DIR, 'gunicorn.conf.py'),
+            '--pythonpath', SCRIPTS_DIR, '-w', str(workers),
+            '-b', f'127.0.0.1:{port}', '--log-level', 'warning', 'webhook_handler:app'
+        ]
+    else:
+        command = [
+            sys.executable, '-m', 'uvicorn', '--app-dir', SCRIPTS_DIR, '--workers', str(workers),
+            '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning', 'webhook_asgi:app'
+        ]
+    process = subprocess.Popen(command, env=env, cwd=workdir,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/health')
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'{mode} server did not start on port {port}')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def get_json(host, port, path):
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    connection.request('GET', path)
+    return json.loads(connection.getresponse().read())
+
+
+def wait_for_drain(host, port, timeout=300):
+    """Poll /status until no dispatch job is queued or running; returns False on timeout"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = get_json(host, port, '/status?limit=0')
+        queue = status['dispatch_queue']
+        pending = status.get('coalescing', {}).get('pending_batches', 0)
+        if queue['queued'] == 0 and queue['running'] == 0 and queue['depth'] == 0 and pending == 0:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
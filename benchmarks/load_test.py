@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Webhook Pipeline Load Test
+
+Replays recorded GitLab push and pipeline payloads (benchmarks/payloads/)
+against /webhook/gitlab at a fixed concurrency, with a local fake
+GitHub/GitLab API behind the handler. Reports throughput, p50/p95/p99
+latency, status and error counts, dispatch drain time and upstream call
+counts, and saves them as JSON so runs can be compared. Runs fully offline.
+
+Usage:
+    python benchmarks/load_test.py --mode sync --requests 1000 --concurrency 32 \\
+        --latency 0.1 --error-rate 0.02 --rate-limit-rate 0.01 --output results/sync.json
+    python benchmarks/load_test.py --mode async --baseline results/sync.json
+"""
+
+import os
+import sys
+import json
+import copy
+import time
+import uuid
+import hmac
+import random
+import hashlib
+import argparse
+import tempfile
+import threading
+import http.client
+from collections import Counter
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_upstream import FakeUpstream
+from harness import free_port, server_env, start_server, stop_server, wait_for_drain, percentile
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'payloads')
+PAYLOAD_FILES = {
+    'push': 'gitlab_push.json',
+    'pipeline_success': 'gitlab_pipeline_success.json',
+    'pipeline_failed': 'gitlab_pipeline_failed.json'
+}
+
+
+def parse_mix(spec):
+    """'push=8,pipeline_success=1' -> [('push', 8.0), ('pipeline_success', 1.0)]"""
+    mix = []
+    for item in spec.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in PAYLOAD_FILES:
+            raise ValueError(f'Unknown payload kind: {name}')
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def load_templates():
+    templates = {}
+    for kind, filename in PAYLOAD_FILES.items():
+        with open(os.path.join(PAYLOAD_DIR, filename)) as f:
+            templates[kind] = json.load(f)
+    return templates
+
+
+def build_deliveries(args, templates, rng):
+    """Pre-render every request so the client loop only does I/O"""
+    kinds = [name for name, _ in parse_mix(args.mix)]
+    weights = [weight for _, weight in parse_mix(args.mix)]
+    deliveries = []
+    for index in range(args.requests):
+        if deliveries and rng.random() < args.duplicate_rate:
+            deliveries.append(rng.choice(deliveries))
+            continue
+        kind = rng.choices(kinds, weights)[0]
+        payload = copy.deepcopy(templates[kind])
+        sha = hashlib.sha1(f'{args.seed}-{index}'.encode()).hexdigest()
+        if kind == 'push':
+            payload['after'] = sha
+            payload['commits'][-1]['id'] = sha
+        else:
+            payload['object_attributes']['id'] = 10 ** 9 + index
+            payload['object_attributes']['sha'] = sha
+        body = json.dumps(payload).encode()
+        headers = {
+            'Content-Type': 'application/json',
+            'X-Gitlab-Event': 'Push Hook' if kind == 'push' else 'Pipeline Hook',
+            'X-Gitlab-Event-UUID': str(uuid.UUID(int=rng.getrandbits(128)))
+        }
+        if args.secret:
+            digest = hmac.new(args.secret.encode(), body, hashlib.sha256).hexdigest()
+            headers['X-Gitlab-Token'] = f'sha256={digest}'
+        deliveries.append((kind, body, headers))
+    return deliveries
+
+
+def fire(host, port, deliveries, concurrency):
+    latencies = []
+    statuses = Counter()
+    position = iter(range(len(deliveries)))
+    lock = threading.Lock()
+
+    def worker():
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+        while True:
+            with lock:
+                index = next(position, None)
+            if index is None:
+                connection.close()
+                return
+            _, body, headers = deliveries[index]
+            started = time.perf_counter()
+            try:
+                connection.request('POST', '/webhook/gitlab', body, headers)
+                response = connection.getresponse()
+                response.read()
+                status = str(response.status)
+            except (OSError, http.client.HTTPException) as e:
+                status = f'exception:{type(e).__name__}'
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=60)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, time.perf_counter() - started
+
+
+def summarize(args, latencies, statuses, duration, drain_seconds, upstream_calls):
+    errors = sum(count for status, count in statuses.items()
+                 if status.startswith('exception') or int(status) >= 400)
+    return {
+        'timestamp': datetime.utcnow().isoformat(),
+        'config': {
+            'mode': args.mode,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'mix': args.mix,
+            'duplicate_rate': args.duplicate_rate,
+            'upstream_latency': args.latency,
+            'upstream_jitter': args.jitter,
+            'upstream_error_rate': args.error_rate,
+            'upstream_rate_limit_rate': args.rate_limit_rate,
+            'coalesce_window': args.coalesce_window,
+            'workers': args.workers
+        },
+        'duration_seconds': round(duration, 3),
+        'throughput_rps': round(len(latencies) / duration, 1) if duration else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99': round(percentile(latencies, 0.99) * 1000, 2),
+            'max': round(max(latencies) * 1000, 2) if latencies else 0.0,
+            'mean': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0
+        },
+        'status_counts': dict(sorted(statuses.items())),
+        'errors': errors,
+        'drain_seconds': round(drain_seconds, 3) if drain_seconds is not None else None,
+        'upstream_calls': upstream_calls
+    }
+
+
+def print_report(report, baseline=None):
+    latency = report['latency_ms']
+    print(f"mode={report['config']['mode']} requests={report['config']['requests']} "
+          f"concurrency={report['config']['concurrency']}")
+    print(f"  throughput   {report['throughput_rps']} req/s")
+    print(f"  latency ms   p50={latency['p50']} p95={latency['p95']} p99={latency['p99']} max={latency['max']}")
+    print(f"  statuses     {report['status_counts']} errors={report['errors']}")
+    print(f"  drain        {report['drain_seconds']} s")
+    print(f"  upstream     {report['upstream_calls']}")
+    if baseline:
+        print("  vs baseline:")
+        rows = [('throughput_rps', report['throughput_rps'], baseline['throughput_rps'])]
+        rows += [(f'latency_{key}_ms', latency[key], baseline['latency_ms'][key]) for key in ('p50', 'p95', 'p99')]
+        rows.append(('errors', report['errors'], baseline['errors']))
+        for name, current, previous in rows:
+            change = f'{(current - previous) / previous * 100:+.1f}%' if previous else 'n/a'
+            print(f"    {name:<16} {previous:>10} -> {current:<10} ({change})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the webhook pipeline against a fake upstream')
+    parser.add_argument('--mode', choices=['sync', 'async', 'external'], default='sync',
+                        help='start the handler under gunicorn/uvicorn, or target an already running one')
+    parser.add_argument('--target', default='127.0.0.1:5000', help='host:port for --mode external')
+    parser.add_argument('--workers', type=int, default=1, help='server processes to start')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--mix', default='push=8,pipeline_success=1,pipeline_failed=1')
+    parser.add_argument('--duplicate-rate', type=float, default=0.0, help='fraction of re-delivered webhooks')
+    parser.add_argument('--coalesce-window', type=float, default=0.0, help='content_updated coalescing seconds')
+    parser.add_argument('--latency', type=float, default=0.05, help='fake upstream latency seconds')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--upstream-retries', type=int, default=3)
+    parser.add_argument('--secret', default='', help='GITLAB_WEBHOOK_SECRET to sign deliveries with')
+    parser.add_argument('--no-drain', action='store_true', help='do not wait for dispatches to finish')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--baseline', help='previous JSON report to compare against')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    deliveries = build_deliveries(args, load_templates(), rng)
+    upstream = FakeUpstream(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                            rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+                            seed=args.seed).start()
+
+    process = None
+    workdir = tempfile.TemporaryDirectory()
+    try:
+        if args.mode == 'external':
+            host, _, port = args.target.partition(':')
+            port = int(port or 80)
+            print(f"Point the handler's GITHUB_API_URL/GITLAB_API_URL at {upstream.url}")
+        else:
+            host, port = '127.0.0.1', free_port()
+            env = server_env(
+                upstream.url,
+                GITLAB_WEBHOOK_SECRET=args.secret,
+                COALESCE_WINDOWS=f'content_updated={args.coalesce_window}',
+                UPSTREAM_MAX_RETRIES=args.upstream_retries,
+                DISPATCH_QUEUE_SIZE=max(1000, args.requests * 2)
+            )
+            process = start_server(args.mode, port, env, workdir.name, workers=args.workers)
+
+        started = time.perf_counter()
+        latencies, statuses, duration = fire(host, port, deliveries, args.concurrency)
+        drain_seconds = None
+        if not args.no_drain:
+            if not wait_for_drain(host, port):
+                print("Warning: dispatch queue did not drain before timeout")
+            drain_seconds = time.perf_counter() - started
+    finally:
+        if process is not None:
+            stop_server(process)
+        upstream.stop()
+        workdir.cleanup()
+
+    report = summarize(args, latencies, statuses, duration, drain_seconds, upstream.stats())
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Microbenchmark
+
+Measures the per-call cost of admitting a request after N earlier calls in
+the window, for the old `rate_limit` decorator (rebuilds a list of call
+timestamps every call) and for GCRALimiter on each store. Then checks that
+several processes sharing a file/SQLite store are admitted no more than the
+combined quota.
+
+Usage:
+    python benchmarks/rate_limiter.py --history 100,1000,10000,50000 --calls 2000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from rate_limiter import GCRALimiter, open_store
+
+
+def legacy_limiter(calls_per_minute):
+    """The sliding-list check the DNS scripts used before GCRALimiter"""
+    state = {'last_calls': []}
+
+    def admit():
+        now = time.time()
+        state['last_calls'] = [call for call in state['last_calls'] if call > now - 60]
+        if len(state['last_calls']) >= calls_per_minute:
+            raise Exception(f'Rate limit exceeded: {calls_per_minute} calls per minute')
+        state['last_calls'].append(now)
+
+    return admit, state
+
+
+def time_calls(admit, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        admit()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def bench_legacy(history, calls):
+    admit, state = legacy_limiter(10 ** 9)
+    state['last_calls'] = [time.time()] * history
+    return time_calls(admit, calls)
+
+
+def bench_gcra(spec, history, calls):
+    limiter = GCRALimiter(10 ** 9, 60.0, key='bench', store=open_store(spec))
+    for _ in range(history):
+        limiter.try_acquire()
+    return time_calls(limiter.try_acquire, calls)
+
+
+def worker(spec, rate, seconds, results):
+    limiter = GCRALimiter(rate, 60.0, key='shared', store=open_store(spec))
+    admitted = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        if limiter.try_acquire():
+            admitted += 1
+    results.put(admitted)
+
+
+def shared_quota(spec, processes, rate, seconds):
+    """Total admissions across processes hammering one key; GCRA allows burst + rate * elapsed"""
+    results = multiprocessing.Queue()
+    jobs = [multiprocessing.Process(target=worker, args=(spec, rate, seconds, results)) for _ in range(processes)]
+    for job in jobs:
+        job.start()
+    for job in jobs:
+        job.join()
+    per_process = [results.get() for _ in jobs]
+    return {'store': spec.split(':')[0], 'processes': processes, 'admitted': sum(per_process),
+            'allowed': int(1 + rate * seconds / 60), 'per_process': per_process}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-call overhead of the DNS/upstream rate limiters')
+    parser.add_argument('--history', default='100,1000,10000,50000', help='earlier calls already in the window')
+    parser.add_argument('--calls', type=int, default=2000, help='timed calls per measurement')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    rows = []
+    for history in (int(value) for value in args.history.split(',')):
+        row = {
+            'history': history,
+            'legacy_us': round(bench_legacy(history, args.calls), 2),
+            'gcra_memory_us': round(bench_gcra('memory', history, args.calls), 2),
+            'gcra_file_us': round(bench_gcra(f'file:{workdir}/h{history}.json', history, args.calls), 2),
+            'gcra_sqlite_us': round(bench_gcra(f'sqlite:{workdir}/h{history}.db', history, args.calls), 2)
+        }
+        rows.append(row)
+
+    print(f"{'history':>8} {'legacy us':>10} {'memory us':>10} {'file us':>9} {'sqlite us':>10}")
+    for row in rows:
+        print(f"{row['history']:>8} {row['legacy_us']:>10} {row['gcra_memory_us']:>10} "
+              f"{row['gcra_file_us']:>9} {row['gcra_sqlite_us']:>10}")
+
+    quotas = [
+        shared_quota(f'file:{workdir}/shared.json', args.processes, 30, 2),
+        shared_quota(f'sqlite:{workdir}/shared.db', args.processes, 30, 2)
+    ]
+    print()
+    for quota in quotas:
+        print(f"{quota['store']:<7} {quota['processes']} processes admitted {quota['admitted']} "
+              f"(quota allows {quota['allowed']}): {quota['per_process']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'calls': args.calls, 'overhead': rows, 'shared_quota': quotas}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+DNS Record Validator Benchmark
+
+Builds a large synthetic desired state (many domains, a mix of A, AAAA,
+CNAME, MX, TXT and SRV records, with a sprinkling of deliberate errors)
+and times scripts/record_validator.py over it. For reference it also times
+the old per-value checks (uncompiled re.match per call), which can only
+cover domains, types and IPv4 A records.
+
+Usage:
+    python benchmarks/record_validator.py --domains 200 --records-per-domain 50
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from record_validator import validate_zones
+
+
+def legacy_validate(zones):
+    """The one-value-at-a-time checks update_godaddy_dns.py used, stopping at the first error"""
+    def validate_domain(domain):
+        if not re.match(r'^[a-zA-Z0-9][a-zA-Z0-9-]{1,61}[a-zA-Z0-9]\.[a-zA-Z]{2,}$', domain):
+            raise ValueError(f'Invalid domain format: {domain}')
+
+    def validate_record_type(record_type):
+        valid_types = ['A', 'AAAA', 'CNAME', 'MX', 'NS', 'SOA', 'SRV', 'TXT']
+        if record_type not in valid_types:
+            raise ValueError(f'Invalid record type: {record_type}')
+
+    def validate_ip(ip):
+        if not re.match(r'^\d{1,3}(\.\d{1,3}){3}$', ip):
+            raise ValueError(f'Invalid IP format: {ip}')
+        for octet in ip.split('.'):
+            if not 0 <= int(octet) <= 255:
+                raise ValueError(f'Invalid IP octet value in: {ip}')
+
+    errors = 0
+    for domain, records in zones.items():
+        try:
+            validate_domain(domain)
+        except ValueError:
+            errors += 1
+        for record in records:
+            try:
+                validate_record_type(record['type'])
+                if record['type'] == 'A':
+                    validate_ip(record['data'])
+            except ValueError:
+                errors += 1
+    return errors
+
+
+def synthetic_zones(domains, per_domain, error_rate, seed):
+    rng = random.Random(seed)
+    zones = {}
+    for d in range(domains):
+        records = [
+            {'type': 'A', 'name': '@', 'data': f'185.199.{108 + d % 4}.153', 'ttl': 600},
+            {'type': 'CNAME', 'name': 'www', 'data': 'peacefulrobot.github.io', 'ttl': 600},
+            {'type': 'MX', 'name': '@', 'data': 'mx1.example.net', 'priority': 10, 'ttl': 3600},
+            {'type': 'TXT', 'name': '@', 'data': 'v=spf1 include:_spf.example.net ~all', 'ttl': 3600},
+            {'type': 'SRV', 'name': '_sip._tcp', 'data': 'sip.example.net', 'priority': 10, 'weight': 5,
+             'port': 5060, 'ttl': 3600}
+        ]
+        for r in range(len(records), per_domain):
+            kind = rng.choice(['A', 'AAAA', 'CNAME', 'TXT'])
+            name = f'host{r}'
+            if kind == 'A':
+                data = f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}'
+            elif kind == 'AAAA':
+                data = f'2001:db8:{d:x}::{r:x}'
+            elif kind == 'CNAME':
+                data = f'target{r}.example.org'
+            else:
+                data = f'token-{rng.getrandbits(64):x}'
+            records.append({'type': kind, 'name': name, 'data': data, 'ttl': 600})
+        for record in records:
+            if rng.random() < error_rate:
+                record['data'] = rng.choice(['999.1.1.1', 'not a host', '2001:db8::zz', ''])
+        if rng.random() < error_rate:
+            records.append({'type': 'CNAME', 'name': '@', 'data': 'apex.example.org', 'ttl': 600})
+        zones[f'zone{d}.example.com'] = records
+    return zones
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time zone-level DNS record validation')
+    parser.add_argument('--domains', type=int, default=200)
+    parser.add_argument('--records-per-domain', type=int, default=50)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+
+    zones = synthetic_zones(args.domains, args.records_per_domain, args.error_rate, args.seed)
+    total = sum(len(records) for records in zones.values())
+
+    seconds, issues = best_of(lambda: validate_zones(zones), args.repeat)
+    legacy_seconds, legacy_errors = best_of(lambda: legacy_validate(zones), args.repeat)
+
+    report = {
+        'domains': args.domains,
+        'records': total,
+        'validator_seconds': round(seconds, 4),
+        'validator_records_per_second': round(total / seconds),
+        'issues': len(issues),
+        'issues_by_code': dict(Counter(issue.code for issue in issues).most_common()),
+        'legacy_seconds': round(legacy_seconds, 4),
+        'legacy_records_per_second': round(total / legacy_seconds),
+        'legacy_errors_found': legacy_errors
+    }
+    print(f"{total} records across {args.domains} domains")
+    print(f"  validator  {report['validator_seconds']}s ({report['validator_records_per_second']} records/s), "
+          f"{report['issues']} issues {report['issues_by_code']}")
+    print(f"  legacy     {report['legacy_seconds']}s ({report['legacy_records_per_second']} records/s), "
+          f"{legacy_errors} errors (types and IPv4 only; its domain regex rejects multi-label zones)")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
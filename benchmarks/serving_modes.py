@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Sync (gunicorn/Flask) vs Async (uvicorn/ASGI) Serving Mode Benchmark
+
+Starts the local GitHub API stand-in (fake_upstream.py) with a fixed response
+delay, runs the webhook handler in each serving mode against it, fires
+GitLab push webhooks at a fixed concurrency and reports ingest
+requests/sec, p50/p99 latency and how long the dispatch queue takes to
+drain (i.e. upstream dispatch throughput). Runs fully offline.
+
+Usage:
+    python benchmarks/serving_modes.py --requests 500 --concurrency 32 --upstream-delay 0.2
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import http.client
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_upstream import FakeUpstream
+from harness import free_port, server_env, start_server, stop_server, wait_for_drain, percentile
+
+
+def fire_webhooks(port, total, concurrency):
+    latencies = []
+    errors = [0]
+    counter = iter(range(total))
+    lock = threading.Lock()
+
+    def worker():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            body = json.dumps({
+                'object_kind': 'push',
+                'ref': 'refs/heads/main',
+                'after': f'{index:040x}',
+                'commits': [{'id': f'{index:040x}', 'message': 'bench', 'author': {'name': 'bench'}}]
+            })
+            started = time.perf_counter()
+            try:
+                connection.request('POST', '/webhook/gitlab', body, {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors[0] += 1
+            except (OSError, http.client.HTTPException):
+                errors[0] += 1
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - started
+
+
+def run_mode(mode, args, upstream_url):
+    port = free_port()
+    env = server_env(
+        upstream_url,
+        COALESCE_WINDOWS='content_updated=0',
+        UPSTREAM_MAX_RETRIES=0,
+        DISPATCH_WORKERS=args.sync_workers,
+        ASYNC_DISPATCH_CONCURRENCY=args.async_concurrency,
+        DISPATCH_QUEUE_SIZE=max(1000, args.requests * 2)
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        process = start_server(mode, port, env, workdir)
+        try:
+            started = time.perf_counter()
+            latencies, errors, ingest_seconds = fire_webhooks(port, args.requests, args.concurrency)
+            wait_for_drain('127.0.0.1', port)
+            drain_seconds = time.perf_counter() - started
+        finally:
+            stop_server(process)
+
+    return {
+        'mode': mode,
+        'requests': args.requests,
+        'errors': errors,
+        'ingest_requests_per_second': round(args.requests / ingest_seconds, 1),
+        'ingest_p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'ingest_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'drain_seconds': round(drain_seconds, 2),
+        'dispatches_per_second': round(args.requests / drain_seconds, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--upstream-delay', type=float, default=0.2, help='seconds per upstream call')
+    parser.add_argument('--sync-workers', type=int, default=4, help='DISPATCH_WORKERS for sync mode')
+    parser.add_argument('--async-concurrency', type=int, default=100, help='ASYNC_DISPATCH_CONCURRENCY')
+    parser.add_argument('--modes', default='sync,async')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(latency=args.upstream_delay).start()
+    results = [run_mode(mode, args, upstream.url) for mode in args.modes.split(',')]
+    upstream.stop()
+
+    report = {'upstream_delay_seconds': args.upstream_delay, 'concurrency': args.concurrency, 'results': results}
+    print(f"{'mode':<6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'drain s':>8} {'dispatch/s':>11} {'errors':>7}")
+    for result in results:
+        print(f"{result['mode']:<6} {result['ingest_requests_per_second']:>9} {result['ingest_p50_ms']:>8} "
+              f"{result['ingest_p99_ms']:>8} {result['drain_seconds']:>8} {result['dispatches_per_second']:>11} "
+              f"{result['errors']:>7}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Webhook Logging Latency Benchmark
+
+Times logger calls on the request thread with the handlers from
+structured_logging.py behind a simulated slow disk (every Nth write stalls
+for a few milliseconds, like an fsync on a busy volume). Compares the old
+synchronous file + stream handlers with the queue-backed mode, and counts
+how many lines one GitLab push used to produce against the single summary
+line now.
+
+Usage:
+    python benchmarks/webhook_logging.py --records 5000 --stall-every 50 --stall-ms 20
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import tempfile
+import statistics
+import logging.handlers
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from structured_logging import RotatingJSONFileHandler, JSONLinesFormatter, DroppingQueueHandler, TEXT_FORMAT
+
+# What the push path logged before: received, push summary, accepted, coalesced
+LEGACY_PUSH_LINES = 4
+
+
+class SlowDiskHandler(RotatingJSONFileHandler):
+    """Stalls every `stall_every`-th write for `stall_ms` milliseconds"""
+
+    def __init__(self, filename, stall_every, stall_ms):
+        super().__init__(filename, max_bytes=1024 * 1024, backup_count=2)
+        self.stall_every = stall_every
+        self.stall_seconds = stall_ms / 1000
+        self.writes = 0
+
+    def emit(self, record):
+        self.writes += 1
+        if self.writes % self.stall_every == 0:
+            time.sleep(self.stall_seconds)
+        super().emit(record)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(mode, records, lines_per_event, stall_every, stall_ms, directory):
+    file_handler = SlowDiskHandler(os.path.join(directory, f'{mode}.log'), stall_every, stall_ms)
+    file_handler.setFormatter(JSONLinesFormatter())
+    stream_handler = logging.StreamHandler(open(os.devnull, 'w'))
+    stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    logger = logging.getLogger(f'bench.{mode}.{lines_per_event}')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    listener = None
+    if mode == 'queue':
+        handler = DroppingQueueHandler(queue.Queue(records * lines_per_event))
+        listener = logging.handlers.QueueListener(handler.queue, file_handler, stream_handler)
+        listener.start()
+        logger.addHandler(handler)
+    else:
+        logger.addHandler(file_handler)
+        logger.addHandler(stream_handler)
+
+    timings = []
+    for number in range(records):
+        started = time.perf_counter()
+        if lines_per_event == 1:
+            logger.info("GitLab push accepted", extra={'fields': {
+                'event': 'push', 'status': 'accepted', 'ref': 'refs/heads/main', 'commit_id': f'{number:040x}'}})
+        else:
+            logger.info("Received GitLab webhook: push")
+            logger.info("Push to refs/heads/main with 3 commits")
+            logger.info(f"Accepted deployment for commit {number:040x} in batch {number:032x}")
+            logger.info(f"Coalesced content_updated for refs/heads/main into batch {number:032x} (2 pushes)")
+        timings.append((time.perf_counter() - started) * 1000)
+
+    drain_started = time.perf_counter()
+    if listener is not None:
+        listener.stop()
+    drain = time.perf_counter() - drain_started
+    file_handler.close()
+    return {
+        'mode': mode,
+        'lines_per_event': lines_per_event,
+        'p50_ms': round(statistics.median(timings), 4),
+        'p99_ms': round(percentile(timings, 0.99), 4),
+        'max_ms': round(max(timings), 2),
+        'drain_s': round(drain, 2),
+        'file_writes': file_handler.writes
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Request-thread logging latency with a slow disk')
+    parser.add_argument('--records', type=int, default=5000, help='simulated webhook events')
+    parser.add_argument('--stall-every', type=int, default=50)
+    parser.add_argument('--stall-ms', type=float, default=20)
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='webhook_logging_')
+    rows = [
+        run('sync', args.records, LEGACY_PUSH_LINES, args.stall_every, args.stall_ms, directory),
+        run('sync', args.records, 1, args.stall_every, args.stall_ms, directory),
+        run('queue', args.records, 1, args.stall_every, args.stall_ms, directory)
+    ]
+
+    print(f"{'mode':<6} {'lines/event':>11} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'writes':>7} {'drain s':>8}")
+    for row in rows:
+        print(f"{row['mode']:<6} {row['lines_per_event']:>11} {row['p50_ms']:>8} {row['p99_ms']:>8} "
+              f"{row['max_ms']:>8} {row['file_writes']:>7} {row['drain_s']:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'records': args.records, 'stall_every': args.stall_every, 'stall_ms': args.stall_ms,
+                       'results': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
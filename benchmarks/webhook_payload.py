@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Webhook Payload Parsing Benchmark
+
+Builds synthetic GitLab push payloads with many commits and compares the
+old request path (body buffered, then parsed again by get_json, the full
+dict kept for the whole delivery) with the single-parse path in
+webhook_payload.py, using the standard json module and orjson. Reports
+median parse time, peak traced memory while parsing, and memory still held
+once the event has been reduced.
+
+Usage:
+    python benchmarks/webhook_payload.py --commits 100,1000,5000 --rounds 20
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+import webhook_payload
+from webhook_payload import extract_gitlab_event
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def push_payload(commits):
+    """GitLab-shaped push event; each commit carries the usual file lists"""
+    return json.dumps({
+        'object_kind': 'push',
+        'event_name': 'push',
+        'before': '0' * 40,
+        'after': f'{commits:040x}',
+        'ref': 'refs/heads/main',
+        'user_name': 'Content Bot',
+        'project': {'id': 1, 'name': 'peacefulrobot.com', 'web_url': 'https://gitlab.com/peaceful-robot/peacefulrobot.com'},
+        'total_commits_count': commits,
+        'commits': [{
+            'id': f'{number:040x}',
+            'message': f'Update page {number}\n\n' + 'Longer description of the change. ' * 8,
+            'title': f'Update page {number}',
+            'timestamp': '2025-01-01T00:00:00+00:00',
+            'url': f'https://gitlab.com/peaceful-robot/peacefulrobot.com/-/commit/{number:040x}',
+            'author': {'name': 'Content Bot', 'email': 'bot@example.com'},
+            'added': [f'assets/img/{number}-{i}.png' for i in range(5)],
+            'modified': [f'pages/{number}-{i}.html' for i in range(10)],
+            'removed': []
+        } for number in range(commits)]
+    }).encode()
+
+
+def legacy(body):
+    """request.get_data() for the signature, then request.get_json() parses the same bytes again"""
+    json.loads(body)
+    return json.loads(body)
+
+
+def single_parse(loads):
+    def parse(body):
+        return extract_gitlab_event(loads(body))
+    return parse
+
+
+def measure(parse, body, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        parse(body)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    event = parse(body)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del event
+    return {
+        'parse_ms': round(statistics.median(timings), 2),
+        'peak_mb': round((peak - baseline) / 1e6, 2),
+        'retained_kb': round((retained - baseline) / 1e3, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse time and memory of GitLab push payload handling')
+    parser.add_argument('--commits', default='100,1000,5000')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+
+    paths = [('legacy (2x json, full dict)', legacy), ('single json + extract', single_parse(json.loads))]
+    if orjson is not None:
+        paths.append(('single orjson + extract', single_parse(orjson.loads)))
+    else:
+        print('orjson not installed; skipping the orjson path (pip install orjson)')
+
+    rows = []
+    for commits in (int(value) for value in args.commits.split(',')):
+        body = push_payload(commits)
+        for name, parse in paths:
+            row = dict(measure(parse, body, args.rounds), commits=commits, body_mb=round(len(body) / 1e6, 2),
+                       path=name)
+            rows.append(row)
+
+    print(f"{'commits':>7} {'body MB':>8} {'path':<28} {'parse ms':>9} {'peak MB':>8} {'held KB':>9}")
+    for row in rows:
+        print(f"{row['commits']:>7} {row['body_mb']:>8} {row['path']:<28} {row['parse_ms']:>9} "
+              f"{row['peak_mb']:>8} {row['retained_kb']:>9}")
+    print(f"webhook_payload backend: {webhook_payload.JSON_BACKEND}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'rounds': args.rounds, 'results': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+Static Asset Optimization Stage
+
+Builds an optimized copy of the site for the deploy pipeline:
+
+1. minifies HTML (plus inline <style>/<script>), CSS and JS;
+2. fingerprints assets (CSS, JS, images, fonts) as name.<hash>.ext and
+   rewrites references to them in HTML and CSS;
+3. writes precompressed .gz (and .br, when the brotli module is
+   installed) variants next to every compressible file, for hosts and CDNs
+   that serve them;
+4. adds Cache-Control rules to netlify.toml and vercel.json: immutable,
+   one-year max-age for fingerprinted assets, and a short, revalidated
+   max-age for HTML;
+5. reports bytes saved per file.
+
+The source directory is never modified. Output is deterministic (gzip
+mtime is zeroed) so the deploy digest only changes when the content does.
+
+Usage:
+    python scripts/asset_optimizer.py <source_dir> <output_dir> [--report asset_report.json]
+"""
+
+import os
+import re
+import json
+import gzip
+import shutil
+import hashlib
+import logging
+import argparse
+import posixpath
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+HTML_EXTENSIONS = ('.html', '.htm')
+ASSET_EXTENSIONS = ('.css', '.js', '.mjs', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.avif',
+                    '.ico', '.woff', '.woff2', '.ttf', '.otf', '.eot', '.mp4', '.webm')
+COMPRESSIBLE_EXTENSIONS = ('.html', '.htm', '.css', '.js', '.mjs', '.svg', '.json', '.xml', '.txt', '.map',
+                           '.webmanifest', '.ico')
+# Names other sites and crawlers fetch at a fixed URL
+FIXED_NAMES = frozenset(['favicon.ico', 'apple-touch-icon.png', 'robots.txt', 'sitemap.xml', 'CNAME',
+                         'netlify.toml', 'vercel.json', 'firebase.json', '_headers', '_redirects'])
+COMPRESS_MIN_BYTES = 256
+FINGERPRINT_LENGTH = 10
+
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_HTML = 'public, max-age=60, must-revalidate'
+NETLIFY_BEGIN = '# BEGIN asset_optimizer cache headers'
+NETLIFY_END = '# END asset_optimizer cache headers'
+
+HTML_PRESERVE_RE = re.compile(r'(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\2\s*>)', re.IGNORECASE | re.DOTALL)
+HTML_COMMENT_RE = re.compile(r'<!--(?!\[if|<!|>).*?-->', re.DOTALL)
+WHITESPACE_RE = re.compile(r'\s+')
+SCRIPT_TYPE_RE = re.compile(r'\btype\s*=\s*["\']?([^"\'\s>]+)', re.IGNORECASE)
+HTML_REF_RE = re.compile(r'(\b(?:src|href|poster|data-src)\s*=\s*)(["\'])([^"\']+)\2', re.IGNORECASE)
+SRCSET_RE = re.compile(r'(\bsrcset\s*=\s*)(["\'])([^"\']+)\2', re.IGNORECASE)
+CSS_URL_RE = re.compile(r'(url\(\s*)(["\']?)([^"\')]+)\2(\s*\))', re.IGNORECASE)
+CSS_IMPORT_RE = re.compile(r'(@import\s+)(["\'])([^"\']+)\2', re.IGNORECASE)
+CSS_TOKEN_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/|\s+|[^"\'/\s]+|/', re.DOTALL)
+CSS_TIGHT_RE = re.compile(r'\s*([{};,>])\s*')
+# At-rules whose block holds rules (selectors, where ' :hover' matters) rather than declarations
+CSS_NESTING_AT_RULE_RE = re.compile(r'@(?:-\w+-)?(?:media|supports|document|layer|container|scope)\b', re.IGNORECASE)
+JS_TYPES = ('text/javascript', 'application/javascript', 'module')
+# After these characters a '/' starts a regex literal, otherwise it is division
+JS_REGEX_PREFIX = frozenset('(,=:[!&|?{};+-*%<>~^')
+
+
+def minify_css(css):
+    """Drop comments (except /*! ... */) and insignificant whitespace; strings are left untouched"""
+    out = []
+    pending_space = False
+    # One entry per open block: True when it holds declarations, where a space before ':' is never significant
+    blocks = []
+    prelude = ''
+    for token in CSS_TOKEN_RE.findall(css):
+        if token.isspace() or (token.startswith('/*') and not token.startswith('/*!')):
+            pending_space = pending_space or token.isspace()
+            continue
+        quoted = token[0] in '"\'' or token.startswith('/*')
+        if not quoted:
+            token = CSS_TIGHT_RE.sub(r'\1', token)
+        if pending_space and out:
+            previous = out[-1]
+            # A space is only significant between two word-ish tokens (selectors, values, media queries)
+            if (not (previous[-1] in '{};,>:' and previous[0] not in '"\'') and token[0] not in '{};,>'
+                    and not (token[0] == ':' and blocks and blocks[-1])):
+                out.append(' ')
+                prelude += ' '
+        pending_space = False
+        out.append(token)
+        if quoted:
+            if token[0] in '"\'':
+                prelude += token
+            continue
+        for char in token:
+            if char == '{':
+                blocks.append(not CSS_NESTING_AT_RULE_RE.match(prelude.lstrip()))
+                prelude = ''
+            elif char == '}':
+                if blocks:
+                    blocks.pop()
+                prelude = ''
+            elif char == ';':
+                prelude = ''
+            else:
+                prelude += char
+    return ''.join(out).replace(';}', '}').strip()
+
+
+def minify_js(js):
+    """Conservative JS minifier: removes comments and indentation but keeps line breaks, so ASI is unaffected"""
+    out = []
+    i = 0
+    length = len(js)
+    last = ''
+    while i < length:
+        char = js[i]
+        if char in '"\'`':
+            end = i + 1
+            while end < length and js[end] != char:
+                end += 2 if js[end] == '\\' else 1
+            out.append(js[i:end + 1])
+            last = char
+            i = end + 1
+        elif js.startswith('//', i):
+            end = js.find('\n', i)
+            i = length if end == -1 else end
+        elif js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            end = length if end == -1 else end + 2
+            if js.startswith('/*!', i):
+                out.append(js[i:end])
+            i = end
+        elif char == '/' and (not last or last in JS_REGEX_PREFIX):
+            end = i + 1
+            in_class = False
+            while end < length and js[end] != '\n' and (js[end] != '/' or in_class):
+                if js[end] == '\\':
+                    end += 1
+                elif js[end] == '[':
+                    in_class = True
+                elif js[end] == ']':
+                    in_class = False
+                end += 1
+            out.append(js[i:end + 1])
+            last = '/'
+            i = end + 1
+        elif char.isspace():
+            end = i
+            while end < length and js[end].isspace():
+                end += 1
+            out.append('\n' if '\n' in js[i:end] else ' ')
+            i = end
+        else:
+            out.append(char)
+            last = char
+            i += 1
+    lines = (line.strip() for line in ''.join(out).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def minify_html(html):
+    """Collapse whitespace and drop comments outside <pre>/<textarea>; minify inline <style> and JS <script>"""
+    out = []
+    position = 0
+    for match in HTML_PRESERVE_RE.finditer(html):
+        out.append(collapse_html(html[position:match.start()]))
+        opening, tag, body, closing = match.group(1), match.group(2).lower(), match.group(3), match.group(4)
+        if tag == 'style':
+            body = minify_css(body)
+        elif tag == 'script':
+            script_type = SCRIPT_TYPE_RE.search(opening)
+            if script_type is None or script_type.group(1).lower() in JS_TYPES:
+                body = minify_js(body)
+        out.append(collapse_html(opening) + body + closing)
+        position = match.end()
+    out.append(collapse_html(html[position:]))
+    return ''.join(out).strip()
+
+
+def collapse_html(fragment):
+    return WHITESPACE_RE.sub(' ', HTML_COMMENT_RE.sub('', fragment))
+
+
+MINIFIERS = {'.html': minify_html, '.htm': minify_html, '.css': minify_css, '.js': minify_js, '.mjs': minify_js}
+
+
+def fingerprinted_name(path, data):
+    digest = hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]
+    stem, extension = posixpath.splitext(path)
+    return f'{stem}.{digest}{extension}'
+
+
+def split_reference(reference):
+    """'img/a.png?v=1#x' -> ('img/a.png', '?v=1#x')"""
+    match = re.search(r'[?#]', reference)
+    if match is None:
+        return reference, ''
+    return reference[:match.start()], reference[match.start():]
+
+
+def rewrite_reference(reference, referrer, mapping):
+    """Point a reference at the fingerprinted name, keeping it absolute or relative as written"""
+    if '://' in reference or reference.startswith(('//', 'data:', 'mailto:', '#', 'javascript:')):
+        return reference
+    path, suffix = split_reference(reference)
+    if not path:
+        return reference
+    if path.startswith('/'):
+        target = posixpath.normpath(path.lstrip('/'))
+    else:
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(referrer), path))
+    renamed = mapping.get(target)
+    if renamed is None:
+        return reference
+    if path.startswith('/'):
+        return '/' + renamed + suffix
+    return posixpath.relpath(renamed, posixpath.dirname(referrer) or '.') + suffix
+
+
+def rewrite_css(css, referrer, mapping):
+    css = CSS_URL_RE.sub(lambda m: m.group(1) + m.group(2) + rewrite_reference(m.group(3).strip(), referrer, mapping)
+                         + m.group(2) + m.group(4), css)
+    return CSS_IMPORT_RE.sub(lambda m: m.group(1) + m.group(2) + rewrite_reference(m.group(3), referrer, mapping)
+                             + m.group(2), css)
+
+
+def rewrite_html(html, referrer, mapping):
+    html = HTML_REF_RE.sub(lambda m: m.group(1) + m.group(2) + rewrite_reference(m.group(3), referrer, mapping)
+                           + m.group(2), html)
+
+    def srcset(match):
+        candidates = []
+        for candidate in match.group(3).split(','):
+            parts = candidate.strip().split(None, 1)
+            if parts:
+                parts[0] = rewrite_reference(parts[0], referrer, mapping)
+            candidates.append(' '.join(parts))
+        return match.group(1) + match.group(2) + ', '.join(candidates) + match.group(2)
+
+    html = SRCSET_RE.sub(srcset, html)
+    # Inline style attributes and <style> blocks
+    return rewrite_css(html, referrer, mapping)
+
+
+def css_dependencies(css, referrer):
+    dependencies = set()
+    for match in list(CSS_URL_RE.finditer(css)) + list(CSS_IMPORT_RE.finditer(css)):
+        path = split_reference(match.group(3).strip())[0]
+        if path and '://' not in path and not path.startswith(('//', 'data:')):
+            base = '' if path.startswith('/') else posixpath.dirname(referrer)
+            dependencies.add(posixpath.normpath(posixpath.join(base, path.lstrip('/'))))
+    return dependencies
+
+
+def gzip_bytes(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class AssetOptimizer:
+    def __init__(self, source_dir, output_dir, minify=True, fingerprint=True, compress=True, cache_headers=True):
+        self.source_dir = os.path.abspath(source_dir)
+        self.output_dir = os.path.abspath(output_dir)
+        self.minify = minify
+        self.fingerprint = fingerprint
+        self.compress = compress
+        self.cache_headers = cache_headers
+        self.files = {}       # relative path -> bytes (final content)
+        self.original = {}    # relative path -> original size
+        self.mapping = {}     # relative path -> fingerprinted relative path
+        self.report = {}
+
+    def collect(self):
+        """Read every non-hidden file of the source (skipping the output dir if it is nested inside)"""
+        for root, dirs, files in os.walk(self.source_dir):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.')
+                             and os.path.join(root, d) != self.output_dir)
+            for name in files:
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.source_dir).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    self.files[relative] = f.read()
+                self.original[relative] = len(self.files[relative])
+
+    def minify_all(self):
+        for path, data in self.files.items():
+            minifier = MINIFIERS.get(posixpath.splitext(path)[1].lower())
+            if minifier is None:
+                continue
+            try:
+                text = data.decode('utf-8')
+            except UnicodeDecodeError:
+                logger.warning(f"Not minifying {path}: not UTF-8")
+                continue
+            self.files[path] = minifier(text).encode('utf-8')
+
+    def fingerprintable(self, path):
+        return (posixpath.basename(path) not in FIXED_NAMES
+                and posixpath.splitext(path)[1].lower() in ASSET_EXTENSIONS)
+
+    def rename(self, path):
+        renamed = fingerprinted_name(path, self.files[path])
+        self.mapping[path] = renamed
+
+    def fingerprint_all(self):
+        """Leaf assets first, then CSS in dependency order (CSS may reference images, fonts and other CSS)"""
+        assets = [path for path in self.files if self.fingerprintable(path)]
+        stylesheets = {path for path in assets if path.lower().endswith('.css')}
+        for path in assets:
+            if path not in stylesheets:
+                self.rename(path)
+
+        pending = {path: css_dependencies(self.files[path].decode('utf-8', 'replace'), path) for path in stylesheets}
+        while pending:
+            ready = [path for path, needs in pending.items() if not (needs & pending.keys()) - {path}]
+            # An @import cycle: fingerprint the rest without waiting for each other
+            for path in sorted(ready or pending):
+                text = self.files[path].decode('utf-8', 'replace')
+                self.files[path] = rewrite_css(text, path, self.mapping).encode('utf-8')
+                self.rename(path)
+                del pending[path]
+
+        for path in self.files:
+            if path.lower().endswith(HTML_EXTENSIONS):
+                text = self.files[path].decode('utf-8', 'replace')
+                self.files[path] = rewrite_html(text, path, self.mapping).encode('utf-8')
+
+    def output_path(self, path):
+        return self.mapping.get(path, path)
+
+    def write_file(self, relative, data):
+        destination = os.path.join(self.output_dir, relative)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        with open(destination, 'wb') as f:
+            f.write(data)
+
+    def write_all(self):
+        if os.path.isdir(self.output_dir):
+            shutil.rmtree(self.output_dir)
+        os.makedirs(self.output_dir)
+        for path in sorted(self.files):
+            data = self.files[path]
+            output = self.output_path(path)
+            self.write_file(output, data)
+            entry = {'output': output, 'original_bytes': self.original[path], 'minified_bytes': len(data),
+                     'gzip_bytes': None, 'brotli_bytes': None}
+            if (self.compress and len(data) >= COMPRESS_MIN_BYTES
+                    and posixpath.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS):
+                compressed = gzip_bytes(data)
+                self.write_file(output + '.gz', compressed)
+                entry['gzip_bytes'] = len(compressed)
+                if brotli is not None:
+                    compressed = brotli.compress(data, quality=11)
+                    self.write_file(output + '.br', compressed)
+                    entry['brotli_bytes'] = len(compressed)
+            transfer = min(value for value in (entry['minified_bytes'], entry['gzip_bytes'], entry['brotli_bytes'])
+                           if value is not None)
+            entry['transfer_bytes'] = transfer
+            entry['saved_bytes'] = entry['original_bytes'] - transfer
+            self.report[path] = entry
+
+    def cache_rules(self):
+        """[(url path, Cache-Control)] for every HTML file and fingerprinted asset"""
+        rules = []
+        for path in sorted(self.files):
+            output = self.output_path(path)
+            if path in self.mapping:
+                rules.append(('/' + output, CACHE_IMMUTABLE))
+            elif path.lower().endswith(HTML_EXTENSIONS):
+                rules.append(('/' + output, CACHE_HTML))
+                if posixpath.basename(output) == 'index.html':
+                    rules.append(('/' + posixpath.dirname(output) + ('/' if posixpath.dirname(output) else ''),
+                                  CACHE_HTML))
+        return rules
+
+    def write_netlify(self, rules):
+        """Replace the generated block in netlify.toml (per-path rules: Netlify merges overlapping splats)"""
+        existing = self.files.get('netlify.toml', b'').decode('utf-8')
+        existing = re.sub(rf'\n*{re.escape(NETLIFY_BEGIN)}.*?{re.escape(NETLIFY_END)}\n?', '\n', existing,
+                          flags=re.DOTALL).rstrip('\n')
+        block = [NETLIFY_BEGIN]
+        for path, value in rules:
+            block.append(f'[[headers]]\n  for = "{path}"\n  [headers.values]\n    Cache-Control = "{value}"\n')
+        block.append(NETLIFY_END)
+        content = (existing + '\n\n' if existing else '') + '\n'.join(block) + '\n'
+        self.write_file('netlify.toml', content.encode('utf-8'))
+
+    def write_vercel(self, rules):
+        """Merge Cache-Control into vercel.json; uses routes if the project already does (Vercel rejects both)"""
+        try:
+            config = json.loads(self.files.get('vercel.json', b'{}') or b'{}')
+        except ValueError:
+            logger.warning("vercel.json is not valid JSON; writing cache headers to a fresh one")
+            config = {}
+        generated = {path for path, _ in rules}
+        if 'routes' in config:
+            config['routes'] = [{'src': path, 'headers': {'Cache-Control': value}, 'continue': True}
+                                for path, value in rules] + \
+                               [route for route in config['routes'] if route.get('src') not in generated]
+        else:
+            config['headers'] = [rule for rule in config.get('headers', []) if rule.get('source') not in generated] + \
+                                [{'source': path, 'headers': [{'key': 'Cache-Control', 'value': value}]}
+                                 for path, value in rules]
+        self.write_file('vercel.json', (json.dumps(config, indent=2) + '\n').encode('utf-8'))
+
+    def run(self):
+        if self.compress and brotli is None:
+            logger.warning("brotli module not installed: writing .gz variants only; "
+                           "install it with pip install -r scripts/requirements.txt")
+        self.collect()
+        if self.minify:
+            self.minify_all()
+        if self.fingerprint:
+            self.fingerprint_all()
+        self.write_all()
+        if self.cache_headers:
+            rules = self.cache_rules()
+            self.write_netlify(rules)
+            self.write_vercel(rules)
+        return self.summary()
+
+    def summary(self):
+        original = sum(entry['original_bytes'] for entry in self.report.values())
+        transfer = sum(entry['transfer_bytes'] for entry in self.report.values())
+        return {
+            'source_dir': self.source_dir,
+            'output_dir': self.output_dir,
+            'brotli': brotli is not None,
+            'files': self.report,
+            'fingerprinted': len(self.mapping),
+            'original_bytes': original,
+            'minified_bytes': sum(entry['minified_bytes'] for entry in self.report.values()),
+            'transfer_bytes': transfer,
+            'saved_bytes': original - transfer,
+            'saved_percent': round(100.0 * (original - transfer) / original, 1) if original else 0.0
+        }
+
+
+def optimize(source_dir, output_dir, **options):
+    """Build the optimized site into output_dir; returns the byte-savings report"""
+    return AssetOptimizer(source_dir, output_dir, **options).run()
+
+
+def print_report(summary):
+    print(f"{'file':<40} {'original':>9} {'minified':>9} {'gzip':>8} {'brotli':>8} {'saved':>7}")
+    for path, entry in sorted(summary['files'].items()):
+        saved = 100.0 * entry['saved_bytes'] / entry['original_bytes'] if entry['original_bytes'] else 0.0
+        print(f"{path:<40} {entry['original_bytes']:>9} {entry['minified_bytes']:>9} "
+              f"{entry['gzip_bytes'] if entry['gzip_bytes'] is not None else '-':>8} "
+              f"{entry['brotli_bytes'] if entry['brotli_bytes'] is not None else '-':>8} {saved:>6.1f}%")
+    print(f"Total: {summary['original_bytes']} -> {summary['transfer_bytes']} bytes on the wire "
+          f"({summary['saved_percent']}% saved, {summary['fingerprinted']} assets fingerprinted)")
+    if not summary['brotli']:
+        print("brotli module not installed; .br variants were not written (pip install -r scripts/requirements.txt)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Minify, fingerprint and precompress a static site')
+    parser.add_argument('source_dir')
+    parser.add_argument('output_dir')
+    parser.add_argument('--no-minify', action='store_true')
+    parser.add_argument('--no-fingerprint', action='store_true')
+    parser.add_argument('--no-compress', action='store_true')
+    parser.add_argument('--report', help='write the JSON byte-savings report here')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    summary = optimize(args.source_dir, args.output_dir, minify=not args.no_minify,
+                       fingerprint=not args.no_fingerprint, compress=not args.no_compress)
+    print_report(summary)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Circuit Breaker for Upstream APIs
+
+One breaker per upstream host. After `failure_threshold` consecutive
+failures (connection errors, 5xx, 429) the breaker opens and calls fail
+immediately with CircuitOpenError instead of waiting on a degraded API.
+After `reset_timeout` seconds it goes half-open and lets a limited number
+of probe calls through: a successful probe closes it, a failed one opens it
+again. Listeners are told about every state change, which is how the
+webhook handler knows when to replay dead-lettered dispatches.
+"""
+
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    def __init__(self, name, retry_in):
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(f'Circuit for {name} is open, next probe in {retry_in:.1f}s')
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, half_open_calls=1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        # listener(name, old_state, new_state), called outside the lock
+        self.listeners = []
+        self._probes = 0
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go out now; open breakers turn half-open once reset_timeout has passed"""
+        now = time.monotonic()
+        with self._lock:
+            change = None
+            # A probe that never reported back (e.g. a caller bug) must not wedge the breaker half-open
+            if ((self.state == OPEN and now - self.opened_at >= self.reset_timeout)
+                    or (self.state == HALF_OPEN and now - self._probe_started >= self.reset_timeout)):
+                change = self._transition(HALF_OPEN) if self.state == OPEN else None
+                self._probes = 0
+                self._probe_started = now
+            if self.state == CLOSED:
+                allowed = True
+            elif self.state == HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                allowed = True
+            else:
+                self.rejected += 1
+                allowed = False
+        self._notify(change)
+        return allowed
+
+    def check(self):
+        """allow(), raising CircuitOpenError when the call must not go out"""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_in())
+
+    def retry_in(self):
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            change = self._transition(CLOSED) if self.state != CLOSED else None
+        self._notify(change)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            change = None
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                change = self._transition(OPEN)
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+        self._notify(change)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+                'retry_in': round(self.retry_in(), 1) if self.state == OPEN else 0.0
+            }
+
+    def _transition(self, state):
+        previous, self.state = self.state, state
+        return previous, state
+
+    def _notify(self, change):
+        if change is None:
+            return
+        previous, state = change
+        log = logger.warning if state == OPEN else logger.info
+        log(f"Circuit for {self.name}: {previous} -> {state}")
+        for listener in self.listeners:
+            try:
+                listener(self.name, previous, state)
+            except Exception as e:
+                logger.error(f"Circuit listener failed: {str(e)}")
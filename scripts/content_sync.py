@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Incremental Content Sync from the Content Repository
+
+Keeps a persistent bare mirror of the content repository (shallow,
+blob-less partial fetches) instead of re-cloning on every run. The synced
+tree is described by a manifest of path -> git blob id (git's content
+hash), so each sync only reads, writes and stages the files whose content
+changed, and removes files that were deleted upstream. When the remote
+branch still points at the commit in the manifest the sync exits as a
+no-op without fetching anything.
+
+Usage:
+    python scripts/content_sync.py [--target .] [--ref main] [--validate-only] [--no-commit]
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import fnmatch
+import hashlib
+import logging
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+CONTENT_REPO_URL = os.getenv('CONTENT_REPO_URL', 'https://gitlab.com/peaceful-robot/peacefulrobot.com.git')
+CONTENT_REPO_TOKEN = os.getenv('CONTENT_REPO_TOKEN', '')
+CONTENT_REPO_REF = os.getenv('CONTENT_REPO_REF', 'main')
+CONTENT_MIRROR_DIR = os.getenv('CONTENT_MIRROR_DIR', '.content_mirror')
+CONTENT_MANIFEST = os.getenv('CONTENT_MANIFEST', '.content_manifest.json')
+SYNC_REPORT = 'sync_report.json'
+BACKUP_DIR = 'content_backup'
+
+# Same selection as the old rsync: everything except git/CI config and
+# Markdown, but README.md and CNAME are always synced
+ALWAYS_INCLUDE = frozenset(['index.html', 'README.md', 'CNAME'])
+EXCLUDE_PATTERNS = ('.git/*', '.gitlab-ci.yml', '.github/*', '*.md')
+
+EMPTY_BLOB = 'e69de29bb2d1d6434b8b29ae775ad8c2e48c5391'
+REGULAR_MODES = ('100644', '100755')
+
+SYNC_NOOP = 'no-op'
+SYNC_COMPLETED = 'completed'
+
+
+class SyncError(Exception):
+    pass
+
+
+def included(path):
+    if path in ALWAYS_INCLUDE:
+        return True
+    return not any(fnmatch.fnmatch(path, pattern) for pattern in EXCLUDE_PATTERNS)
+
+
+def tree_hash(files):
+    """One content hash for the whole synced tree (stable over path order)"""
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        digest.update(f"{path}\0{files[path]['blob']}\n".encode())
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'commit': None, 'files': {}}
+
+
+def write_json_atomic(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(prefix='.tmp.', dir=directory)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temporary, path)
+
+
+class ContentMirror:
+    """Bare, blob-less partial mirror of one branch; credentials never touch the on-disk config"""
+
+    def __init__(self, path=CONTENT_MIRROR_DIR, url=CONTENT_REPO_URL, token=CONTENT_REPO_TOKEN, ref=CONTENT_REPO_REF):
+        self.path = path
+        self.url = url
+        self.token = token
+        self.ref = ref
+
+    def git(self, *args, input=None, check=True):
+        command = ['git']
+        if self.token:
+            credentials = base64.b64encode(f'oauth2:{self.token}'.encode()).decode()
+            # Passed with -c so lazy blob fetches (child processes) inherit it
+            command += ['-c', f'http.extraHeader=Authorization: Basic {credentials}']
+        command += ['--git-dir', self.path, *args]
+        completed = subprocess.run(command, input=input, capture_output=True, check=False)
+        if check and completed.returncode != 0:
+            raise SyncError(f"git {args[0]} failed: {completed.stderr.decode(errors='replace').strip()}")
+        return completed.stdout
+
+    def ensure(self):
+        if os.path.isdir(self.path):
+            return
+        os.makedirs(self.path)
+        subprocess.run(['git', 'init', '--bare', '--quiet', self.path], check=True)
+        self.git('remote', 'add', 'origin', self.url)
+        # Mark origin as a promisor so blobs missing from partial fetches are fetched on demand
+        self.git('config', 'remote.origin.promisor', 'true')
+        self.git('config', 'remote.origin.partialclonefilter', 'blob:none')
+
+    def remote_commit(self):
+        """Commit the branch points at upstream, without fetching objects"""
+        output = self.git('ls-remote', 'origin', f'refs/heads/{self.ref}').decode().split()
+        if not output:
+            raise SyncError(f'Branch {self.ref} not found in {self.url}')
+        return output[0]
+
+    def fetch(self):
+        """Shallow, blob-less fetch of the branch tip; returns its commit"""
+        self.git('fetch', '--quiet', '--depth=1', '--filter=blob:none', '--no-tags', 'origin',
+                 f'+refs/heads/{self.ref}:refs/heads/{self.ref}')
+        return self.git('rev-parse', f'refs/heads/{self.ref}').decode().strip()
+
+    def tree(self, commit):
+        """{path: {'mode', 'blob'}} for every regular file in the commit (trees only, no blobs fetched)"""
+        files = {}
+        for entry in self.git('ls-tree', '-r', '-z', '--full-tree', commit).split(b'\0'):
+            if not entry:
+                continue
+            meta, path = entry.split(b'\t', 1)
+            mode, kind, blob = meta.decode().split()
+            path = path.decode()
+            if kind != 'blob' or mode not in REGULAR_MODES:
+                logger.info(f"Skipping {path} (mode {mode})")
+                continue
+            files[path] = {'mode': mode, 'blob': blob}
+        return files
+
+    def prefetch(self, blobs):
+        """Fetch all missing blobs in one round trip instead of one lazy fetch per file"""
+        if blobs:
+            self.git('fetch', '--quiet', '--no-tags', '--filter=blob:none', 'origin', *sorted(blobs), check=False)
+
+    def read_blobs(self, blobs):
+        """{blob: bytes} via one `git cat-file --batch` process"""
+        if not blobs:
+            return {}
+        order = sorted(blobs)
+        output = self.git('cat-file', '--batch', input=''.join(f'{blob}\n' for blob in order).encode())
+        contents = {}
+        offset = 0
+        for blob in order:
+            header_end = output.index(b'\n', offset)
+            name, kind, size = output[offset:header_end].decode().split()
+            if kind != 'blob':
+                raise SyncError(f'{blob} is a {kind}, not a blob')
+            start = header_end + 1
+            contents[name] = output[start:start + int(size)]
+            offset = start + int(size) + 1
+        return contents
+
+    def commit_info(self, commit):
+        return self.git('log', '-1', '--format=%s', commit).decode().strip()
+
+
+class ContentSync:
+    def __init__(self, target='.', mirror=None, manifest_path=None):
+        self.target = os.path.abspath(target)
+        self.mirror = mirror or ContentMirror()
+        self.manifest_path = manifest_path or os.path.join(self.target, CONTENT_MANIFEST)
+
+    def plan(self, previous, files):
+        """(changed paths, removed paths) relative to the last synced manifest"""
+        changed = sorted(
+            path for path, entry in files.items()
+            if previous.get(path, {}).get('blob') != entry['blob']
+            or not os.path.isfile(os.path.join(self.target, path))
+        )
+        removed = sorted(path for path in previous if path not in files)
+        return changed, removed
+
+    def validate(self, files):
+        index = files.get('index.html')
+        if index is None:
+            raise SyncError('index.html not found in content repository')
+        if index['blob'] == EMPTY_BLOB:
+            raise SyncError('index.html is empty in content repository')
+
+    def backup_index(self):
+        current = os.path.join(self.target, 'index.html')
+        if not os.path.isfile(current):
+            return None
+        backup_path = os.path.join(self.target, BACKUP_DIR, f"content_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        os.makedirs(backup_path, exist_ok=True)
+        with open(current, 'rb') as source, open(os.path.join(backup_path, 'index.html'), 'wb') as destination:
+            destination.write(source.read())
+        return os.path.relpath(backup_path, self.target)
+
+    def write_file(self, path, data, mode):
+        destination = os.path.join(self.target, path)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        fd, temporary = tempfile.mkstemp(prefix='.sync.', dir=os.path.dirname(destination))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(temporary, 0o755 if mode == '100755' else 0o644)
+        os.replace(temporary, destination)
+
+    def remove_file(self, path):
+        try:
+            os.remove(os.path.join(self.target, path))
+        except FileNotFoundError:
+            pass
+
+    def sync(self, validate_only=False, force=False):
+        """Bring the target up to the branch tip; returns the sync report"""
+        started = time.monotonic()
+        manifest = load_manifest(self.manifest_path)
+        self.mirror.ensure()
+
+        remote_commit = self.mirror.remote_commit()
+        if remote_commit == manifest.get('commit') and not force and not validate_only:
+            logger.info(f"Content already synced at {remote_commit[:12]}; nothing to do")
+            return self.report(SYNC_NOOP, remote_commit, manifest, [], [], None, started)
+
+        commit = self.mirror.fetch()
+        files = {path: entry for path, entry in self.mirror.tree(commit).items() if included(path)}
+        self.validate(files)
+        logger.info(f"Content commit {commit[:12]}: {self.mirror.commit_info(commit)}")
+        changed, removed = self.plan(manifest.get('files', {}), files)
+        if validate_only:
+            return self.report('validated', commit, {'files': files}, changed, removed, None, started)
+
+        needed = {files[path]['blob'] for path in changed}
+        self.mirror.prefetch(needed)
+        contents = self.mirror.read_blobs(needed)
+
+        backup = None
+        if 'index.html' in changed:
+            html = contents[files['index.html']['blob']]
+            for header in (b'Content-Security-Policy', b'X-Frame-Options'):
+                if header not in html:
+                    logger.warning(f"{header.decode()} header missing")
+            backup = self.backup_index()
+        for path in changed:
+            self.write_file(path, contents[files[path]['blob']], files[path]['mode'])
+        for path in removed:
+            self.remove_file(path)
+
+        manifest = {
+            'commit': commit,
+            'ref': self.mirror.ref,
+            'synced_at': datetime.utcnow().isoformat(),
+            'content_hash': tree_hash(files),
+            'files': files
+        }
+        write_json_atomic(self.manifest_path, manifest)
+        return self.report(SYNC_COMPLETED, commit, manifest, changed, removed, backup, started)
+
+    def report(self, status, commit, manifest, changed, removed, backup, started):
+        return {
+            'sync_id': str(int(time.time())),
+            'completed_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'status': status,
+            'content_repository': self.mirror.url,
+            'content_commit': commit,
+            'content_hash': manifest.get('content_hash') or tree_hash(manifest.get('files', {})),
+            'files_total': len(manifest.get('files', {})),
+            'files_synced': len(changed),
+            'files_removed': len(removed),
+            'changed': changed,
+            'removed': removed,
+            'backup_created': backup or 'none',
+            'seconds': round(time.monotonic() - started, 3)
+        }
+
+    def commit_changes(self, report, push=False):
+        """Stage only the files this sync touched and commit them to the infrastructure repository"""
+        paths = report['changed'] + report['removed']
+        if not paths:
+            return False
+
+        def git(*args, check=True):
+            completed = subprocess.run(['git', '-C', self.target, *args], capture_output=True, text=True)
+            if check and completed.returncode != 0:
+                raise SyncError(f"git {args[0]} failed: {completed.stderr.strip()}")
+            return completed
+
+        if report['changed']:
+            git('add', '--', *report['changed'])
+        if report['removed']:
+            # A removed path may never have been committed here; --ignore-unmatch skips it instead of failing
+            git('rm', '--cached', '--quiet', '--ignore-unmatch', '--', *report['removed'])
+        # Only paths that are actually staged: naming an untracked one in `git commit --` is an error
+        paths = [path for path in git('diff', '--cached', '--name-only', '-z', '--', *paths).stdout.split('\0') if path]
+        if not paths:
+            return False
+        message = (
+            "Sync content from peaceful-robot/peacefulrobot.com\n\n"
+            "Automated content synchronization via GitLab CI/CD\n"
+            f"{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}\n\n"
+            f"Content commit {report['content_commit']}: {len(report['changed'])} changed, "
+            f"{len(report['removed'])} removed"
+        )
+        git('commit', '--quiet', '-m', message, '--', *paths)
+        if push:
+            if git('push', 'origin', 'main', check=False).returncode != 0:
+                logger.warning("Failed to push changes (this is normal in CI environment)")
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incrementally sync the content repository into this repository')
+    parser.add_argument('--target', default='.', help='directory the content is synced into')
+    parser.add_argument('--ref', default=CONTENT_REPO_REF, help='content branch')
+    parser.add_argument('--mirror', default=CONTENT_MIRROR_DIR, help='persistent mirror directory')
+    parser.add_argument('--validate-only', action='store_true', help='fetch and validate, but do not write')
+    parser.add_argument('--force', action='store_true', help='re-check every file even if the commit is synced')
+    parser.add_argument('--no-commit', action='store_true', help='write files but do not commit them')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    mirror = ContentMirror(path=args.mirror, ref=args.ref)
+    sync = ContentSync(args.target, mirror)
+    try:
+        report = sync.sync(validate_only=args.validate_only, force=args.force)
+    except SyncError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    if report['status'] == SYNC_COMPLETED and not args.no_commit:
+        push = not os.getenv('CI') or os.getenv('AUTO_PUSH') == 'true'
+        try:
+            report['committed'] = sync.commit_changes(report, push=push)
+        except SyncError as e:
+            logger.error(str(e))
+            report['committed'] = False
+            report['error'] = str(e)
+    write_json_atomic(os.path.join(sync.target, SYNC_REPORT), report)
+    logger.info(f"Sync {report['status']}: {report['files_synced']} changed, {report['files_removed']} removed "
+                f"in {report['seconds']}s (commit {(report['content_commit'] or '')[:12]})")
+    if report.get('error'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Durable Dead-Letter Store for Failed Dispatches
+
+Dispatches that fail for a reason worth retrying (open circuit, connection
+error, 5xx/429 after retries) are kept in a SQLite file instead of being
+dropped, keyed by job and commit so repeated failures for the same commit
+collapse into one entry that keeps its place in line. Entries are claimed
+with a lease before they are replayed, so several gunicorn workers sharing
+the file never replay the same entry twice, and an entry whose replay
+crashed becomes claimable again once the lease runs out. An entry is only
+deleted once its dispatch succeeds (or fails in a way retrying cannot fix).
+
+Usage:
+    python scripts/dead_letter.py [--db dead_letters.db] [--upstream github]
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER_DB = os.getenv('DEAD_LETTER_DB', 'dead_letters.db')
+DEAD_LETTER_LEASE = float(os.getenv('DEAD_LETTER_LEASE', 300))
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS dead_letters ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, dedupe_key TEXT UNIQUE, upstream TEXT, job TEXT, commit_sha TEXT, '
+    'payload TEXT, reason TEXT, attempts INTEGER, first_failed_at REAL, last_failed_at REAL, '
+    'claimed_until REAL DEFAULT 0)',
+    'CREATE INDEX IF NOT EXISTS dead_letters_upstream ON dead_letters (upstream, id)'
+)
+
+
+def dead_letter_key(job, payload):
+    """job + commit, so a commit is dead-lettered once per job; payloads without a commit are keyed by content"""
+    commit = payload.get('commit_id')
+    if commit:
+        return f'{job}:{commit}'
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    return f'{job}:sha256:{digest[:32]}'
+
+
+class DeadLetterStore:
+    def __init__(self, db_path=DEAD_LETTER_DB, lease=DEAD_LETTER_LEASE):
+        self.db_path = db_path
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._connection = None
+
+    @property
+    def _db(self):
+        """Connection opened (and schema created) on first use, so an idle store never touches the disk"""
+        if self._connection is None:
+            db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._connection = db
+        return self._connection
+
+    def add(self, upstream, job, payload, reason, key=None):
+        """Store (or re-store) a failed dispatch; an existing entry keeps its position and lease is released"""
+        key = key or dead_letter_key(job, payload)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO dead_letters (dedupe_key, upstream, job, commit_sha, payload, reason, attempts, '
+                'first_failed_at, last_failed_at, claimed_until) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?, 0) '
+                'ON CONFLICT (dedupe_key) DO UPDATE SET payload = excluded.payload, reason = excluded.reason, '
+                'attempts = attempts + 1, last_failed_at = excluded.last_failed_at, claimed_until = 0',
+                (key, upstream, job, payload.get('commit_id'), json.dumps(payload, default=str), reason, now, now)
+            )
+        return key
+
+    def resolve(self, key):
+        """Forget an entry once its dispatch went through (by any process); returns True if one was stored"""
+        with self._lock:
+            deleted = self._db.execute('DELETE FROM dead_letters WHERE dedupe_key = ?', (key,)).rowcount
+        return bool(deleted)
+
+    def release(self, keys):
+        """Give up the lease on claimed entries that were not replayed after all"""
+        with self._lock:
+            self._db.executemany('UPDATE dead_letters SET claimed_until = 0 WHERE dedupe_key = ?',
+                                 [(key,) for key in keys])
+
+    def claim(self, upstream=None, limit=50):
+        """Lease up to `limit` unclaimed entries, oldest first; other processes skip them until the lease ends"""
+        now = time.time()
+        with self._lock:
+            db = self._db
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                if upstream:
+                    rows = db.execute(
+                        'SELECT id, dedupe_key, upstream, job, payload, attempts, first_failed_at FROM dead_letters '
+                        'WHERE upstream = ? AND claimed_until < ? ORDER BY id LIMIT ?', (upstream, now, limit)
+                    ).fetchall()
+                else:
+                    rows = db.execute(
+                        'SELECT id, dedupe_key, upstream, job, payload, attempts, first_failed_at FROM dead_letters '
+                        'WHERE claimed_until < ? ORDER BY id LIMIT ?', (now, limit)
+                    ).fetchall()
+                db.executemany('UPDATE dead_letters SET claimed_until = ? WHERE id = ?',
+                               [(now + self.lease, row[0]) for row in rows])
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        return [{
+            'id': row[0],
+            'key': row[1],
+            'upstream': row[2],
+            'job': row[3],
+            'payload': json.loads(row[4]),
+            'attempts': row[5],
+            'first_failed_at': row[6]
+        } for row in rows]
+
+    def entries(self, upstream=None, limit=100):
+        """Oldest-first view of stored entries (without payloads) for status and the CLI"""
+        query = ('SELECT id, upstream, job, commit_sha, reason, attempts, first_failed_at, last_failed_at, '
+                 'claimed_until FROM dead_letters')
+        params = ()
+        if upstream:
+            query += ' WHERE upstream = ?'
+            params = (upstream,)
+        with self._lock:
+            rows = self._db.execute(query + ' ORDER BY id LIMIT ?', params + (limit,)).fetchall()
+        now = time.time()
+        return [{
+            'id': row[0],
+            'upstream': row[1],
+            'job': row[2],
+            'commit_id': row[3],
+            'reason': row[4],
+            'attempts': row[5],
+            'first_failed_at': datetime.utcfromtimestamp(row[6]).isoformat(),
+            'last_failed_at': datetime.utcfromtimestamp(row[7]).isoformat(),
+            'replaying': row[8] > now
+        } for row in rows]
+
+    def stats(self):
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT upstream, COUNT(*), MIN(first_failed_at) FROM dead_letters GROUP BY upstream'
+            ).fetchall()
+        return {
+            'pending': sum(row[1] for row in rows),
+            'by_upstream': {row[0]: row[1] for row in rows},
+            'oldest_failed_at': datetime.utcfromtimestamp(min(row[2] for row in rows)).isoformat() if rows else None
+        }
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List dead-lettered deployment dispatches')
+    parser.add_argument('--db', default=DEAD_LETTER_DB)
+    parser.add_argument('--upstream', help='only entries for this upstream (github, gitlab)')
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"No dead-letter store at {args.db}")
+        sys.exit(0)
+    store = DeadLetterStore(args.db)
+    entries = store.entries(args.upstream, args.limit)
+    print(json.dumps({'stats': store.stats(), 'entries': entries}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Parallel Multi-Platform Deploy Orchestrator
+
+Deploys the content directory to every configured platform (Vercel,
+Netlify, GitLab Pages, AWS S3, Firebase, Azure Static Web Apps) at the
+same time, each with its own timeout, so total wall time is the slowest
+platform instead of the sum. deployment_status.json is rewritten
+atomically (temp file + rename under a lock) after every platform
+finishes, and records per-platform status and timings.
+
+The status file also keeps, per platform, the digest of the content it
+last deployed successfully. Platforms already serving the current digest
+are skipped (status 'unchanged') unless --force is given. Platforms that
+something else deploys (Azure Static Web Apps, from the GitHub Actions
+workflow) are reported 'unsupported' and never get a digest. Finished
+deployments are appended to the deployment history (deployment_history.py).
+
+Usage:
+    python scripts/deploy_orchestrator.py [content_dir] [--platforms vercel,netlify] [--status-file path] [--force]
+"""
+
+import os
+import sys
+import json
+import time
+import fnmatch
+import hashlib
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asset_optimizer
+from deployment_history import DeploymentHistory, DEPLOY_HISTORY_DB
+from tracing import Tracer, STATUS_ERROR, TRACE_FILE, timestamp_ns
+
+logger = logging.getLogger(__name__)
+
+DEPLOY_STATUS_FILE = os.getenv('DEPLOY_STATUS_FILE', 'deployment_status.json')
+DEPLOY_TIMEOUT = float(os.getenv('DEPLOY_TIMEOUT', 600))
+DEPLOY_TIMEOUTS = os.getenv('DEPLOY_TIMEOUTS', '')
+DEPLOY_OPTIMIZE = os.getenv('DEPLOY_OPTIMIZE', 'false').lower() == 'true'
+DEPLOY_BUILD_DIR = os.getenv('DEPLOY_BUILD_DIR', '')
+
+PLATFORM_SUCCEEDED = 'success'
+PLATFORM_FAILED = 'failed'
+PLATFORM_TIMED_OUT = 'timeout'
+PLATFORM_SKIPPED = 'skipped'
+PLATFORM_UNCHANGED = 'unchanged'
+PLATFORM_UNSUPPORTED = 'unsupported'
+
+# Never part of the site digest: VCS/CI metadata, sync mirrors, deploy CLI state, temp files and files
+# rewritten by every sync/deploy run. Other dotfiles, such as .well-known/, are shipped and counted.
+DIGEST_EXCLUDE = ('.git', '.github', '.gitlab-ci.yml', '.content_mirror', '.content_manifest.json',
+                  '.vercel', '.netlify', '.firebase', '.DS_Store', '.tmp.*', '.sync.*', '.deployment_status.*',
+                  'deployment_status.json', 'sync_report.json', 'deployment_history.db*', 'deployment_traces.jsonl*')
+
+
+def utc_now():
+    return datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def content_digest(content_dir, exclude=DIGEST_EXCLUDE):
+    """sha256 over every (relative path, file sha256) in sorted order; independent of mtimes and walk order"""
+    entries = []
+    for root, dirs, files in os.walk(content_dir):
+        dirs[:] = [d for d in dirs if not any(fnmatch.fnmatch(d, pattern) for pattern in exclude)]
+        for name in files:
+            if any(fnmatch.fnmatch(name, pattern) for pattern in exclude):
+                continue
+            path = os.path.join(root, name)
+            file_hash = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    file_hash.update(chunk)
+            entries.append((os.path.relpath(path, content_dir).replace(os.sep, '/'), file_hash.hexdigest()))
+    digest = hashlib.sha256()
+    for relative, file_hash in sorted(entries):
+        digest.update(f'{relative}\0{file_hash}\n'.encode())
+    return digest.hexdigest()
+
+
+def content_bytes(content_dir, exclude=DIGEST_EXCLUDE):
+    """Bytes a full deploy ships (same files as the digest)"""
+    total = 0
+    for root, dirs, files in os.walk(content_dir):
+        dirs[:] = [d for d in dirs if not any(fnmatch.fnmatch(d, pattern) for pattern in exclude)]
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files
+                     if not any(fnmatch.fnmatch(name, pattern) for pattern in exclude))
+    return total
+
+
+def record_history(result, commit, history_db):
+    if not history_db:
+        return
+    try:
+        history = DeploymentHistory(history_db)
+        history.record(result, commit)
+        history.close()
+    except Exception as e:
+        logger.error(f"Error recording deployment history: {str(e)}")
+
+
+def trace_deployment(tracer, result, traceparent=None):
+    """Export a deploy.platforms span with one child per platform that actually deployed"""
+    span = tracer.start('deploy.platforms', traceparent, commit=result.get('commit'), outcome=result['status'],
+                        digest=(result.get('digest') or '')[:12] or None)
+    span.start_ns = timestamp_ns(result.get('started_at')) or span.start_ns
+    span.end_ns = span.start_ns + int((result.get('wall_seconds') or 0) * 1e9)
+    if result['status'] != 'completed':
+        span.status = STATUS_ERROR
+    for name, outcome in result['results'].items():
+        if outcome['status'] in (PLATFORM_SKIPPED, PLATFORM_UNCHANGED, PLATFORM_UNSUPPORTED):
+            continue
+        child = span.child('deploy.platform', platform=name, outcome=outcome['status'], bytes=outcome.get('bytes'))
+        child.start_ns = timestamp_ns(outcome.get('started_at')) or span.start_ns
+        child.end_ns = child.start_ns + int(outcome['seconds'] * 1e9)
+        if outcome['status'] != PLATFORM_SUCCEEDED:
+            child.status = STATUS_ERROR
+    tracer.export(span)
+
+
+def parse_timeouts(spec):
+    """'vercel=300,netlify=120' -> {'vercel': 300.0, 'netlify': 120.0}"""
+    timeouts = {}
+    for item in (spec or '').split(','):
+        if item.strip():
+            name, _, seconds = item.partition('=')
+            timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+
+class DeploymentStatus:
+    """deployment_status.json, updated under a lock and replaced atomically on every change"""
+
+    def __init__(self, path=DEPLOY_STATUS_FILE, digest=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = {
+            # Microseconds, so back-to-back runs get distinct ids in the history
+            'deployment_id': str(time.time_ns() // 1000),
+            'started_at': utc_now(),
+            'status': 'in_progress',
+            'platforms': [],
+            'errors': [],
+            'results': {},
+            'digest': digest,
+            # Carried over between runs: {platform: {digest, deployment_id, deployed_at}}
+            'deployed': self._previous().get('deployed', {})
+        }
+        self._write()
+
+    def _previous(self):
+        try:
+            with open(self.path) as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return previous if isinstance(previous, dict) else {}
+
+    def current(self, platform, digest):
+        return self.data['deployed'].get(platform, {}).get('digest') == digest
+
+    def record(self, platform, status, seconds, error=None, **details):
+        with self._lock:
+            self.data['results'][platform] = dict(status=status, seconds=round(seconds, 2), **details)
+            if status == PLATFORM_SUCCEEDED:
+                self.data['platforms'].append(platform)
+                if self.data['digest']:
+                    self.data['deployed'][platform] = {
+                        'digest': self.data['digest'],
+                        'deployment_id': self.data['deployment_id'],
+                        'deployed_at': utc_now()
+                    }
+            elif status not in (PLATFORM_SKIPPED, PLATFORM_UNCHANGED, PLATFORM_UNSUPPORTED):
+                self.data['errors'].append({'platform': platform, 'error': error or status})
+            self._write()
+
+    def finish(self, wall_seconds, status=None):
+        with self._lock:
+            if status is None:
+                status = 'partial_failure' if self.data['errors'] else 'completed'
+            self.data['status'] = status
+            self.data['ended_at'] = utc_now()
+            self.data['wall_seconds'] = round(wall_seconds, 2)
+            self._write()
+            return dict(self.data)
+
+    def _write(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temporary = tempfile.mkstemp(prefix='.deployment_status.', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+class Platform:
+    """One deploy target: required env vars, an optional CLI to install, and the commands to run"""
+
+    def __init__(self, name, required_env=(), cli=None, install=None, commands=None, run=None, incremental=True,
+                 deployed_by=None):
+        self.name = name
+        self.required_env = required_env
+        self.cli = cli
+        self.install = install
+        self.commands = commands
+        self.run = run
+        # False for targets that must be rebuilt every run (e.g. a CI artifact directory)
+        self.incremental = incremental
+        # Set for targets something else deploys: reported as unsupported here, never as deployed
+        self.deployed_by = deployed_by
+
+    def configured(self):
+        return all(os.getenv(name) for name in self.required_env)
+
+
+def copy_to_gitlab_pages(content_dir, timeout):
+    """GitLab CI publishes ../public; copy the content there, less the metadata the digest leaves out"""
+    public_dir = os.path.join(os.path.dirname(os.path.abspath(content_dir)), 'public')
+    shutil.copytree(content_dir, public_dir, dirs_exist_ok=True, ignore=shutil.ignore_patterns(*DIGEST_EXCLUDE))
+
+
+def aws_commands(content_dir):
+    commands = [['aws', 's3', 'sync', '.', f"s3://{os.getenv('AWS_S3_BUCKET', '')}", '--delete', '--exclude', '.git/*']]
+    if os.getenv('CLOUDFRONT_DISTRIBUTION_ID'):
+        commands.append(['aws', 'cloudfront', 'create-invalidation',
+                         '--distribution-id', os.getenv('CLOUDFRONT_DISTRIBUTION_ID'), '--paths', '/*'])
+    return commands
+
+
+PLATFORMS = [
+    Platform('vercel', ('VERCEL_TOKEN',), cli='vercel', install=['npm', 'install', '-g', 'vercel'],
+             commands=lambda d: [['vercel', '--token', os.getenv('VERCEL_TOKEN'), '--prod', '--yes']]),
+    Platform('netlify', ('NETLIFY_AUTH_TOKEN',), cli='netlify', install=['npm', 'install', '-g', 'netlify-cli'],
+             commands=lambda d: [['netlify', 'deploy', '--prod', '--auth', os.getenv('NETLIFY_AUTH_TOKEN')]]),
+    Platform('gitlab-pages', run=copy_to_gitlab_pages, incremental=False),
+    Platform('aws-s3', ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'), cli='aws',
+             install=[sys.executable, '-m', 'pip', 'install', 'awscli'], commands=aws_commands),
+    Platform('firebase', ('FIREBASE_TOKEN',), cli='firebase', install=['npm', 'install', '-g', 'firebase-tools'],
+             commands=lambda d: [['firebase', 'deploy', '--token', os.getenv('FIREBASE_TOKEN'), '--only', 'hosting']]),
+    Platform('azure-static-apps', ('AZURE_STATIC_WEB_APPS_API_TOKEN',),
+             deployed_by='the GitHub Actions workflow (Azure/static-web-apps-deploy)')
+]
+
+PLATFORMS_BY_NAME = {platform.name: platform for platform in PLATFORMS}
+
+
+def validate_content(content_dir):
+    """Same checks as before deploying: index.html must exist and be non-empty"""
+    index = os.path.join(content_dir, 'index.html')
+    if not os.path.isfile(index) or os.path.getsize(index) == 0:
+        return False
+    with open(index, errors='replace') as f:
+        html = f.read()
+    for header in ('Content-Security-Policy', 'X-Frame-Options'):
+        if header not in html:
+            logger.warning(f"{header} header missing")
+    return True
+
+
+def prepare_content(content_dir, platforms):
+    """Config files some CLIs write into the content dir; done before the parallel phase so no deploy sees a half-written file"""
+    names = {platform.name for platform in platforms}
+    if 'vercel' in names:
+        # Keep an existing config (e.g. cache headers from the optimize stage); only pin the version
+        vercel_config = os.path.join(content_dir, 'vercel.json')
+        try:
+            with open(vercel_config) as f:
+                config = json.load(f)
+        except (OSError, ValueError):
+            config = {}
+        config['version'] = 2
+        with open(vercel_config, 'w') as f:
+            json.dump(config, f, indent=2)
+            f.write('\n')
+    if ('firebase' in names and shutil.which('firebase')
+            and not os.path.exists(os.path.join(content_dir, 'firebase.json'))):
+        subprocess.run(['firebase', 'init', 'hosting', '--token', os.getenv('FIREBASE_TOKEN'), '--yes'],
+                       cwd=content_dir, check=False, timeout=DEPLOY_TIMEOUT)
+
+
+def run_command(command, cwd, deadline):
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise subprocess.TimeoutExpired(command, 0)
+    completed = subprocess.run(command, cwd=cwd, capture_output=True, text=True, timeout=remaining)
+    if completed.returncode != 0:
+        output = (completed.stderr or completed.stdout).strip().splitlines()
+        raise RuntimeError(f"{command[0]} exited {completed.returncode}: {output[-1] if output else ''}")
+
+
+def deploy_platform(platform, content_dir, timeout):
+    """Run one platform's deploy; returns (status, error)"""
+    deadline = time.monotonic() + timeout
+    try:
+        if platform.run is not None:
+            platform.run(content_dir, timeout)
+        else:
+            if platform.cli and shutil.which(platform.cli) is None and platform.install:
+                logger.info(f"Installing {platform.cli} CLI...")
+                run_command(platform.install, content_dir, deadline)
+            for command in platform.commands(content_dir):
+                run_command(command, content_dir, deadline)
+        return PLATFORM_SUCCEEDED, None
+    except subprocess.TimeoutExpired:
+        return PLATFORM_TIMED_OUT, f'{platform.name} deployment timed out after {timeout:g}s'
+    except Exception as e:
+        return PLATFORM_FAILED, f'{platform.name} deployment failed: {str(e)}'
+
+
+def build_dir_for(content_dir):
+    """Optimized build goes next to the content dir, like GitLab Pages' ../public"""
+    return DEPLOY_BUILD_DIR or os.path.join(os.path.dirname(os.path.abspath(content_dir)), 'build')
+
+
+def deploy(content_dir='.', platforms=None, status_file=DEPLOY_STATUS_FILE, timeout=DEPLOY_TIMEOUT,
+           timeouts=None, force=False, optimize=DEPLOY_OPTIMIZE, commit=None, history_db=DEPLOY_HISTORY_DB):
+    """Deploy to all (or the named) platforms concurrently; returns the final status dict"""
+    timeouts = parse_timeouts(DEPLOY_TIMEOUTS) if timeouts is None else timeouts
+    selected = [PLATFORMS_BY_NAME[name] for name in platforms] if platforms else PLATFORMS
+    started = time.monotonic()
+
+    if not validate_content(content_dir):
+        logger.error("Content validation failed: index.html missing or empty")
+        result = DeploymentStatus(status_file).finish(time.monotonic() - started, status='failed')
+        record_history(result, commit, history_db)
+        return result
+
+    optimization = None
+    if optimize:
+        build_dir = build_dir_for(content_dir)
+        optimization = asset_optimizer.optimize(content_dir, build_dir)
+        logger.info(f"Optimized content into {build_dir}: {optimization['original_bytes']} -> "
+                    f"{optimization['transfer_bytes']} bytes ({optimization['saved_percent']}% saved)")
+        content_dir = build_dir
+
+    configured = [platform for platform in selected if platform.configured() and not platform.deployed_by]
+    prepare_content(content_dir, configured)
+    # Digest what is actually shipped, including the config files prepare_content writes
+    exclude = DIGEST_EXCLUDE + (os.path.basename(status_file),)
+    digest = content_digest(content_dir, exclude)
+    size = content_bytes(content_dir, exclude)
+    status = DeploymentStatus(status_file, digest)
+    status.data['commit'] = commit
+    if optimization is not None:
+        status.data['optimization'] = {key: optimization[key] for key in (
+            'output_dir', 'original_bytes', 'transfer_bytes', 'saved_bytes', 'saved_percent', 'fingerprinted')}
+    logger.info(f"Content digest {digest[:12]}")
+
+    active = []
+    for platform in selected:
+        if platform.deployed_by:
+            logger.info(f"{platform.name} is deployed by {platform.deployed_by}, not by this orchestrator")
+            status.record(platform.name, PLATFORM_UNSUPPORTED, 0.0, deployed_by=platform.deployed_by)
+        elif not platform.configured():
+            logger.warning(f"{platform.name} credentials not configured, skipping")
+            status.record(platform.name, PLATFORM_SKIPPED, 0.0)
+        elif platform.incremental and not force and status.current(platform.name, digest):
+            logger.info(f"{platform.name} already serves {digest[:12]}, skipping")
+            status.record(platform.name, PLATFORM_UNCHANGED, 0.0, digest=digest)
+        else:
+            active.append(platform)
+
+    def run(platform):
+        started_at = utc_now()
+        platform_started = time.monotonic()
+        result, error = deploy_platform(platform, content_dir, timeouts.get(platform.name, timeout))
+        seconds = time.monotonic() - platform_started
+        if error:
+            logger.error(error)
+        else:
+            logger.info(f"Deployed to {platform.name} in {seconds:.1f}s")
+        status.record(platform.name, result, seconds, error, started_at=started_at, ended_at=utc_now(),
+                      bytes=size if result == PLATFORM_SUCCEEDED else 0)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(active))) as pool:
+        list(pool.map(run, active))
+
+    result = status.finish(time.monotonic() - started)
+    record_history(result, commit, history_db)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Deploy content to every configured platform in parallel')
+    parser.add_argument('content_dir', nargs='?', default='.')
+    parser.add_argument('--platforms', help=f"comma-separated subset of {', '.join(PLATFORMS_BY_NAME)}")
+    parser.add_argument('--status-file', default=DEPLOY_STATUS_FILE)
+    parser.add_argument('--timeout', type=float, default=DEPLOY_TIMEOUT, help='per-platform timeout in seconds')
+    parser.add_argument('--force', action='store_true', help='deploy even to platforms already serving this content')
+    parser.add_argument('--commit', default=os.getenv('CI_COMMIT_SHA'), help='commit being deployed (history)')
+    parser.add_argument('--history-db', default=DEPLOY_HISTORY_DB, help="append-only history; '' disables")
+    parser.add_argument('--optimize', action='store_true', default=DEPLOY_OPTIMIZE,
+                        help='minify, fingerprint and precompress into a build dir first, and deploy that')
+    parser.add_argument('--traceparent', default=os.getenv('TRACEPARENT'),
+                        help='W3C trace context to continue (GitLab trigger variable TRACEPARENT)')
+    parser.add_argument('--trace-file', default=TRACE_FILE, help="OTLP/JSON lines span file; '' disables")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    platforms = args.platforms.split(',') if args.platforms else None
+    unknown = [name for name in platforms or [] if name not in PLATFORMS_BY_NAME]
+    if unknown:
+        print(f"Unknown platform(s): {', '.join(unknown)}")
+        sys.exit(2)
+
+    result = deploy(args.content_dir, platforms, args.status_file, args.timeout, force=args.force,
+                    optimize=args.optimize, commit=args.commit, history_db=args.history_db)
+    if args.traceparent and args.trace_file:
+        trace_deployment(Tracer(args.trace_file, 'deploy-orchestrator', background=False), result, args.traceparent)
+    for platform, outcome in result['results'].items():
+        print(f"{platform:<18} {outcome['status']:<9} {outcome['seconds']:>7}s")
+    print(f"Deployment status: {result['status']} in {result.get('wall_seconds')}s")
+    # Like the shell script, individual platform failures are reported but only bad content fails the run
+    sys.exit(1 if result['status'] == 'failed' else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Append-Only Deployment History
+
+Every finished platform deploy is appended to a SQLite file: one row per
+deployment (id, commit, timing, digest, bytes) and one row per platform
+run (start, end, outcome, bytes shipped). Rows are never updated or
+deleted. Alongside them, each insert updates per-platform counters and a
+log-bucketed latency histogram in the same transaction, so
+p50/p95/failure-rate queries read a few dozen index rows instead of
+scanning the history. Percentiles are bucket upper bounds, within
+HISTOGRAM_GROWTH (10%) of the exact value.
+
+Usage:
+    python scripts/deployment_history.py [--db deployment_history.db] [--platform vercel] [--limit 20]
+"""
+
+import os
+import sys
+import json
+import math
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEPLOY_HISTORY_DB = os.getenv('DEPLOY_HISTORY_DB', 'deployment_history.db')
+
+HISTOGRAM_MIN_SECONDS = 0.01
+HISTOGRAM_GROWTH = 1.1
+
+# Outcomes that mean a deploy actually ran (skips do not count towards latency or failure rate)
+ATTEMPTED_OUTCOMES = ('success', 'failed', 'timeout')
+FAILED_OUTCOMES = ('failed', 'timeout')
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS deployments ('
+    'deployment_id TEXT PRIMARY KEY, commit_sha TEXT, status TEXT, started_at REAL, ended_at REAL, '
+    'wall_seconds REAL, digest TEXT, bytes INTEGER)',
+    'CREATE INDEX IF NOT EXISTS deployments_started ON deployments (started_at)',
+    'CREATE TABLE IF NOT EXISTS platform_runs ('
+    'deployment_id TEXT, platform TEXT, outcome TEXT, started_at REAL, ended_at REAL, seconds REAL, '
+    'bytes INTEGER, error TEXT, PRIMARY KEY (deployment_id, platform))',
+    'CREATE INDEX IF NOT EXISTS platform_runs_platform ON platform_runs (platform, started_at)',
+    'CREATE TABLE IF NOT EXISTS platform_stats ('
+    'platform TEXT PRIMARY KEY, runs INTEGER, attempts INTEGER, failures INTEGER, total_seconds REAL, '
+    'total_bytes INTEGER, last_started_at REAL)',
+    'CREATE TABLE IF NOT EXISTS platform_latency ('
+    'platform TEXT, bucket INTEGER, count INTEGER, PRIMARY KEY (platform, bucket))'
+)
+
+
+def parse_timestamp(value):
+    """'2025-01-01T00:00:00Z' (deployment_status.json format) -> epoch seconds"""
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return (datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ') - datetime(1970, 1, 1)).total_seconds()
+
+
+def latency_bucket(seconds):
+    return max(0, math.ceil(math.log(max(seconds, HISTOGRAM_MIN_SECONDS) / HISTOGRAM_MIN_SECONDS)
+                            / math.log(HISTOGRAM_GROWTH)))
+
+
+def bucket_upper_bound(bucket):
+    return HISTOGRAM_MIN_SECONDS * HISTOGRAM_GROWTH ** bucket
+
+
+def histogram_percentile(buckets, fraction):
+    """buckets: [(bucket, count)] sorted by bucket -> upper bound of the bucket holding the percentile"""
+    total = sum(count for _, count in buckets)
+    if not total:
+        return None
+    rank = max(1, math.ceil(fraction * total))
+    seen = 0
+    for bucket, count in buckets:
+        seen += count
+        if seen >= rank:
+            return round(bucket_upper_bound(bucket), 2)
+    return round(bucket_upper_bound(buckets[-1][0]), 2)
+
+
+class DeploymentHistory:
+    def __init__(self, db_path=DEPLOY_HISTORY_DB):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = None
+
+    @property
+    def _db(self):
+        """Connection opened (and schema created) on first use, so an idle store never touches the disk"""
+        if self._connection is None:
+            db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._connection = db
+        return self._connection
+
+    def record(self, result, commit=None):
+        """Append a finished deploy_orchestrator status dict; returns False if the deployment was already recorded"""
+        deployment_id = result['deployment_id']
+        started_at = parse_timestamp(result.get('started_at'))
+        ended_at = parse_timestamp(result.get('ended_at'))
+        with self._lock:
+            db = self._db
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                inserted = db.execute(
+                    'INSERT OR IGNORE INTO deployments VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (deployment_id, commit or result.get('commit'), result.get('status'), started_at, ended_at,
+                     result.get('wall_seconds'), result.get('digest'),
+                     sum(run.get('bytes') or 0 for run in result.get('results', {}).values()))
+                ).rowcount
+                if inserted:
+                    for platform, run in result.get('results', {}).items():
+                        self._record_run(deployment_id, platform, run, started_at)
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        return bool(inserted)
+
+    def _record_run(self, deployment_id, platform, run, default_started):
+        outcome = run.get('status')
+        seconds = run.get('seconds') or 0.0
+        run_started = parse_timestamp(run.get('started_at')) or default_started
+        run_ended = parse_timestamp(run.get('ended_at'))
+        run_bytes = run.get('bytes') or 0
+        attempted = outcome in ATTEMPTED_OUTCOMES
+        self._db.execute(
+            'INSERT INTO platform_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (deployment_id, platform, outcome, run_started, run_ended, seconds, run_bytes, run.get('error'))
+        )
+        self._db.execute(
+            'INSERT INTO platform_stats VALUES (?, 1, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (platform) DO UPDATE SET runs = runs + 1, attempts = attempts + excluded.attempts, '
+            'failures = failures + excluded.failures, total_seconds = total_seconds + excluded.total_seconds, '
+            'total_bytes = total_bytes + excluded.total_bytes, '
+            'last_started_at = MAX(COALESCE(last_started_at, 0), excluded.last_started_at)',
+            (platform, int(attempted), int(outcome in FAILED_OUTCOMES), seconds if attempted else 0.0, run_bytes,
+             run_started)
+        )
+        if attempted:
+            self._db.execute(
+                'INSERT INTO platform_latency VALUES (?, ?, 1) '
+                'ON CONFLICT (platform, bucket) DO UPDATE SET count = count + 1',
+                (platform, latency_bucket(seconds))
+            )
+
+    def platform_stats(self, platform=None):
+        """{platform: runs, attempts, failures, failure_rate, p50/p95 seconds, ...} from the aggregate tables"""
+        with self._lock:
+            if platform:
+                rows = self._db.execute('SELECT * FROM platform_stats WHERE platform = ?', (platform,)).fetchall()
+                latency = self._db.execute(
+                    'SELECT platform, bucket, count FROM platform_latency WHERE platform = ? ORDER BY bucket',
+                    (platform,)
+                ).fetchall()
+            else:
+                rows = self._db.execute('SELECT * FROM platform_stats ORDER BY platform').fetchall()
+                latency = self._db.execute(
+                    'SELECT platform, bucket, count FROM platform_latency ORDER BY platform, bucket'
+                ).fetchall()
+
+        buckets = {}
+        for name, bucket, count in latency:
+            buckets.setdefault(name, []).append((bucket, count))
+        stats = {}
+        for name, runs, attempts, failures, total_seconds, total_bytes, last_started_at in rows:
+            stats[name] = {
+                'runs': runs,
+                'attempts': attempts,
+                'skipped': runs - attempts,
+                'failures': failures,
+                'failure_rate': round(failures / attempts, 4) if attempts else None,
+                'p50_seconds': histogram_percentile(buckets.get(name, []), 0.50),
+                'p95_seconds': histogram_percentile(buckets.get(name, []), 0.95),
+                'mean_seconds': round(total_seconds / attempts, 2) if attempts else None,
+                'bytes_shipped': total_bytes,
+                'last_started_at': last_started_at
+            }
+        return stats
+
+    def recent(self, limit=20, platform=None):
+        """Newest deployments first, with their platform runs (index range scans only)"""
+        with self._lock:
+            if platform:
+                deployments = self._db.execute(
+                    'SELECT d.* FROM platform_runs r JOIN deployments d USING (deployment_id) '
+                    'WHERE r.platform = ? ORDER BY r.started_at DESC LIMIT ?', (platform, limit)
+                ).fetchall()
+            else:
+                deployments = self._db.execute(
+                    'SELECT * FROM deployments ORDER BY started_at DESC LIMIT ?', (limit,)
+                ).fetchall()
+            runs = {}
+            for deployment in deployments:
+                runs[deployment[0]] = self._db.execute(
+                    'SELECT platform, outcome, started_at, ended_at, seconds, bytes, error FROM platform_runs '
+                    'WHERE deployment_id = ? ORDER BY platform', (deployment[0],)
+                ).fetchall()
+
+        columns = ('deployment_id', 'commit', 'status', 'started_at', 'ended_at', 'wall_seconds', 'digest', 'bytes')
+        history = []
+        for deployment in deployments:
+            entry = dict(zip(columns, deployment))
+            entry['platforms'] = {
+                name: {'outcome': outcome, 'started_at': started_at, 'ended_at': ended_at, 'seconds': seconds,
+                       'bytes': run_bytes, 'error': error}
+                for name, outcome, started_at, ended_at, seconds, run_bytes, error in runs[deployment[0]]
+                if platform is None or name == platform
+            }
+            history.append(entry)
+        return history
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the deployment history')
+    parser.add_argument('--db', default=DEPLOY_HISTORY_DB)
+    parser.add_argument('--platform')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--import-status', metavar='FILE', help='append a deployment_status.json to the history')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db) and not args.import_status:
+        print(f"No deployment history at {args.db}")
+        sys.exit(1)
+    history = DeploymentHistory(args.db)
+    if args.import_status:
+        with open(args.import_status) as f:
+            history.record(json.load(f))
+    print(json.dumps({
+        'platforms': history.platform_stats(args.platform),
+        'recent': history.recent(args.limit, args.platform)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
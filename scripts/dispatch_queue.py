@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Background Dispatch Queue for Outbound Deployment Calls
+
+Webhook requests enqueue their upstream calls (GitHub dispatches, GitLab
+pipeline triggers) here and return immediately; a small pool of worker
+threads runs the calls and records the job state so it can be queried.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """Raised when the dispatch queue cannot accept more jobs"""
+
+
+class DispatchJob:
+    def __init__(self, name, func, args, kwargs):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.state = JOB_QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow().isoformat()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        """Serializable view of the job for status endpoints"""
+        return {
+            'job_id': self.id,
+            'name': self.name,
+            'state': self.state,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class DispatchQueue:
+    def __init__(self, workers=4, max_queue_size=1000, max_finished_jobs=1000):
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.max_finished_jobs = max_finished_jobs
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._jobs = {}
+        self._finished = deque()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._started = False
+
+    def start(self):
+        """Start the worker pool (idempotent)"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    name=f'dispatch-worker-{index}',
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"Dispatch queue started with {self.workers} workers")
+
+    def submit(self, name, func, *args, **kwargs):
+        """Enqueue an outbound call and return its job"""
+        self.start()
+        job = DispatchJob(name, func, args, kwargs)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise QueueFullError(f'Dispatch queue is full ({self.max_queue_size} jobs)')
+        return job
+
+    def get_job(self, job_id):
+        """Return the job dict for job_id, or None if unknown/evicted"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def depth(self):
+        """Number of jobs waiting for a worker"""
+        return self._queue.qsize()
+
+    def stats(self):
+        """Counts of tracked jobs by state"""
+        counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_SUCCEEDED: 0, JOB_FAILED: 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.state] += 1
+        counts['workers'] = self.workers
+        counts['depth'] = self.depth()
+        return counts
+
+    def join(self):
+        """Block until all queued jobs have been processed"""
+        self._queue.join()
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job):
+        self._begin(job)
+        try:
+            self._succeed(job, job.func(*job.args, **job.kwargs))
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            self._retire(job)
+
+    def _begin(self, job):
+        job.state = JOB_RUNNING
+        job.started_at = datetime.utcnow().isoformat()
+
+    def _succeed(self, job, result):
+        job.result = result
+        job.state = JOB_FAILED if self._is_failure(result) else JOB_SUCCEEDED
+
+    def _fail(self, job, error):
+        logger.error(f"Dispatch job {job.id} ({job.name}) raised: {str(error)}")
+        job.error = str(error)
+        job.state = JOB_FAILED
+
+    @staticmethod
+    def _is_failure(result):
+        if result is False:
+            return True
+        if isinstance(result, dict) and result.get('status') == 'error':
+            return True
+        return False
+
+    def _retire(self, job):
+        job.finished_at = datetime.utcnow().isoformat()
+        job.func = job.args = job.kwargs = None
+        with self._lock:
+            self._finished.append(job.id)
+            while len(self._finished) > self.max_finished_jobs:
+                self._jobs.pop(self._finished.popleft(), None)
+
+
+class AsyncDispatchQueue(DispatchQueue):
+    """Dispatch queue for the asyncio serving mode; jobs are coroutine functions
+
+    Workers are tasks on the event loop rather than threads, so the
+    concurrency limit can be in the hundreds without pinning OS threads.
+    submit() is safe to call from other threads (e.g. coalescing timers):
+    the bound is enforced on a counter taken under the lock, because a put
+    from another thread only reaches the asyncio queue once the loop runs it.
+    """
+
+    def __init__(self, concurrency=100, max_queue_size=1000, max_finished_jobs=1000):
+        super().__init__(workers=concurrency, max_queue_size=max_queue_size,
+                         max_finished_jobs=max_finished_jobs)
+        self._queue = None
+        self._loop = None
+        # Jobs accepted by submit() that no worker has taken yet, including puts still in flight to the loop
+        self._pending = 0
+
+    def start(self):
+        """Start the worker tasks on the running event loop (idempotent)"""
+        if self._started:
+            return
+        self._loop = asyncio.get_running_loop()
+        # Unbounded: submit() has already reserved the slot, so a put can never fail with QueueFull
+        self._queue = asyncio.Queue()
+        for index in range(self.workers):
+            self._threads.append(self._loop.create_task(self._worker(), name=f'dispatch-worker-{index}'))
+        self._started = True
+        logger.info(f"Async dispatch queue started with {self.workers} workers")
+
+    def submit(self, name, func, *args, **kwargs):
+        """Enqueue a coroutine function call and return its job"""
+        if not self._started:
+            self.start()
+        job = DispatchJob(name, func, args, kwargs)
+        with self._lock:
+            if self._pending >= self.max_queue_size:
+                raise QueueFullError(f'Dispatch queue is full ({self.max_queue_size} jobs)')
+            self._pending += 1
+            self._jobs[job.id] = job
+        if self._on_loop():
+            self._queue.put_nowait(job)
+            return job
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        except RuntimeError:
+            # The loop has closed (shutdown): nothing would ever run the job, so do not leave it queued
+            with self._lock:
+                self._pending -= 1
+                self._jobs.pop(job.id, None)
+            raise QueueFullError('Dispatch queue is stopped')
+        return job
+
+    def depth(self):
+        return self._pending
+
+    async def join(self):
+        """Wait until all queued jobs have been processed"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self):
+        for task in self._threads:
+            task.cancel()
+        await asyncio.gather(*self._threads, return_exceptions=True)
+        self._threads = []
+        self._started = False
+
+    def _on_loop(self):
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            with self._lock:
+                self._pending -= 1
+            try:
+                self._begin(job)
+                try:
+                    self._succeed(job, await job.func(*job.args, **job.kwargs))
+                except Exception as e:
+                    self._fail(job, e)
+                finally:
+                    self._retire(job)
+            finally:
+                self._queue.task_done()
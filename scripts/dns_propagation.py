@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Concurrent DNS Propagation Verifier
+
+After a zone update, asks a list of public resolvers directly (plain DNS
+over UDP, all resolvers and record sets at once on one asyncio loop)
+whether they already answer with the new A/AAAA/CNAME data. Each resolver
+is re-polled with exponential backoff until it converges or the deadline
+passes; the run succeeds as soon as a quorum of resolvers has converged.
+The report gives every resolver's time to convergence, so CI can gate on
+actual propagation (usually minutes) instead of sleeping.
+
+Usage:
+    python scripts/dns_propagation.py dns_zones.yaml [--domain peacefulrobot.com] \\
+        [--resolver 1.1.1.1 --resolver 8.8.8.8] [--quorum 3] [--timeout 1800] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import struct
+import asyncio
+import argparse
+import ipaddress
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dns_reconciler import load_config
+
+DNS_VERIFY_RESOLVERS = os.getenv('DNS_VERIFY_RESOLVERS', '1.1.1.1,8.8.8.8,9.9.9.9,208.67.222.222')
+DNS_VERIFY_QUORUM = int(os.getenv('DNS_VERIFY_QUORUM', 0))
+DNS_VERIFY_TIMEOUT = float(os.getenv('DNS_VERIFY_TIMEOUT', 1800))
+DNS_VERIFY_QUERY_TIMEOUT = float(os.getenv('DNS_VERIFY_QUERY_TIMEOUT', 2))
+DNS_VERIFY_BACKOFF_BASE = float(os.getenv('DNS_VERIFY_BACKOFF_BASE', 5))
+DNS_VERIFY_BACKOFF_MAX = float(os.getenv('DNS_VERIFY_BACKOFF_MAX', 60))
+
+QTYPES = {'A': 1, 'CNAME': 5, 'AAAA': 28}
+QTYPE_NAMES = {code: name for name, code in QTYPES.items()}
+CLASS_IN = 1
+FLAG_RD = 0x0100
+RCODE_NXDOMAIN = 3
+
+
+class DNSError(Exception):
+    pass
+
+
+def parse_resolver(value):
+    """'1.1.1.1', '127.0.0.1:5353', '::1' or '[::1]:5353' -> (host, port)"""
+    value = value.strip()
+    if value.startswith('['):
+        host, _, port = value[1:].partition(']')
+        return host, int(port.lstrip(':') or 53)
+    if value.count(':') == 1:
+        host, port = value.split(':')
+        return host, int(port)
+    return value, 53
+
+
+def format_resolver(resolver):
+    host, port = resolver
+    if port == 53:
+        return host
+    return f'[{host}]:{port}' if ':' in host else f'{host}:{port}'
+
+
+def normalize_answer(qtype, value):
+    """Comparable form of record data: canonical IPs, lowercase hostnames without the trailing dot"""
+    if qtype == 'AAAA':
+        return ipaddress.IPv6Address(value).compressed
+    if qtype == 'CNAME':
+        return value.rstrip('.').lower()
+    return value
+
+
+def expected_answers(domain, records):
+    """Desired zone records -> {(qname, qtype): frozenset(values)}; only A, AAAA and CNAME are checked"""
+    expected = {}
+    for record in records:
+        if record['type'] not in QTYPES:
+            continue
+        qname = domain if record['name'] == '@' else f"{record['name']}.{domain}"
+        key = (qname.lower(), record['type'])
+        expected[key] = expected.get(key, frozenset()) | {normalize_answer(record['type'], str(record['data']))}
+    return expected
+
+
+def encode_name(name):
+    labels = [label for label in name.rstrip('.').split('.') if label]
+    return b''.join(bytes([len(label)]) + label.encode('ascii') for label in labels) + b'\x00'
+
+
+def build_query(qid, qname, qtype):
+    header = struct.pack('!HHHHHH', qid, FLAG_RD, 1, 0, 0, 0)
+    return header + encode_name(qname) + struct.pack('!HH', QTYPES[qtype], CLASS_IN)
+
+
+def read_name(data, offset):
+    """Decode a possibly compressed name; returns (name, offset just past it in the original position)"""
+    labels = []
+    end = None
+    for _ in range(128):
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+        elif length == 0:
+            return '.'.join(labels), end if end is not None else offset + 1
+        else:
+            labels.append(data[offset + 1:offset + 1 + length].decode('ascii', 'replace'))
+            offset += 1 + length
+    raise DNSError('name compression loop')
+
+
+def parse_response(data):
+    """Wire-format response -> (id, rcode, [(name, type, ttl, value)]) for A, AAAA and CNAME answers"""
+    try:
+        qid, flags, qdcount, ancount, _, _ = struct.unpack_from('!HHHHHH', data)
+        offset = 12
+        for _ in range(qdcount):
+            _, offset = read_name(data, offset)
+            offset += 4
+        answers = []
+        for _ in range(ancount):
+            name, offset = read_name(data, offset)
+            rtype, _, ttl, length = struct.unpack_from('!HHIH', data, offset)
+            offset += 10
+            rdata = data[offset:offset + length]
+            if rtype == QTYPES['A'] and length == 4:
+                answers.append((name.lower(), 'A', ttl, str(ipaddress.IPv4Address(rdata))))
+            elif rtype == QTYPES['AAAA'] and length == 16:
+                answers.append((name.lower(), 'AAAA', ttl, ipaddress.IPv6Address(rdata).compressed))
+            elif rtype == QTYPES['CNAME']:
+                answers.append((name.lower(), 'CNAME', ttl, normalize_answer('CNAME', read_name(data, offset)[0])))
+            offset += length
+    except (struct.error, IndexError, ValueError) as e:
+        raise DNSError(f'malformed response: {str(e)}')
+    return qid, flags & 0x000F, answers
+
+
+class _QueryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, qid, future):
+        self.qid = qid
+        self.future = future
+
+    def datagram_received(self, data, addr):
+        # Ignore stray or spoofed datagrams that do not carry our query id
+        if len(data) >= 2 and struct.unpack_from('!H', data)[0] == self.qid and not self.future.done():
+            self.future.set_result(data)
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+async def query(resolver, qname, qtype, timeout=DNS_VERIFY_QUERY_TIMEOUT):
+    """One UDP question to one resolver; returns the set of qtype values answered (empty on NXDOMAIN)"""
+    loop = asyncio.get_running_loop()
+    qid = random.getrandbits(16)
+    future = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(lambda: _QueryProtocol(qid, future), remote_addr=resolver)
+    try:
+        transport.sendto(build_query(qid, qname, qtype))
+        data = await asyncio.wait_for(future, timeout)
+    finally:
+        transport.close()
+    _, rcode, answers = parse_response(data)
+    if rcode not in (0, RCODE_NXDOMAIN):
+        raise DNSError(f'rcode {rcode}')
+    return frozenset(value for _, rtype, _, value in answers if rtype == qtype)
+
+
+async def observe(resolver, expected, timeout=DNS_VERIFY_QUERY_TIMEOUT):
+    """Ask one resolver every expected question at once -> {(qname, qtype): answers or exception}"""
+    keys = list(expected)
+    results = await asyncio.gather(*(query(resolver, qname, qtype, timeout) for qname, qtype in keys),
+                                   return_exceptions=True)
+    return dict(zip(keys, results))
+
+
+class ResolverWatch:
+    """Polling state and outcome for one resolver"""
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+        self.converged_after = None
+        self.attempts = 0
+        self.observed = {}
+
+    def report(self, expected):
+        """Outcome, with the last answers that still differ from `expected` for resolvers not yet converged"""
+        mismatched = {}
+        for (qname, qtype), answer in self.observed.items():
+            if isinstance(answer, BaseException):
+                mismatched[f'{qname} {qtype}'] = f'error: {str(answer) or type(answer).__name__}'
+            elif answer != expected[(qname, qtype)]:
+                mismatched[f'{qname} {qtype}'] = sorted(answer)
+        return {
+            'resolver': format_resolver(self.resolver),
+            'converged': self.converged_after is not None,
+            'seconds': round(self.converged_after, 3) if self.converged_after is not None else None,
+            'attempts': self.attempts,
+            'last_answers': mismatched
+        }
+
+
+async def watch(state, expected, started, deadline, query_timeout, backoff_base, backoff_max):
+    while True:
+        state.attempts += 1
+        state.observed = await observe(state.resolver, expected, query_timeout)
+        if all(state.observed[key] == values for key, values in expected.items()):
+            state.converged_after = time.monotonic() - started
+            return True
+        # Equal jitter: spread polls out without ever hammering a resolver back to back
+        ceiling = min(backoff_max, backoff_base * (2 ** (state.attempts - 1)))
+        delay = random.uniform(ceiling / 2, ceiling)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(delay, remaining))
+
+
+async def verify_propagation(expected, resolvers=None, quorum=DNS_VERIFY_QUORUM, timeout=DNS_VERIFY_TIMEOUT,
+                             query_timeout=DNS_VERIFY_QUERY_TIMEOUT, backoff_base=DNS_VERIFY_BACKOFF_BASE,
+                             backoff_max=DNS_VERIFY_BACKOFF_MAX, wait_all=False):
+    """Poll every resolver concurrently until `quorum` of them (default: a majority) answer `expected`.
+
+    Returns a report dict; resolvers still pending when the quorum is reached
+    are stopped unless wait_all is set. timeout=0 checks exactly once.
+    """
+    resolvers = [parse_resolver(r) if isinstance(r, str) else r
+                 for r in (resolvers or DNS_VERIFY_RESOLVERS.split(',')) if r]
+    quorum = min(len(resolvers), quorum or len(resolvers) // 2 + 1)
+    started = time.monotonic()
+    deadline = started + timeout
+    states = [ResolverWatch(resolver) for resolver in resolvers]
+    tasks = {asyncio.ensure_future(watch(state, expected, started, deadline, query_timeout, backoff_base,
+                                         backoff_max)) for state in states}
+    pending = tasks
+    try:
+        while pending:
+            _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            converged = sum(state.converged_after is not None for state in states)
+            if converged >= quorum and not wait_all:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results = [state.report(expected) for state in states]
+    converged = sum(result['converged'] for result in results)
+    return {
+        'converged': converged >= quorum,
+        'quorum': quorum,
+        'resolvers_converged': converged,
+        'resolvers': len(results),
+        'seconds': round(time.monotonic() - started, 3),
+        'expected': {f'{qname} {qtype}': sorted(values) for (qname, qtype), values in expected.items()},
+        'results': results
+    }
+
+
+def check_propagation(expected, **kwargs):
+    """Blocking wrapper around verify_propagation for the CLI tools"""
+    return asyncio.run(verify_propagation(expected, **kwargs))
+
+
+def print_report(report):
+    print(f"{'resolver':<24} {'converged':<9} {'secs':>8} {'polls':>5}  last answer")
+    for result in report['results']:
+        seconds = result['seconds'] if result['seconds'] is not None else '-'
+        last = '; '.join(f"{question} -> {', '.join(answer) if isinstance(answer, list) else answer or '(none)'}"
+                         for question, answer in result['last_answers'].items())
+        print(f"{result['resolver']:<24} {str(result['converged']).lower():<9} {seconds:>8} "
+              f"{result['attempts']:>5}  {last or '-'}")
+    verdict = 'propagated' if report['converged'] else 'NOT propagated'
+    print(f"\n{verdict}: {report['resolvers_converged']}/{report['resolvers']} resolvers "
+          f"(quorum {report['quorum']}) after {report['seconds']}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wait until public resolvers serve the desired DNS records')
+    parser.add_argument('config', help='YAML or JSON zone config (see dns_zones.yaml)')
+    parser.add_argument('--domain', action='append', help='only verify this domain (repeatable)')
+    parser.add_argument('--resolver', action='append',
+                        help='resolver address, host[:port] (repeatable; default DNS_VERIFY_RESOLVERS)')
+    parser.add_argument('--quorum', type=int, default=DNS_VERIFY_QUORUM, help='resolvers that must agree '
+                        '(default: a majority)')
+    parser.add_argument('--timeout', type=float, default=DNS_VERIFY_TIMEOUT,
+                        help='seconds to keep polling; 0 checks once')
+    parser.add_argument('--wait-all', action='store_true', help='keep polling the rest after the quorum is reached')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:
+        print(f"Invalid config: {str(e)}")
+        sys.exit(2)
+
+    expected = {}
+    for domain, spec in config['domains'].items():
+        if not args.domain or domain in args.domain:
+            expected.update(expected_answers(domain, spec['records']))
+    if not expected:
+        print("No A, AAAA or CNAME records to verify")
+        sys.exit(2)
+
+    report = check_propagation(expected, resolvers=args.resolver, quorum=args.quorum, timeout=args.timeout,
+                               wait_all=args.wait_all)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    sys.exit(0 if report['converged'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Multi-Domain GoDaddy DNS Reconciler
+
+Reads a declarative config of domains -> desired records (YAML or JSON),
+fetches each zone once, and rewrites only the record sets that differ.
+Zones are reconciled concurrently on a bounded worker pool; every API call
+attempt, retries included, first takes a slot from its account's shared
+rate limiter, so the pool never outruns GoDaddy's per-key quota (shared across processes when
+RATE_LIMIT_STORE is set). Prints a per-domain summary.
+
+Usage:
+    python scripts/dns_reconciler.py dns_zones.yaml --workers 8 [--dry-run] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rate_limiter import GCRALimiter, limiter_key, shared_store
+from record_validator import check_zones
+
+logger = logging.getLogger(__name__)
+
+GODADDY_API_URL = os.getenv('GODADDY_API_URL', 'https://api.godaddy.com')
+DNS_RECONCILE_WORKERS = int(os.getenv('DNS_RECONCILE_WORKERS', 8))
+DEFAULT_TTL = 600
+DEFAULT_CALLS_PER_MINUTE = 30
+DEFAULT_BURST = 1
+
+ZONE_UNCHANGED = 'unchanged'
+ZONE_UPDATED = 'updated'
+ZONE_PLANNED = 'planned'
+ZONE_FAILED = 'failed'
+
+
+class ConfigError(ValueError):
+    pass
+
+
+RECORD_OPTIONAL_FIELDS = ('priority', 'weight', 'port', 'service', 'protocol')
+
+
+def record_value(record):
+    """Comparable (data, ttl, extras) for a record; hostnames compare case- and trailing-dot-insensitively"""
+    data = str(record['data'])
+    if record['type'] in ('CNAME', 'MX', 'NS', 'SRV'):
+        data = data.rstrip('.').lower()
+    extras = tuple(record.get(field) for field in ('priority', 'weight', 'port'))
+    return data, int(record.get('ttl', DEFAULT_TTL)), extras
+
+
+def record_payload(record):
+    """Body entry for PUT /records/{type}/{name}"""
+    payload = {'data': record['data'], 'ttl': record['ttl']}
+    for field in RECORD_OPTIONAL_FIELDS:
+        if record.get(field) is not None:
+            payload[field] = record[field]
+    return payload
+
+
+def group_records(records):
+    groups = {}
+    for record in records:
+        groups.setdefault((record['type'], record['name']), []).append(record)
+    return groups
+
+
+def diff_records(current, desired):
+    """Record sets (type, name) -> desired records, for every managed set that differs from current.
+
+    Only the type/name pairs present in desired are compared, so unrelated
+    records (MX, TXT, ...) are left alone.
+    """
+    current_groups = group_records(current)
+    changes = {}
+    for key, records in group_records(desired).items():
+        wanted = sorted(record_value(record) for record in records)
+        existing = sorted(record_value(record) for record in current_groups.get(key, []))
+        if wanted != existing:
+            changes[key] = records
+    return changes
+
+
+def load_config(path):
+    """Parse and validate a YAML or JSON zone config; raises ValueError listing every bad record"""
+    with open(path) as f:
+        text = f.read()
+    if path.endswith(('.yaml', '.yml')):
+        if yaml is None:
+            raise ConfigError('PyYAML is required for YAML configs (pip install PyYAML), or use JSON')
+        raw = yaml.safe_load(text) or {}
+    else:
+        raw = json.loads(text)
+    config = normalize_config(raw)
+    check_zones({domain: spec['records'] for domain, spec in config['domains'].items()})
+    return config
+
+
+def normalize_records(records, ttl):
+    normalized = []
+    for record in records:
+        entry = {
+            'type': str(record['type']).upper(),
+            'name': str(record.get('name', '@')),
+            'data': str(record['data']),
+            'ttl': int(record.get('ttl', ttl))
+        }
+        for field in RECORD_OPTIONAL_FIELDS:
+            if record.get(field) is not None:
+                entry[field] = record[field]
+        normalized.append(entry)
+    return normalized
+
+
+def normalize_config(raw):
+    """Expand named targets and defaults so every domain has a flat, complete record list.
+
+    The failover domain's list leaves out the record sets its pools own (see
+    failover_record_sets), so apply/plan never touch what the prober manages.
+    """
+    accounts = raw.get('accounts') or {'default': {}}
+    targets = raw.get('targets') or {}
+    default_ttl = int(raw.get('ttl', DEFAULT_TTL))
+    domains = {}
+    for domain, spec in (raw.get('domains') or {}).items():
+        spec = spec or {}
+        account = spec.get('account', 'default')
+        if account not in accounts:
+            raise ConfigError(f'{domain}: unknown account {account!r}')
+        ttl = int(spec.get('ttl', default_ttl))
+        records = []
+        for target in spec.get('targets', []):
+            if target not in targets:
+                raise ConfigError(f'{domain}: unknown target {target!r}')
+            records.extend(targets[target])
+        records.extend(spec.get('records', []))
+        if not records:
+            raise ConfigError(f'{domain}: no records configured')
+        domains[domain] = {'account': account, 'records': normalize_records(records, ttl)}
+    failover = raw.get('failover')
+    if failover and failover.get('domain') in domains:
+        # origin_prober.py decides which pool these point at; reconciling them to the config would undo its failovers
+        spec = domains[failover['domain']]
+        owned = failover_record_sets(failover, targets)
+        spec['records'] = [record for record in spec['records'] if (record['type'], record['name']) not in owned]
+        spec['failover_sets'] = sorted(owned)
+    return {
+        'accounts': accounts,
+        'targets': {name: normalize_records(records, default_ttl) for name, records in targets.items()},
+        'domains': domains,
+        'failover': failover
+    }
+
+
+def failover_record_sets(failover, targets):
+    """(type, name) record sets written by the failover prober: every set any of its pools' targets contains"""
+    owned = set()
+    for pool in failover.get('pools', []):
+        if pool.get('target') not in targets:
+            raise ConfigError(f"failover pool {pool.get('name')!r}: unknown target {pool.get('target')!r}")
+        for record in normalize_records(targets[pool['target']], DEFAULT_TTL):
+            owned.add((record['type'], record['name']))
+    return owned
+
+
+class Account:
+    def __init__(self, name, spec):
+        self.name = name
+        self.api_key = os.getenv(spec.get('api_key_env', 'GODADDY_API_KEY'), '')
+        self.api_secret = os.getenv(spec.get('api_secret_env', 'GODADDY_API_SECRET'), '')
+        # Keyed by API key, so zones, threads and processes using one key share its quota
+        self.limiter = GCRALimiter(
+            int(spec.get('calls_per_minute', DEFAULT_CALLS_PER_MINUTE)), 60.0,
+            burst=int(spec.get('burst', DEFAULT_BURST)),
+            key=limiter_key('godaddy', self.api_key), store=shared_store()
+        )
+
+    def headers(self):
+        return {
+            'Authorization': f'sso-key {self.api_key}:{self.api_secret}',
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        }
+
+
+class DnsReconciler:
+    def __init__(self, config, workers=DNS_RECONCILE_WORKERS, api_url=GODADDY_API_URL, http_client=None,
+                 limiter_timeout=300):
+        self.config = config
+        self.workers = workers
+        self.api_url = api_url.rstrip('/')
+        if http_client is None:
+            # Deferred: requests is the slowest import here, and config-only callers never need it
+            from upstream_client import get_client
+            http_client = get_client()
+        self.http = http_client
+        self.limiter_timeout = limiter_timeout
+        self.accounts = {name: Account(name, spec or {}) for name, spec in config['accounts'].items()}
+
+    def records_url(self, domain):
+        return f'{self.api_url}/v1/domains/{domain}/records'
+
+    def call(self, account, method, url, **kwargs):
+        def take_slot():
+            # Runs before every attempt, so the client's 429/5xx retries spend the account quota too
+            if not account.limiter.acquire(timeout=self.limiter_timeout):
+                raise RuntimeError(f'Rate limiter for account {account.name} timed out')
+        return self.http.request(method, url, headers=account.headers(), before_attempt=take_slot, **kwargs)
+
+    def reconcile_zone(self, domain, spec, dry_run=False):
+        """Fetch one zone, diff it, and PUT each changed record set; returns a result dict"""
+        account = self.accounts[spec['account']]
+        started = time.perf_counter()
+        result = {'domain': domain, 'account': account.name, 'status': ZONE_UNCHANGED,
+                  'changes': [], 'api_calls': 0, 'error': None}
+        try:
+            response = self.call(account, 'GET', self.records_url(domain))
+            result['api_calls'] += 1
+            if response.status_code != 200:
+                raise RuntimeError(f'GET records returned {response.status_code}')
+
+            changes = diff_records(response.json(), spec['records'])
+            result['changes'] = [
+                {'type': record_type, 'name': name, 'data': [record['data'] for record in records]}
+                for (record_type, name), records in changes.items()
+            ]
+            if changes:
+                result['status'] = ZONE_PLANNED if dry_run else ZONE_UPDATED
+            if dry_run:
+                return result
+
+            for (record_type, name), records in changes.items():
+                response = self.call(
+                    account, 'PUT', f'{self.records_url(domain)}/{record_type}/{name}',
+                    json=[record_payload(record) for record in records]
+                )
+                result['api_calls'] += 1
+                if response.status_code != 200:
+                    raise RuntimeError(f'PUT {record_type} {name} returned {response.status_code}')
+
+        except Exception as e:
+            logger.error(f"Error reconciling {domain}: {str(e)}")
+            result['status'] = ZONE_FAILED
+            result['error'] = str(e)
+
+        finally:
+            result['seconds'] = round(time.perf_counter() - started, 3)
+
+        return result
+
+    def reconcile_all(self, dry_run=False, domains=None):
+        """Reconcile every configured zone (or just domains) on a bounded pool; results in config order"""
+        selected = [
+            (domain, spec) for domain, spec in self.config['domains'].items()
+            if domains is None or domain in domains
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            futures = [pool.submit(self.reconcile_zone, domain, spec, dry_run) for domain, spec in selected]
+            return [future.result() for future in futures]
+
+
+def summarize(results, seconds):
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    return {
+        'zones': len(results),
+        'seconds': round(seconds, 3),
+        'api_calls': sum(result['api_calls'] for result in results),
+        'by_status': counts,
+        'results': results
+    }
+
+
+def print_summary(summary):
+    print(f"{'domain':<32} {'status':<10} {'calls':>5} {'secs':>7}  changes")
+    for result in summary['results']:
+        changes = ', '.join(f"{c['type']} {c['name']}" for c in result['changes']) or '-'
+        if result['error']:
+            changes = f"error: {result['error']}"
+        print(f"{result['domain']:<32} {result['status']:<10} {result['api_calls']:>5} {result['seconds']:>7}  {changes}")
+    print(f"\n{summary['zones']} zones in {summary['seconds']}s, {summary['api_calls']} API calls, {summary['by_status']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconcile many GoDaddy DNS zones against a declarative config')
+    parser.add_argument('config', help='YAML or JSON zone config')
+    parser.add_argument('--workers', type=int, default=DNS_RECONCILE_WORKERS)
+    parser.add_argument('--domain', action='append', help='only reconcile this domain (repeatable)')
+    parser.add_argument('--dry-run', action='store_true', help='fetch and diff, but do not write')
+    parser.add_argument('--json', action='store_true', help='print the summary as JSON')
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:
+        print(f"Invalid config: {str(e)}")
+        sys.exit(2)
+
+    reconciler = DnsReconciler(config, workers=args.workers)
+    started = time.perf_counter()
+    results = reconciler.reconcile_all(dry_run=args.dry_run, domains=args.domain)
+    summary = summarize(results, time.perf_counter() - started)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+    sys.exit(1 if summary['by_status'].get(ZONE_FAILED) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+In-Memory Event Ring Buffer for the Webhook Handler
+
+Keeps the most recent structured events (kind, outcome, upstream latency,
+commit id) in fixed-size deques so /status never touches the log file.
+Each kind also gets its own ring, so filtered queries only walk matching
+events; kind rings default to the full capacity, so a filtered query can
+return as many events as an unfiltered one.
+"""
+
+import os
+import threading
+from collections import deque
+from itertools import islice
+from datetime import datetime
+
+
+class EventRingBuffer:
+    def __init__(self, capacity=500, per_kind_capacity=None):
+        self.capacity = capacity
+        # Rings hold references to the same event dicts, so sizing them like the main one costs little
+        self.per_kind_capacity = per_kind_capacity or capacity
+        self._events = deque(maxlen=capacity)
+        self._by_kind = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind, outcome, commit_id=None, latency_ms=None, **details):
+        """Append an event; oldest events fall off automatically"""
+        event = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'kind': kind,
+            'outcome': outcome,
+            'commit_id': commit_id,
+            'upstream_latency_ms': round(latency_ms, 1) if latency_ms is not None else None
+        }
+        event.update(details)
+        with self._lock:
+            self._events.append(event)
+            ring = self._by_kind.get(kind)
+            if ring is None:
+                ring = self._by_kind[kind] = deque(maxlen=self.per_kind_capacity)
+            ring.append(event)
+        return event
+
+    def recent(self, limit=10, kind=None):
+        """Newest-first list of up to limit events, optionally of one kind"""
+        with self._lock:
+            ring = self._events if kind is None else self._by_kind.get(kind, ())
+            return list(islice(reversed(ring), max(0, limit)))
+
+    def __len__(self):
+        return len(self._events)
+
+
+def tail_log_lines(path, max_bytes=8192, contains=None):
+    """Return complete lines from the last max_bytes of a log file, oldest first (file order)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - max_bytes))
+        chunk = f.read()
+    lines = chunk.decode('utf-8', errors='replace').splitlines()
+    if size > max_bytes and lines:
+        # The first line is most likely cut in half by the seek
+        lines = lines[1:]
+    if contains:
+        lines = [line for line in lines if contains in line]
+    return [line.strip() for line in lines]
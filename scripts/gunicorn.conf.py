@@ -0,0 +1,19 @@
+"""
+Gunicorn Settings for the Webhook Handler
+
+Each worker builds its WebhookHandler as soon as it starts instead of on its
+first request, so dispatches dead-lettered before a restart or deploy are
+replayed even if no webhook arrives for a while. Workers share the
+dead-letter file; its leases keep two of them from replaying the same entry.
+
+Usage:
+    gunicorn -c scripts/gunicorn.conf.py scripts.webhook_handler:app --bind 0.0.0.0:5000
+"""
+
+import importlib
+
+
+def post_worker_init(worker):
+    """Build the worker's handler (which starts the dead-letter replay) before it accepts requests"""
+    module = importlib.import_module(worker.app.app_uri.split(':')[0])
+    module.get_webhook_handler()
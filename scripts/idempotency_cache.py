@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Idempotency Cache for Webhook Deliveries
+
+Remembers the response sent for each webhook delivery so that GitLab
+re-deliveries are answered from memory instead of triggering another
+deployment. Entries expire after a TTL and the cache is bounded with LRU
+eviction. An optional SQLite file keeps entries across restarts.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+PRUNE_EVERY_WRITES = 1000
+
+
+def delivery_key(headers, data):
+    """Identify a webhook delivery by its event UUID or by commit SHA + event kind"""
+    event_uuid = headers.get('X-Gitlab-Event-UUID')
+    if event_uuid:
+        return f'uuid:{event_uuid}'
+    if not data:
+        return None
+    kind = data.get('object_kind', '')
+    if kind == 'push' and data.get('after'):
+        return f"push:{data.get('ref', '')}:{data['after']}"
+    if kind == 'pipeline':
+        attributes = data.get('object_attributes', {})
+        if attributes.get('id'):
+            return f"pipeline:{attributes['id']}:{attributes.get('status', '')}"
+    return None
+
+
+class IdempotencyCache:
+    def __init__(self, max_entries=10000, ttl=86400, db_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._open_db()
+
+    def get(self, key):
+        """Return the cached (body, status_code) for key, or None"""
+        if key is None:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key, body, status_code=200):
+        """Record the response sent for key"""
+        if key is None:
+            return
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, body, status_code)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO idempotency (key, expires_at, body, status_code) VALUES (?, ?, ?, ?)',
+                        (key, expires_at, json.dumps(body), status_code)
+                    )
+                    self._writes += 1
+                    if self._writes % PRUNE_EVERY_WRITES == 0:
+                        self._db.execute('DELETE FROM idempotency WHERE expires_at <= ?', (time.time(),))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to persist idempotency key {key}: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'persistent': self._db is not None
+            }
+
+    def _open_db(self):
+        try:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS idempotency ('
+                'key TEXT PRIMARY KEY, expires_at REAL, body TEXT, status_code INTEGER)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS idempotency_expires ON idempotency (expires_at)')
+            now = time.time()
+            self._db.execute('DELETE FROM idempotency WHERE expires_at <= ?', (now,))
+            self._db.commit()
+            rows = self._db.execute(
+                'SELECT key, expires_at, body, status_code FROM idempotency '
+                'ORDER BY expires_at DESC LIMIT ?',
+                (self.max_entries,)
+            ).fetchall()
+            for key, expires_at, body, status_code in reversed(rows):
+                self._entries[key] = (expires_at, json.loads(body), status_code)
+            logger.info(f"Loaded {len(rows)} idempotency keys from {self.db_path}")
+        except sqlite3.Error as e:
+            logger.error(f"Idempotency store {self.db_path} unavailable, using memory only: {str(e)}")
+            self._db = None
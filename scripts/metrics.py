@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Prometheus-Style Metrics for the Webhook Handler
+
+Counters, gauges and latency histograms are kept in plain dicts inside each
+worker process; recording a sample is a dict update under an uncontended
+lock. Under gunicorn every worker periodically snapshots its own series to
+METRICS_DIR/metrics-<pid>.json, and /metrics merges those snapshots into
+one text exposition, so scrapes never touch other workers' memory.
+"""
+
+import os
+import json
+import glob
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+
+def labels_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def format_labels(key, extra=None):
+    pairs = list(key) + (list(extra) if extra else [])
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    def __init__(self, multiproc_dir=None, flush_interval=5.0):
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self._meta = {}
+        self._values = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def counter(self, name, help_text):
+        self._define(name, COUNTER, help_text)
+
+    def gauge(self, name, help_text):
+        self._define(name, GAUGE, help_text)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self._define(name, HISTOGRAM, help_text, tuple(buckets))
+
+    def register_collector(self, func, name=None):
+        """func() is called at scrape/flush time to refresh gauges; a name replaces earlier collectors"""
+        self._collectors[name or id(func)] = func
+
+    def inc(self, name, labels=None, value=1):
+        key = labels_key(labels)
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, labels=None):
+        key = labels_key(labels)
+        with self._lock:
+            self._values[name][key] = value
+
+    def observe(self, name, seconds, labels=None):
+        key = labels_key(labels)
+        buckets = self._meta[name][2]
+        with self._lock:
+            series = self._values[name]
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * (len(buckets) + 2)
+            # Non-cumulative bucket counts; cumulated at render time
+            index = len(buckets)
+            for position, bound in enumerate(buckets):
+                if seconds <= bound:
+                    index = position
+                    break
+            state[index] += 1
+            state[-1] += seconds
+
+    def time(self, name, labels=None):
+        return _Timer(self, name, labels)
+
+    def snapshot(self):
+        """JSON-serializable copy of this process's series"""
+        for collect in list(self._collectors.values()):
+            try:
+                collect()
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {str(e)}")
+        with self._lock:
+            return {
+                name: [[list(map(list, key)), value if not isinstance(value, list) else list(value)]
+                       for key, value in series.items()]
+                for name, series in self._values.items()
+            }
+
+    def start(self):
+        """Begin periodic snapshots for multi-process aggregation (idempotent)"""
+        if not self.multiproc_dir or self._flusher is not None:
+            return
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        self._flusher.start()
+
+    def flush(self):
+        if not self.multiproc_dir:
+            return
+        path = os.path.join(self.multiproc_dir, f'metrics-{os.getpid()}.json')
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temp_path, path)
+
+    def render(self):
+        """Prometheus text exposition merged across worker snapshots"""
+        merged = self._merge([(os.getpid(), self.snapshot())] + self._other_snapshots())
+        lines = []
+        for name, (kind, help_text, buckets) in sorted(self._meta.items()):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for key, value in sorted(merged.get(name, {}).items()):
+                if kind == HISTOGRAM:
+                    cumulative = 0
+                    for bound, count in zip(buckets + (float('inf'),), value[:-1]):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{format_labels(key, [("le", format_value(bound))])} {cumulative}')
+                    lines.append(f'{name}_sum{format_labels(key)} {format_value(value[-1])}')
+                    lines.append(f'{name}_count{format_labels(key)} {cumulative}')
+                else:
+                    lines.append(f'{name}{format_labels(key)} {format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def _define(self, name, kind, help_text, buckets=()):
+        with self._lock:
+            if name not in self._meta:
+                self._meta[name] = (kind, help_text, buckets)
+                self._values[name] = {}
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                logger.error(f"Failed to write metrics snapshot: {str(e)}")
+
+    def _other_snapshots(self):
+        if not self.multiproc_dir:
+            return []
+        snapshots = []
+        own = f'metrics-{os.getpid()}.json'
+        for path in glob.glob(os.path.join(self.multiproc_dir, 'metrics-*.json')):
+            if os.path.basename(path) == own:
+                continue
+            try:
+                pid = int(os.path.basename(path)[len('metrics-'):-len('.json')])
+                with open(path) as f:
+                    snapshots.append((pid, json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def _merge(self, snapshots):
+        merged = {}
+        for pid, snapshot in snapshots:
+            alive = pid == os.getpid() or _pid_alive(pid)
+            for name, series in snapshot.items():
+                meta = self._meta.get(name)
+                if meta is None:
+                    continue
+                kind = meta[0]
+                # Gauges describe live state, so dead workers stop contributing
+                if kind == GAUGE and not alive:
+                    continue
+                target = merged.setdefault(name, {})
+                for key, value in series:
+                    key = tuple(tuple(pair) for pair in key)
+                    if kind == HISTOGRAM:
+                        current = target.get(key)
+                        target[key] = list(value) if current is None else [a + b for a, b in zip(current, value)]
+                    else:
+                        target[key] = target.get(key, 0) + value
+        return merged
+
+
+class _Timer:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.started, self.labels)
+        return False
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Origin Health Prober with Automatic DNS Failover
+
+Probes every hosting origin (GitLab Pages, GitHub Pages, ...) concurrently
+on a fixed interval and keeps each origin's TTFB and availability in a
+fixed-size, array-backed ring buffer. When the active origin fails
+`fail_threshold` probes in a row, the apex A records are reconciled to the
+highest-priority origin that has passed `recover_threshold` probes in a row.
+Switching back to a preferred origin also needs `min_hold` seconds since the
+last switch, so a flapping origin does not flap DNS with it.
+
+Configured by the `failover:` section of dns_zones.yaml. The record sets
+the pools' targets contain belong to this prober: `infractl apply` and
+dns_reconciler.py leave them alone.
+
+Usage:
+    python scripts/origin_prober.py dns_zones.yaml [--once] [--dry-run] [--status-file status.json]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import logging
+import argparse
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from upstream_client import UpstreamClient
+from dns_reconciler import DnsReconciler, load_config, group_records, record_value, ZONE_FAILED
+
+logger = logging.getLogger(__name__)
+
+PROBE_HISTORY = int(os.getenv('PROBE_HISTORY', 2880))
+PROBE_TIMEOUT = float(os.getenv('PROBE_TIMEOUT', 5))
+
+
+class ProbeSeries:
+    """Ring buffer of (timestamp, ttfb_ms, ok) in three preallocated arrays; ~17 bytes per sample"""
+
+    def __init__(self, capacity=PROBE_HISTORY):
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.ttfb_ms = array('d', bytes(8 * capacity))
+        self.ok = array('b', bytes(capacity))
+        self.count = 0
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+        self._next = 0
+
+    def append(self, timestamp, ttfb_ms, ok):
+        index = self._next
+        self.timestamps[index] = timestamp
+        self.ttfb_ms[index] = ttfb_ms if ttfb_ms is not None else math.nan
+        self.ok[index] = 1 if ok else 0
+        self._next = (index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        if ok:
+            self.consecutive_successes += 1
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            self.consecutive_successes = 0
+
+    def indices(self, last=None):
+        """Buffer positions of the newest `last` samples, oldest first"""
+        size = self.count if last is None else min(last, self.count)
+        start = (self._next - size) % self.capacity
+        return [(start + offset) % self.capacity for offset in range(size)]
+
+    def availability(self, last=None):
+        positions = self.indices(last)
+        if not positions:
+            return None
+        return sum(self.ok[i] for i in positions) / len(positions)
+
+    def ttfb_percentile(self, fraction, last=None):
+        values = sorted(self.ttfb_ms[i] for i in self.indices(last) if self.ok[i])
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+
+    def summary(self, last=None):
+        p50 = self.ttfb_percentile(0.50, last)
+        p95 = self.ttfb_percentile(0.95, last)
+        availability = self.availability(last)
+        return {
+            'samples': len(self.indices(last)),
+            'availability': round(availability, 4) if availability is not None else None,
+            'ttfb_p50_ms': round(p50, 1) if p50 is not None else None,
+            'ttfb_p95_ms': round(p95, 1) if p95 is not None else None,
+            'consecutive_failures': self.consecutive_failures,
+            'consecutive_successes': self.consecutive_successes
+        }
+
+
+class Origin:
+    def __init__(self, name, probe_url, records, capacity=PROBE_HISTORY):
+        self.name = name
+        self.probe_url = probe_url
+        self.records = records
+        self.series = ProbeSeries(capacity)
+
+
+class FailoverController:
+    def __init__(self, config, dry_run=False, http_client=None, reconciler=None):
+        failover = config.get('failover')
+        if not failover:
+            raise ValueError('No failover section in config')
+        self.domain = failover['domain']
+        if self.domain not in config['domains']:
+            raise ValueError(f"Failover domain {self.domain} is not in domains")
+        self.zone = config['domains'][self.domain]
+        self.interval = float(failover.get('interval', 30))
+        self.fail_threshold = int(failover.get('fail_threshold', 3))
+        self.recover_threshold = int(failover.get('recover_threshold', 5))
+        self.min_hold = float(failover.get('min_hold', 300))
+        self.dry_run = dry_run
+        self.origins = [
+            Origin(pool['name'], pool['probe'], config['targets'][pool['target']])
+            for pool in failover['pools']
+        ]
+        # Probes must see raw failures, so no retries and no circuit breaker
+        self.http = http_client or UpstreamClient(max_retries=0, read_timeout=PROBE_TIMEOUT, breaker_failures=0)
+        self.reconciler = reconciler or DnsReconciler(config)
+        self.active = None
+        self.last_switch = 0.0
+        self.switches = []
+        self._stop = threading.Event()
+
+    def probe(self, origin):
+        """One GET; TTFB is time to response headers (the body is not read)"""
+        started = time.perf_counter()
+        try:
+            response = self.http.get(origin.probe_url, stream=True, allow_redirects=False)
+            ttfb_ms = (time.perf_counter() - started) * 1000
+            ok = response.status_code < 400
+            response.close()
+        except Exception as e:
+            logger.warning(f"Probe of {origin.name} failed: {str(e)}")
+            ttfb_ms, ok = None, False
+        origin.series.append(time.time(), ttfb_ms, ok)
+        return ok
+
+    def probe_all(self):
+        with ThreadPoolExecutor(max_workers=len(self.origins)) as pool:
+            return list(pool.map(self.probe, self.origins))
+
+    def desired_records(self, origin):
+        """Zone records with the apex A set replaced by the origin's records"""
+        addresses = {(record['type'], record['name']) for record in origin.records}
+        return [record for record in self.zone['records']
+                if (record['type'], record['name']) not in addresses] + origin.records
+
+    def detect_active(self, current_records):
+        """Which origin the live A records point at, if any"""
+        groups = group_records(current_records)
+        for origin in self.origins:
+            wanted = group_records(origin.records)
+            if all(sorted(map(record_value, groups.get(key, []))) == sorted(map(record_value, records))
+                   for key, records in wanted.items()):
+                return origin
+        return None
+
+    def choose(self, now):
+        """Origin DNS should point at after this round (may be the current one)"""
+        active = self.active
+        if active is not None and active.series.consecutive_failures < self.fail_threshold:
+            # Healthy: only fail back to a preferred origin that has been stable long enough
+            for origin in self.origins:
+                if origin is active:
+                    return active
+                if (origin.series.consecutive_successes >= self.recover_threshold
+                        and now - self.last_switch >= self.min_hold):
+                    return origin
+            return active
+        for origin in self.origins:
+            # One lucky probe is not enough to move production traffic onto an origin
+            if origin is not active and origin.series.consecutive_successes >= self.recover_threshold:
+                return origin
+        # Nothing proven healthy to move to; stay put rather than point at another dead origin
+        return active
+
+    def switch_to(self, origin, reason):
+        previous = self.active.name if self.active else None
+        logger.warning(f"Failing over {self.domain}: {previous} -> {origin.name} ({reason})")
+        result = self.reconciler.reconcile_zone(
+            self.domain,
+            {'account': self.zone['account'], 'records': self.desired_records(origin)},
+            dry_run=self.dry_run
+        )
+        if result['status'] == ZONE_FAILED:
+            logger.error(f"Failover to {origin.name} failed: {result['error']}")
+            return False
+        self.active = origin
+        self.last_switch = time.time()
+        self.switches.append({'timestamp': self.last_switch, 'from': previous, 'to': origin.name,
+                              'reason': reason, 'dns': result['status']})
+        return True
+
+    def step(self):
+        """Probe all origins once and fail over if needed"""
+        self.probe_all()
+        now = time.time()
+        if self.active is None:
+            # Fresh start with no DNS knowledge: take the first healthy origin
+            target = next((o for o in self.origins if o.series.consecutive_successes), None)
+            if target is not None:
+                self.switch_to(target, 'initial')
+            return
+        target = self.choose(now)
+        if target is not self.active:
+            reason = (f'{self.active.name} failed {self.active.series.consecutive_failures} probes'
+                      if self.active.series.consecutive_failures else f'{target.name} recovered')
+            self.switch_to(target, reason)
+
+    def start_from_dns(self):
+        """Read the zone once to learn which origin is live"""
+        account = self.reconciler.accounts[self.zone['account']]
+        response = self.reconciler.call(account, 'GET', self.reconciler.records_url(self.domain))
+        if response.status_code == 200:
+            self.active = self.detect_active(response.json())
+        logger.info(f"Active origin for {self.domain}: {self.active.name if self.active else 'unknown'}")
+
+    def status(self):
+        return {
+            'domain': self.domain,
+            'active': self.active.name if self.active else None,
+            'last_switch': self.last_switch or None,
+            'switches': self.switches[-20:],
+            'origins': {origin.name: origin.series.summary() for origin in self.origins}
+        }
+
+    def run(self, rounds=None, status_file=None):
+        completed = 0
+        while not self._stop.is_set() and (rounds is None or completed < rounds):
+            started = time.monotonic()
+            self.step()
+            completed += 1
+            if status_file:
+                write_status(status_file, self.status())
+            if rounds is None or completed < rounds:
+                self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def stop(self):
+        self._stop.set()
+
+
+def write_status(path, status):
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(status, f, indent=2)
+    os.replace(temporary, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Probe hosting origins and fail DNS over between them')
+    parser.add_argument('config', help='zone config with a failover section')
+    parser.add_argument('--once', action='store_true', help='probe a single round and exit')
+    parser.add_argument('--rounds', type=int, help='stop after this many rounds')
+    parser.add_argument('--dry-run', action='store_true', help='decide, but do not write DNS')
+    parser.add_argument('--status-file', help='write the latest status JSON here every round')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    controller = FailoverController(load_config(args.config), dry_run=args.dry_run)
+    try:
+        controller.start_from_dns()
+    except Exception as e:
+        logger.error(f"Could not read current DNS for {controller.domain}: {str(e)}")
+    try:
+        controller.run(rounds=1 if args.once else args.rounds, status_file=args.status_file)
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(controller.status(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Push Event Coalescing for Deployment Dispatches
+
+The first push for a ref is dispatched straight away and opens a
+per-event-type window; pushes that arrive inside the window are merged
+into one trailing dispatch, sent when it closes, carrying the latest commit
+plus the list of superseded commits. A lone push therefore pays no delay,
+and a steady stream of pushes still dispatches at least once per window.
+A timer dispatch that fails (e.g. a full queue) is retried with backoff
+instead of being dropped, since no caller is left to report it to.
+"""
+
+import logging
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def parse_windows(spec):
+    """Parse 'content_updated=30,other=5' into {'content_updated': 30.0, 'other': 5.0}"""
+    windows = {}
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        event_type, _, seconds = item.partition('=')
+        windows[event_type.strip()] = float(seconds)
+    return windows
+
+
+class CoalescedBatch:
+    def __init__(self, event_type, key, payload):
+        self.id = uuid.uuid4().hex
+        self.event_type = event_type
+        self.key = key
+        self.payload = payload
+        self.superseded = []
+        self.pushes = 1
+        self.attempts = 0
+        self.opened_at = datetime.utcnow().isoformat()
+        self.flushed_at = None
+        self.job_id = None
+
+    def merge(self, payload):
+        previous = self.payload.get('commit_id')
+        if previous:
+            self.superseded.append(previous)
+        self.payload = payload
+        self.pushes += 1
+
+    def absorb(self, older):
+        """Take over a failed earlier batch for the same ref; this one's commit supersedes all of its commits"""
+        self.superseded[:0] = older.superseded + ([older.payload['commit_id']] if older.payload.get('commit_id') else [])
+        self.pushes += older.pushes
+
+    def dispatch_payload(self):
+        payload = dict(self.payload)
+        payload['superseded_commits'] = list(self.superseded)
+        payload['coalesced_pushes'] = self.pushes
+        return payload
+
+    def to_dict(self):
+        return {
+            'batch_id': self.id,
+            'event_type': self.event_type,
+            'commit_id': self.payload.get('commit_id'),
+            'superseded_commits': list(self.superseded),
+            'coalesced_pushes': self.pushes,
+            'opened_at': self.opened_at,
+            'flushed_at': self.flushed_at,
+            'job_id': self.job_id
+        }
+
+
+class PushCoalescer:
+    def __init__(self, dispatch, windows=None, max_flushed_batches=1000, max_retry_delay=300.0):
+        # dispatch(batch_payload) submits the merged payload and returns a job id
+        self.dispatch = dispatch
+        self.windows = windows or {}
+        self.max_flushed_batches = max_flushed_batches
+        self.max_retry_delay = max_retry_delay
+        # (event_type, key) -> trailing batch, or None while a window is open with nothing to send yet
+        self._pending = {}
+        self._timers = {}
+        self._batches = {}
+        self._flushed = deque()
+        self._lock = threading.Lock()
+        self.pushes_received = 0
+        self.dispatches_sent = 0
+        self.dispatches_saved = 0
+
+    def window_for(self, event_type):
+        return self.windows.get(event_type, 0)
+
+    def submit(self, event_type, key, payload):
+        """Add a push to its coalescing window; returns the batch it joined (job_id is set once dispatched)"""
+        window = self.window_for(event_type)
+        slot = (event_type, key)
+        with self._lock:
+            self.pushes_received += 1
+            if window > 0 and slot in self._pending:
+                batch = self._pending[slot]
+                if batch is not None:
+                    batch.merge(payload)
+                    self.dispatches_saved += 1
+                    logger.debug(f"Coalesced {event_type} for {key} into batch {batch.id} ({batch.pushes} pushes)")
+                    return batch
+                # Trailing edge: goes out when the window closes
+                batch = self._pending[slot] = CoalescedBatch(event_type, key, payload)
+                self._batches[batch.id] = batch
+                return batch
+            batch = CoalescedBatch(event_type, key, payload)
+            self._batches[batch.id] = batch
+            if window > 0:
+                self._pending[slot] = None
+                self._start_timer(slot, window)
+        # Leading edge (or no window): dispatch inline so queue errors reach the caller
+        try:
+            self._dispatch(batch, raise_errors=True)
+        except Exception:
+            if window > 0:
+                # Nothing went out, so the sender's retry should be a leading edge again
+                self._close_window(slot)
+            raise
+        return batch
+
+    def flush(self, event_type, key):
+        """Window timer: dispatch the trailing batch for (event_type, key), if any, and keep the window going"""
+        slot = (event_type, key)
+        with self._lock:
+            self._timers.pop(slot, None)
+            batch = self._pending.pop(slot, None)
+            if batch is not None and self.window_for(event_type) > 0:
+                # Pushes right behind this dispatch start the next window's batch instead of going out alone
+                self._pending[slot] = None
+                self._start_timer(slot, self.window_for(event_type))
+        if batch is not None:
+            self._dispatch(batch)
+
+    def flush_all(self):
+        """Dispatch every pending batch immediately (used on shutdown)"""
+        with self._lock:
+            pending = [batch for batch in self._pending.values() if batch is not None]
+            self._pending.clear()
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+        for batch in pending:
+            self._dispatch(batch)
+
+    def get_batch(self, batch_id):
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            return batch.to_dict() if batch else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'windows': dict(self.windows),
+                'pending_batches': sum(1 for batch in self._pending.values() if batch is not None),
+                'pushes_received': self.pushes_received,
+                'dispatches_sent': self.dispatches_sent,
+                'dispatches_saved': self.dispatches_saved
+            }
+
+    def _dispatch(self, batch, raise_errors=False):
+        try:
+            job_id = self.dispatch(batch.dispatch_payload())
+        except Exception as e:
+            if raise_errors:
+                logger.error(f"Failed to dispatch coalesced batch {batch.id}: {str(e)}")
+                self._retire(batch)
+                raise
+            # A timer flush has no caller to hand the error to: try again rather than lose the push
+            self._retry(batch, e)
+            return
+        with self._lock:
+            batch.job_id = job_id
+            self.dispatches_sent += 1
+        self._retire(batch)
+
+    def _retry(self, batch, error):
+        batch.attempts += 1
+        delay = min(self.max_retry_delay, max(1.0, self.window_for(batch.event_type)) * 2 ** (batch.attempts - 1))
+        slot = (batch.event_type, batch.key)
+        with self._lock:
+            newer = self._pending.get(slot)
+            if newer is not None:
+                # A later push is already waiting; it carries the newest commit, so send them together
+                newer.absorb(batch)
+                logger.error(f"Failed to dispatch coalesced batch {batch.id}: {str(error)}; "
+                             f"folded into batch {newer.id}")
+                return
+            # Pushes arriving meanwhile merge into it; the backoff replaces the window's own timer
+            self._pending[slot] = batch
+            timer = self._timers.pop(slot, None)
+            if timer is not None:
+                timer.cancel()
+            self._start_timer(slot, delay)
+        logger.error(f"Failed to dispatch coalesced batch {batch.id}: {str(error)}; "
+                     f"retry {batch.attempts} in {delay:g}s")
+
+    def _retire(self, batch):
+        with self._lock:
+            batch.flushed_at = datetime.utcnow().isoformat()
+            self._flushed.append(batch.id)
+            while len(self._flushed) > self.max_flushed_batches:
+                self._batches.pop(self._flushed.popleft(), None)
+
+    def _start_timer(self, slot, seconds):
+        """Caller holds the lock"""
+        timer = threading.Timer(seconds, self.flush, args=slot)
+        timer.daemon = True
+        self._timers[slot] = timer
+        timer.start()
+
+    def _close_window(self, slot):
+        with self._lock:
+            if self._pending.get(slot) is None:
+                self._pending.pop(slot, None)
+                timer = self._timers.pop(slot, None)
+                if timer is not None:
+                    timer.cancel()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+GCRA Rate Limiter with Shared State
+
+A token bucket expressed as GCRA: each limiter keeps a single "theoretical
+arrival time" per key, so admitting a call is O(1) no matter how many
+calls came before it. Callers can block until their slot, try without
+waiting, or await the slot from asyncio. State lives in memory, in a
+locked JSON file, or in SQLite, so several processes (CI jobs, gunicorn
+workers, the DNS tools) can share one quota.
+
+    RATE_LIMIT_STORE=sqlite:/var/lib/peacefulrobot/ratelimits.db
+    UPSTREAM_RATE_LIMITS="api.github.com=5000/3600,api.godaddy.com=60/60"
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import logging
+import threading
+from functools import wraps
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_STORE = os.getenv('RATE_LIMIT_STORE', '')
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, key, retry_after):
+        super().__init__(f'Rate limit exceeded for {key}; retry in {retry_after:.2f}s')
+        self.key = key
+        self.retry_after = retry_after
+
+
+class MemoryStore:
+    """Per-process state guarded by a lock"""
+
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, func):
+        """Run func(current_tat) -> (new_tat or None, result) atomically; returns result"""
+        with self._lock:
+            new_tat, result = func(self._state.get(key))
+            if new_tat is not None:
+                self._state[key] = new_tat
+            return result
+
+
+class FileStore:
+    """JSON file of {key: tat} guarded by an exclusive flock; shared by every process on the host"""
+
+    def __init__(self, path):
+        if fcntl is None:
+            raise RuntimeError('FileStore needs fcntl (POSIX); use a sqlite: store instead')
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def update(self, key, func):
+        with open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                text = f.read()
+                state = json.loads(text) if text else {}
+                new_tat, result = func(state.get(key))
+                if new_tat is not None:
+                    state[key] = new_tat
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SQLiteStore:
+    """SQLite table of (key, tat); BEGIN IMMEDIATE serializes writers across processes"""
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        db = self._connection()
+        db.execute('CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)')
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+
+    def update(self, key, func):
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute('SELECT tat FROM rate_limits WHERE key = ?', (key,)).fetchone()
+            new_tat, result = func(row[0] if row else None)
+            if new_tat is not None:
+                db.execute('INSERT OR REPLACE INTO rate_limits (key, tat) VALUES (?, ?)', (key, new_tat))
+            db.execute('COMMIT')
+            return result
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+
+def open_store(spec=RATE_LIMIT_STORE):
+    """'' -> MemoryStore, 'file:/path' -> FileStore, 'sqlite:/path' -> SQLiteStore"""
+    if not spec or spec == 'memory':
+        return MemoryStore()
+    scheme, _, path = spec.partition(':')
+    if scheme == 'file' and path:
+        return FileStore(path)
+    if scheme == 'sqlite' and path:
+        return SQLiteStore(path)
+    raise ValueError(f'Invalid rate limit store: {spec}')
+
+
+_shared_stores = {}
+_shared_lock = threading.Lock()
+
+
+def shared_store(spec=RATE_LIMIT_STORE):
+    """One store object per spec in this process, so every limiter on it shares state"""
+    with _shared_lock:
+        store = _shared_stores.get(spec)
+        if store is None:
+            store = _shared_stores[spec] = open_store(spec)
+        return store
+
+
+def limiter_key(service, credential):
+    """Quota key for an API credential without writing the credential itself to shared state"""
+    return f"{service}:{hashlib.sha256(credential.encode()).hexdigest()[:12]}"
+
+
+class GCRALimiter:
+    """`rate` calls per `period` seconds, up to `burst` of them back to back (default 1: evenly spaced)"""
+
+    def __init__(self, rate, period=60.0, burst=1, key='default', store=None):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+        self.rate = rate
+        self.period = period
+        self.burst = burst
+        self.key = key
+        self.store = store or MemoryStore()
+        self.interval = period / rate
+        # A burst of b means b calls may arrive at once: the b-th lands (b - 1) intervals early
+        self.tolerance = self.interval * (self.burst - 1)
+
+    def _wait(self, new_tat, now):
+        """Seconds until a claim ending at new_tat conforms: its first slot may start tolerance early"""
+        return max(0.0, new_tat - self.interval - self.tolerance - now)
+
+    def _reserve(self, tokens, max_wait):
+        """Claim the next slot; returns seconds to wait for it, or None if that exceeds max_wait"""
+        def claim(tat):
+            now = time.time()
+            new_tat = max(tat or now, now) + self.interval * tokens
+            wait = self._wait(new_tat, now)
+            if max_wait is not None and wait > max_wait:
+                return None, None
+            return new_tat, wait
+        return self.store.update(self.key, claim)
+
+    def try_acquire(self, tokens=1):
+        """Take a slot only if one is free right now"""
+        return self._reserve(tokens, 0.0) is not None
+
+    def acquire(self, tokens=1, timeout=None):
+        """Block until a slot is ours; returns False (without taking one) if that is more than timeout away"""
+        wait = self._reserve(tokens, timeout)
+        if wait is None:
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, tokens=1, timeout=None):
+        """acquire() for coroutines: waits with asyncio.sleep instead of blocking the loop"""
+        wait = self._reserve(tokens, timeout)
+        if wait is None:
+            return False
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+    def check(self, tokens=1):
+        """Non-blocking acquire that raises RateLimitExceeded with the wait time when no slot is free"""
+        if not self.try_acquire(tokens):
+            raise RateLimitExceeded(self.key, self.retry_after(tokens))
+
+    def retry_after(self, tokens=1):
+        """Seconds until `tokens` slots would be free, without taking them"""
+        def peek(tat):
+            now = time.time()
+            new_tat = max(tat or now, now) + self.interval * tokens
+            return None, self._wait(new_tat, now)
+        return self.store.update(self.key, peek)
+
+    def limit(self, func):
+        """Decorator pacing every call to func through this limiter"""
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                await self.acquire_async()
+                return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            self.acquire()
+            return func(*args, **kwargs)
+        return wrapper
+
+
+def parse_limits(spec):
+    """'api.github.com=5000/3600,api.godaddy.com=60' -> {'api.github.com': (5000.0, 3600.0), ...}"""
+    limits = {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        host, _, quota = item.partition('=')
+        rate, _, period = quota.partition('/')
+        limits[host.strip()] = (float(rate), float(period or 60))
+    return limits
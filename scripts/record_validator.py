@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Zone-Level DNS Record Validator
+
+Validates whole desired record sets (many domains, thousands of records)
+in a single pass: record syntax, per-type data rules for A, AAAA, CNAME,
+MX, NS, TXT and SRV, CNAME-at-apex and CNAME-coexistence conflicts,
+duplicates, and TTL bounds. Every issue is collected and reported at once
+instead of stopping at the first bad value. Patterns are compiled once at
+import time.
+"""
+
+import ipaddress
+import re
+from collections import namedtuple
+
+VALID_TYPES = frozenset(['A', 'AAAA', 'CNAME', 'MX', 'NS', 'SOA', 'SRV', 'TXT'])
+HOSTNAME_TYPES = frozenset(['CNAME', 'MX', 'NS', 'SRV'])
+
+# GoDaddy's API accepts TTLs between 600 seconds and one week
+TTL_MIN = 600
+TTL_MAX = 604800
+
+DOMAIN_RE = re.compile(r'^(?=.{1,253}$)(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}$')
+HOSTNAME_RE = re.compile(r'^(?=.{1,253}\.?$)(?:[A-Za-z0-9_](?:[A-Za-z0-9_-]{0,61}[A-Za-z0-9])?\.)*'
+                         r'[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.?$')
+RECORD_NAME_RE = re.compile(r'^(?:@|\*|(?:\*\.)?[A-Za-z0-9_](?:[A-Za-z0-9_-]{0,61}[A-Za-z0-9_])?'
+                            r'(?:\.[A-Za-z0-9_](?:[A-Za-z0-9_-]{0,61}[A-Za-z0-9_])?)*)$')
+SRV_NAME_RE = re.compile(r'^_[A-Za-z0-9-]{1,62}\._(?:tcp|udp|tls|sctp)(?:\..+)?$', re.IGNORECASE)
+IPV4_RE = re.compile(r'^(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)$')
+TXT_FORBIDDEN_RE = re.compile(r'[\x00-\x08\x0a-\x1f\x7f]')
+TXT_MAX_STRING = 255
+
+ValidationIssue = namedtuple('ValidationIssue', 'domain index type name code message')
+
+
+class RecordValidationError(ValueError):
+    def __init__(self, issues):
+        self.issues = issues
+        lines = [format_issue(issue) for issue in issues[:20]]
+        if len(issues) > 20:
+            lines.append(f'... and {len(issues) - 20} more')
+        super().__init__(f'{len(issues)} invalid DNS record(s):\n' + '\n'.join(lines))
+
+
+def format_issue(issue):
+    where = f"{issue.domain} #{issue.index} {issue.type} {issue.name}" if issue.index is not None else issue.domain
+    return f"{where}: {issue.message} [{issue.code}]"
+
+
+def is_ipv4(value):
+    return IPV4_RE.match(value) is not None
+
+
+def is_ipv6(value):
+    if ':' not in value:
+        return False
+    try:
+        ipaddress.IPv6Address(value)
+    except ValueError:
+        return False
+    return True
+
+
+def is_hostname(value):
+    return HOSTNAME_RE.match(value) is not None
+
+
+def in_port_range(value):
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= 65535
+
+
+def check_data(record_type, name, record):
+    """Per-type data rules; returns (code, message) or None"""
+    data = record.get('data')
+    if not isinstance(data, str) or not data:
+        return 'missing_data', 'record has no data'
+    if record_type == 'A':
+        if not is_ipv4(data):
+            return 'invalid_ipv4', f'{data!r} is not an IPv4 address'
+    elif record_type == 'AAAA':
+        if not is_ipv6(data):
+            return 'invalid_ipv6', f'{data!r} is not an IPv6 address'
+    elif record_type in ('CNAME', 'NS'):
+        if not is_hostname(data) or is_ipv4(data):
+            return 'invalid_target', f'{data!r} is not a hostname'
+    elif record_type == 'MX':
+        if not is_hostname(data) or is_ipv4(data):
+            return 'invalid_target', f'{data!r} is not a mail server hostname'
+        if not in_port_range(record.get('priority')):
+            return 'invalid_priority', 'MX priority must be an integer 0-65535'
+    elif record_type == 'SRV':
+        if not SRV_NAME_RE.match(name):
+            return 'invalid_srv_name', f'SRV name {name!r} must look like _service._proto'
+        if data != '.' and not is_hostname(data):
+            return 'invalid_target', f'{data!r} is not a hostname'
+        for field in ('priority', 'weight', 'port'):
+            if not in_port_range(record.get(field)):
+                return f'invalid_{field}', f'SRV {field} must be an integer 0-65535'
+    elif record_type == 'TXT':
+        if TXT_FORBIDDEN_RE.search(data):
+            return 'invalid_txt', 'TXT data contains control characters'
+        strings = data[1:-1].split('" "') if data.startswith('"') and data.endswith('"') else [data]
+        if any(len(string) > TXT_MAX_STRING for string in strings):
+            return 'txt_too_long', f'TXT strings are limited to {TXT_MAX_STRING} characters; split longer values'
+    return None
+
+
+def validate_zone(domain, records, ttl_min=TTL_MIN, ttl_max=TTL_MAX):
+    """Every issue in one zone's desired records, in one pass plus a pass over distinct names"""
+    issues = []
+    if not isinstance(domain, str) or not DOMAIN_RE.match(domain):
+        issues.append(ValidationIssue(domain, None, None, None, 'invalid_domain', f'{domain!r} is not a domain name'))
+
+    seen = set()
+    types_by_name = {}
+    cname_index = {}
+    append = issues.append
+    for index, record in enumerate(records):
+        record_type = record.get('type')
+        name = record.get('name', '@')
+
+        if record_type not in VALID_TYPES:
+            append(ValidationIssue(domain, index, record_type, name, 'invalid_type',
+                                   f'unsupported record type {record_type!r}'))
+            continue
+        if not isinstance(name, str) or not RECORD_NAME_RE.match(name):
+            append(ValidationIssue(domain, index, record_type, name, 'invalid_name',
+                                   f'{name!r} is not a valid record name'))
+            continue
+
+        ttl = record.get('ttl', ttl_min)
+        if not isinstance(ttl, int) or isinstance(ttl, bool) or not ttl_min <= ttl <= ttl_max:
+            append(ValidationIssue(domain, index, record_type, name, 'invalid_ttl',
+                                   f'TTL {ttl!r} outside {ttl_min}-{ttl_max}'))
+
+        problem = check_data(record_type, name, record)
+        if problem:
+            append(ValidationIssue(domain, index, record_type, name, *problem))
+            continue
+
+        key_name = name.lower()
+        data = record['data']
+        key = (record_type, key_name, data.rstrip('.').lower() if record_type in HOSTNAME_TYPES else data)
+        if key in seen:
+            append(ValidationIssue(domain, index, record_type, name, 'duplicate',
+                                   f'duplicate {record_type} {name} -> {data}'))
+            continue
+        seen.add(key)
+
+        types_by_name.setdefault(key_name, set()).add(record_type)
+        if record_type == 'CNAME':
+            if key_name == '@':
+                append(ValidationIssue(domain, index, record_type, name, 'cname_at_apex',
+                                       'CNAME is not allowed at the zone apex'))
+            if key_name in cname_index:
+                append(ValidationIssue(domain, index, record_type, name, 'multiple_cname',
+                                       f'{name} already has a CNAME (record #{cname_index[key_name]})'))
+            else:
+                cname_index[key_name] = index
+
+    for name, index in cname_index.items():
+        others = types_by_name[name] - {'CNAME'}
+        if others:
+            issues.append(ValidationIssue(
+                domain, index, 'CNAME', name, 'cname_conflict',
+                f"CNAME cannot coexist with {', '.join(sorted(others))} records at {name}"
+            ))
+    return issues
+
+
+def validate_zones(zones, ttl_min=TTL_MIN, ttl_max=TTL_MAX):
+    """{domain: records} -> list of every ValidationIssue across all zones"""
+    issues = []
+    for domain, records in zones.items():
+        issues.extend(validate_zone(domain, records, ttl_min, ttl_max))
+    return issues
+
+
+def check_zones(zones, ttl_min=TTL_MIN, ttl_max=TTL_MAX):
+    """Raise RecordValidationError listing every issue, if there are any"""
+    issues = validate_zones(zones, ttl_min, ttl_max)
+    if issues:
+        raise RecordValidationError(issues)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Queue-Backed Structured Logging
+
+Request threads only put log records on a bounded in-memory queue. A single
+listener thread formats them as JSON lines, writes them to the log file
+(rotating by size and/or time, gzip-compressing rotated files) and echoes a
+plain-text line to stderr, so a slow disk never stalls a webhook response.
+When the queue is full records are dropped and counted rather than blocking
+the caller.
+
+Structured fields ride on the standard logging API:
+
+    logger.info("GitLab push accepted", extra={'fields': {'commit_id': sha}})
+
+LOG_MODE=sync keeps the old behaviour (handlers run on the calling thread)
+with the same JSON format and rotation.
+"""
+
+import os
+import sys
+import json
+import gzip
+import time
+import queue
+import shutil
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LOG_MODE = os.getenv('LOG_MODE', 'queue')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_ROTATE_SECONDS = int(os.getenv('LOG_ROTATE_SECONDS', 0))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+LOG_COMPRESS = os.getenv('LOG_COMPRESS', 'true').lower() == 'true'
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, msg plus any `fields` extra"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update((key, value) for key, value in fields.items() if value is not None)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+def gzip_rotator(source, dest):
+    """Compress the file being rotated out; runs on the listener thread"""
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class RotatingJSONFileHandler(logging.handlers.RotatingFileHandler):
+    """Size- and/or time-based rotation with optional gzip of rotated files.
+
+    Gunicorn workers share one log file, so the rollover is taken under an
+    flock on `<file>.lock` and a worker that finds the file already rotated
+    by a sibling just reopens it instead of rotating again.
+    """
+
+    def __init__(self, filename, max_bytes=LOG_MAX_BYTES, rotate_seconds=LOG_ROTATE_SECONDS,
+                 backup_count=LOG_BACKUP_COUNT, compress=LOG_COMPRESS):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        self.rotate_seconds = rotate_seconds
+        self.next_rollover = self._next_boundary()
+        if compress:
+            self.namer = lambda name: name + '.gz'
+            self.rotator = gzip_rotator
+
+    def _next_boundary(self):
+        if not self.rotate_seconds:
+            return None
+        return (int(time.time()) // self.rotate_seconds + 1) * self.rotate_seconds
+
+    def _rotated_elsewhere(self):
+        if self.stream is None:
+            return False
+        try:
+            return os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _reopen(self):
+        self.stream.close()
+        self.stream = self._open()
+
+    def shouldRollover(self, record):
+        if self._rotated_elsewhere():
+            self._reopen()
+        if self.next_rollover is not None and time.time() >= self.next_rollover:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        lock = open(self.baseFilename + '.lock', 'a') if fcntl is not None else None
+        try:
+            if lock is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if self._rotated_elsewhere():
+                self._reopen()
+            else:
+                super().doRollover()
+        finally:
+            if lock is not None:
+                lock.close()
+        if self.next_rollover is not None:
+            self.next_rollover = self._next_boundary()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue the record as-is; formatting happens on the listener thread"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_state = {}
+
+
+def configure_logging(log_file, mode=LOG_MODE, level=LOG_LEVEL):
+    """Install the root handlers once per process; later calls are no-ops"""
+    if _state:
+        return _state['handler']
+
+    file_handler = RotatingJSONFileHandler(log_file)
+    file_handler.setFormatter(JSONLinesFormatter())
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    handlers = [file_handler, stream_handler]
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    if mode == 'queue':
+        handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        listener = logging.handlers.QueueListener(handler.queue, *handlers, respect_handler_level=True)
+        listener.start()
+        # Drain whatever is still queued on shutdown
+        atexit.register(listener.stop)
+        _state['listener'] = listener
+        root.addHandler(handler)
+    else:
+        handler = None
+        for h in handlers:
+            root.addHandler(h)
+
+    _state.update(handler=handler, mode=mode, log_file=log_file)
+    return handler
+
+
+def logging_stats():
+    """Mode, queue depth and dropped records for /status"""
+    handler = _state.get('handler')
+    return {
+        'mode': _state.get('mode'),
+        'queued': handler.queue.qsize() if handler else 0,
+        'queue_size': LOG_QUEUE_SIZE if handler else 0,
+        'dropped': handler.dropped if handler else 0
+    }
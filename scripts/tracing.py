@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+End-to-End Deployment Tracing
+
+A trace id is minted when a delivery is ingested and travels with the
+deployment: as `trace_id`/`traceparent` (W3C format) in the GitHub
+repository_dispatch client_payload, and as TRACE_ID/TRACEPARENT in GitLab
+trigger variables, which GitLab echoes back on the pipeline webhook. Spans
+for ingest, signature check, dispatch wait, upstream calls, the pipeline
+result and each platform deploy are appended to TRACE_FILE as OTLP/JSON
+lines (one ExportTraceServiceRequest per line, the format the OpenTelemetry
+Collector's otlpjsonfile receiver reads). As with the log file, spans are
+serialized and written by a background listener, never on the request
+thread.
+
+Running this module reads the trace file back and prints a per-commit
+breakdown of where the time between push and live site went.
+
+Usage:
+    python scripts/tracing.py [--file deployment_traces.jsonl] [--commit SHA] [--json]
+"""
+
+import os
+import sys
+import glob
+import gzip
+import json
+import time
+import queue
+import logging
+import atexit
+import argparse
+import logging.handlers
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from structured_logging import RotatingJSONFileHandler, DroppingQueueHandler
+
+TRACE_FILE = os.getenv('TRACE_FILE', 'deployment_traces.jsonl')
+TRACE_SERVICE = os.getenv('TRACE_SERVICE', 'webhook-handler')
+TRACE_QUEUE_SIZE = int(os.getenv('TRACE_QUEUE_SIZE', 10000))
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+OTLP_STATUS = {STATUS_OK: 1, STATUS_ERROR: 2}
+
+
+def new_trace_id():
+    return os.urandom(16).hex()
+
+
+def new_span_id():
+    return os.urandom(8).hex()
+
+
+def format_traceparent(trace_id, span_id):
+    return f'00-{trace_id}-{span_id}-01'
+
+
+def parse_traceparent(value):
+    """'00-<trace>-<span>-<flags>' -> (trace_id, span_id), or (None, None) if malformed"""
+    parts = (value or '').strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None, None
+    return parts[1], parts[2]
+
+
+def timestamp_ns(value):
+    """ISO-8601 or GitLab's '2025-01-01 12:00:00 UTC' -> unix nanoseconds (naive means UTC)"""
+    if not value:
+        return None
+    text = str(value).strip().replace(' UTC', '+00:00').replace('Z', '+00:00')
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1e9)
+
+
+class Span:
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_ns', 'end_ns', 'attributes', 'status',
+                 'children')
+
+    def __init__(self, name, trace_id=None, parent_id=None, start_ns=None, **attributes):
+        self.name = name
+        self.trace_id = trace_id or new_trace_id()
+        self.span_id = new_span_id()
+        self.parent_id = parent_id
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.attributes = {key: value for key, value in attributes.items() if value is not None}
+        self.status = STATUS_OK
+        self.children = []
+
+    @property
+    def traceparent(self):
+        return format_traceparent(self.trace_id, self.span_id)
+
+    def set(self, **attributes):
+        self.attributes.update((key, value) for key, value in attributes.items() if value is not None)
+
+    def child(self, name, **attributes):
+        """Span under this one, exported together with it"""
+        span = Span(name, self.trace_id, self.span_id, **attributes)
+        self.children.append(span)
+        return span
+
+    def finish(self, status=None):
+        if status is not None:
+            self.status = status
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+        return self
+
+    def join(self, traceparent):
+        """Re-parent this span tree under a propagated context (e.g. from pipeline variables)"""
+        trace_id, parent_id = parse_traceparent(traceparent)
+        if trace_id is None:
+            return
+        self.parent_id = parent_id
+        for span in self.walk():
+            span.trace_id = trace_id
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or self.start_ns),
+            'attributes': [{'key': key, 'value': otlp_value(value)} for key, value in self.attributes.items()],
+            'status': {'code': OTLP_STATUS[self.status]}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+def otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def plain_value(value):
+    for kind in ('stringValue', 'boolValue', 'doubleValue'):
+        if kind in value:
+            return value[kind]
+    if 'intValue' in value:
+        return int(value['intValue'])
+    return None
+
+
+class OTLPFormatter(logging.Formatter):
+    """One ExportTraceServiceRequest per record, built from the spans it carries"""
+
+    def __init__(self, service):
+        super().__init__()
+        self.resource = {'attributes': [{'key': 'service.name', 'value': {'stringValue': service}}]}
+
+    def format(self, record):
+        return json.dumps({'resourceSpans': [{
+            'resource': self.resource,
+            'scopeSpans': [{
+                'scope': {'name': 'peacefulrobot.deploy'},
+                'spans': [span.to_otlp() for span in record.spans]
+            }]
+        }]}, separators=(',', ':'))
+
+
+class Tracer:
+    """Creates spans and exports finished span trees to an OTLP/JSON lines file.
+
+    With background=True (the webhook handler) export goes through a bounded
+    queue to a listener thread; CLI tools pass background=False and write
+    inline. An empty path disables tracing, but spans are still created so
+    callers need no special cases.
+    """
+
+    def __init__(self, path=TRACE_FILE, service=TRACE_SERVICE, background=True):
+        self.path = path
+        self.enabled = bool(path)
+        self._listener = None
+        if not self.enabled:
+            return
+        self._logger = logging.Logger(f'tracing.{service}')
+        file_handler = RotatingJSONFileHandler(path)
+        file_handler.setFormatter(OTLPFormatter(service))
+        if background:
+            handler = DroppingQueueHandler(queue.Queue(TRACE_QUEUE_SIZE))
+            self._listener = logging.handlers.QueueListener(handler.queue, file_handler)
+            self._listener.start()
+            self._logger.addHandler(handler)
+            atexit.register(self.close)
+        else:
+            self._logger.addHandler(file_handler)
+
+    def start(self, name, traceparent=None, **attributes):
+        """New span, continuing `traceparent` if one was propagated, else starting a trace"""
+        trace_id, parent_id = parse_traceparent(traceparent)
+        return Span(name, trace_id, parent_id, **attributes)
+
+    def record(self, name, traceparent, start_ns, end_ns=None, status=STATUS_OK, **attributes):
+        """Export a span whose timing was measured elsewhere"""
+        span = self.start(name, traceparent, **attributes)
+        span.start_ns = start_ns or span.start_ns
+        span.end_ns = end_ns or time.time_ns()
+        span.status = status or STATUS_OK
+        self.export(span)
+        return span
+
+    def export(self, root):
+        """Finish and write `root` and every span under it"""
+        spans = list(root.walk())
+        for span in spans:
+            span.finish()
+        if self.enabled:
+            self._logger.handle(self._logger.makeRecord(self._logger.name, logging.INFO, __file__, 0, root.name,
+                                                        None, None, extra={'spans': spans}))
+        return root
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+def read_spans(paths):
+    """Flatten OTLP/JSON lines files (plain or rotated .gz) into plain span dicts"""
+    spans = []
+    for path in paths:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    continue
+                for resource_spans in request.get('resourceSpans', []):
+                    for scope_spans in resource_spans.get('scopeSpans', []):
+                        for span in scope_spans.get('spans', []):
+                            spans.append({
+                                'trace_id': span['traceId'],
+                                'span_id': span['spanId'],
+                                'parent_id': span.get('parentSpanId'),
+                                'name': span['name'],
+                                'start_ns': int(span['startTimeUnixNano']),
+                                'end_ns': int(span['endTimeUnixNano']),
+                                'status': 'error' if span.get('status', {}).get('code') == 2 else 'ok',
+                                'attributes': {item['key']: plain_value(item['value'])
+                                               for item in span.get('attributes', [])}
+                            })
+    return spans
+
+
+def commit_breakdown(spans):
+    """Per commit: end-to-end seconds, each stage's offset and duration, and the slowest stage"""
+    traces = {}
+    for span in spans:
+        traces.setdefault(span['trace_id'], []).append(span)
+
+    commits = {}
+    for trace_spans in traces.values():
+        commit = next((span['attributes']['commit'] for span in trace_spans
+                       if span['attributes'].get('commit')), None)
+        if commit:
+            commits.setdefault(commit, []).extend(trace_spans)
+
+    report = []
+    for commit, commit_spans in commits.items():
+        commit_spans.sort(key=lambda span: span['start_ns'])
+        started = commit_spans[0]['start_ns']
+        ended = max(span['end_ns'] for span in commit_spans)
+        # Spans that wrap other spans (ingest, deploy.platforms) are not stages of their own
+        parents = {span['parent_id'] for span in commit_spans}
+        stages = [{
+            'stage': span['name'] + (f"[{span['attributes']['platform']}]" if 'platform' in span['attributes'] else ''),
+            'offset_s': round((span['start_ns'] - started) / 1e9, 3),
+            'seconds': round((span['end_ns'] - span['start_ns']) / 1e9, 3),
+            'status': span['status']
+        } for span in commit_spans]
+        leaves = [stage for stage, span in zip(stages, commit_spans) if span['span_id'] not in parents] or stages
+        report.append({
+            'commit': commit,
+            'started_at': datetime.fromtimestamp(started / 1e9, timezone.utc).isoformat(timespec='seconds'),
+            'end_to_end_s': round((ended - started) / 1e9, 3),
+            'slowest_stage': max(leaves, key=lambda stage: stage['seconds'])['stage'],
+            'stages': stages
+        })
+    report.sort(key=lambda entry: entry['started_at'], reverse=True)
+    return report
+
+
+def print_breakdown(report):
+    for entry in report:
+        print(f"{entry['commit'][:12]}  {entry['started_at']}  end-to-end {entry['end_to_end_s']}s  "
+              f"(slowest: {entry['slowest_stage']})")
+        for stage in entry['stages']:
+            marker = '' if stage['status'] == STATUS_OK else '  ERROR'
+            print(f"    +{stage['offset_s']:>9.3f}s  {stage['seconds']:>9.3f}s  {stage['stage']}{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-commit deployment latency breakdown from the trace file')
+    parser.add_argument('--file', default=TRACE_FILE, help='trace file; rotated .N.gz siblings are read too')
+    parser.add_argument('--commit', help='only commits starting with this sha')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='print the breakdown as JSON')
+    args = parser.parse_args()
+
+    paths = [path for path in [args.file] + sorted(glob.glob(f'{args.file}.*.gz')) if os.path.exists(path)]
+    report = commit_breakdown(read_spans(paths))
+    if args.commit:
+        report = [entry for entry in report if entry['commit'].startswith(args.commit)]
+    report = report[:args.limit]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    elif not report:
+        print(f"No traced deployments in {args.file}")
+    else:
+        print_breakdown(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Client for Upstream APIs
+
+Keeps one pooled keep-alive session per upstream host (GitHub, GitLab,
+GoDaddy) with connect/read timeouts, and retries 5xx/429 responses and
+connection errors with exponential backoff plus jitter. Retry-After and
+GitHub rate-limit headers take precedence over the computed backoff.
+Non-idempotent calls (POST, PATCH: a GitHub repository_dispatch or a GitLab
+pipeline trigger) are only retried when the upstream cannot have acted on
+them: the connection was never made, or it answered 429 (or 503 with
+Retry-After). A timeout or 5xx after the body went out could otherwise
+start a second workflow run or pipeline.
+Hosts listed in UPSTREAM_RATE_LIMITS are paced by a shared GCRA limiter
+before every attempt, and synchronous callers with a quota of their own (an
+API key) can pass a before_attempt hook that takes a slot from it too. Each host also has a circuit breaker, so calls to an
+upstream that keeps failing raise CircuitOpenError straight away instead
+of tying up a worker through every retry.
+"""
+
+import os
+import time
+import asyncio
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from rate_limiter import GCRALimiter, parse_limits, shared_store
+from circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+UPSTREAM_READ_TIMEOUT = float(os.getenv('UPSTREAM_READ_TIMEOUT', 10))
+UPSTREAM_MAX_RETRIES = int(os.getenv('UPSTREAM_MAX_RETRIES', 3))
+UPSTREAM_BACKOFF_BASE = float(os.getenv('UPSTREAM_BACKOFF_BASE', 0.5))
+UPSTREAM_BACKOFF_MAX = float(os.getenv('UPSTREAM_BACKOFF_MAX', 30))
+UPSTREAM_POOL_SIZE = int(os.getenv('UPSTREAM_POOL_SIZE', 10))
+UPSTREAM_ASYNC_MAX_CONNECTIONS = int(os.getenv('UPSTREAM_ASYNC_MAX_CONNECTIONS', 200))
+UPSTREAM_RATE_LIMITS = os.getenv('UPSTREAM_RATE_LIMITS', '')
+UPSTREAM_BREAKER_FAILURES = int(os.getenv('UPSTREAM_BREAKER_FAILURES', 5))
+UPSTREAM_BREAKER_RESET = float(os.getenv('UPSTREAM_BREAKER_RESET', 30))
+
+RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+
+class UpstreamClient:
+    def __init__(self, connect_timeout=UPSTREAM_CONNECT_TIMEOUT, read_timeout=UPSTREAM_READ_TIMEOUT,
+                 max_retries=UPSTREAM_MAX_RETRIES, backoff_base=UPSTREAM_BACKOFF_BASE,
+                 backoff_max=UPSTREAM_BACKOFF_MAX, pool_size=UPSTREAM_POOL_SIZE,
+                 rate_limits=UPSTREAM_RATE_LIMITS, breaker_failures=UPSTREAM_BREAKER_FAILURES,
+                 breaker_reset=UPSTREAM_BREAKER_RESET):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        # observer(method, url, status, seconds) is called after every attempt
+        self.observers = []
+        # netloc -> CircuitBreaker; breaker_failures=0 disables them (e.g. health probes)
+        self.breaker_failures = breaker_failures
+        self.breaker_reset = breaker_reset
+        self.breakers = {}
+        # listener(netloc, old_state, new_state) for every breaker, including ones created later
+        self.breaker_listeners = []
+        self._sessions = {}
+        self._lock = threading.Lock()
+        # netloc -> GCRALimiter; keyed per host so every process sharing the store shares the quota
+        self.limiters = {
+            host: GCRALimiter(rate, period, key=f'host:{host}', store=shared_store())
+            for host, (rate, period) in parse_limits(rate_limits).items()
+        }
+
+    def session_for(self, url):
+        """Return the pooled session for the URL's scheme and host"""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=self.pool_size,
+                        max_retries=0
+                    )
+                    session.mount(f'{parts.scheme}://', adapter)
+                    self._sessions[key] = session
+        return session
+
+    def limiter_for(self, url):
+        return self.limiters.get(urlsplit(url).netloc) if self.limiters else None
+
+    def breaker_for(self, url):
+        """The circuit breaker for the URL's host, or None when breakers are disabled"""
+        if self.breaker_failures <= 0:
+            return None
+        netloc = urlsplit(url).netloc
+        breaker = self.breakers.get(netloc)
+        if breaker is None:
+            with self._lock:
+                breaker = self.breakers.get(netloc)
+                if breaker is None:
+                    breaker = CircuitBreaker(netloc, self.breaker_failures, self.breaker_reset)
+                    breaker.listeners.append(self._breaker_changed)
+                    self.breakers[netloc] = breaker
+        return breaker
+
+    def breaker_stats(self):
+        return {netloc: breaker.stats() for netloc, breaker in list(self.breakers.items())}
+
+    def _breaker_changed(self, netloc, previous, state):
+        for listener in self.breaker_listeners:
+            listener(netloc, previous, state)
+
+    @classmethod
+    def record_outcome(cls, breaker, response=None):
+        """Count a response (or, with None, a transport error) against the host's breaker"""
+        if breaker is None:
+            return
+        if response is None or response.status_code in RETRY_STATUS_CODES or cls.is_rate_limited(response):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    @staticmethod
+    def is_idempotent(method, idempotent=None):
+        return method.upper() in IDEMPOTENT_METHODS if idempotent is None else idempotent
+
+    def should_retry(self, response, idempotent):
+        """Whether a retryable-looking response may be retried for this call"""
+        if response.status_code not in RETRY_STATUS_CODES and not self.is_rate_limited(response):
+            return False
+        if idempotent:
+            return True
+        # The upstream refused the request rather than failing part-way through it
+        return (response.status_code == 429 or self.is_rate_limited(response)
+                or (response.status_code == 503 and self.server_delay(response) is not None))
+
+    @staticmethod
+    def never_sent(error):
+        """True when a requests error happened before the request reached the upstream"""
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        if not isinstance(error, requests.ConnectionError) or isinstance(error, requests.Timeout):
+            return False
+        reason = error.args[0] if error.args else None
+        if isinstance(reason, MaxRetryError):
+            reason = reason.reason
+        return isinstance(reason, NewConnectionError)
+
+    def request(self, method, url, before_attempt=None, idempotent=None, **kwargs):
+        """Send a request, retrying retryable failures with backoff; before_attempt() runs ahead of every try.
+
+        idempotent defaults from the method (see IDEMPOTENT_METHODS); pass it to override per call.
+        """
+        idempotent = self.is_idempotent(method, idempotent)
+        kwargs.setdefault('timeout', self.timeout)
+        session = self.session_for(url)
+        limiter = self.limiter_for(url)
+        breaker = self.breaker_for(url)
+        attempt = 0
+        while True:
+            if breaker is not None:
+                # Also stops the retry loop as soon as the breaker trips
+                breaker.check()
+            if limiter is not None:
+                limiter.acquire()
+            if before_attempt is not None:
+                before_attempt()
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._notify(method, url, 'error', time.perf_counter() - started)
+                self.record_outcome(breaker)
+                if attempt >= self.max_retries or not (idempotent or self.never_sent(e)):
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.warning(f"{method} {url} failed ({str(e)}), retrying in {delay:.2f}s")
+            else:
+                self._notify(method, url, response.status_code, time.perf_counter() - started)
+                self.record_outcome(breaker, response)
+                if attempt >= self.max_retries or not self.should_retry(response, idempotent):
+                    return response
+                delay = self.retry_delay(response, attempt)
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.2f}s")
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def _notify(self, method, url, status, seconds):
+        for observer in self.observers:
+            try:
+                observer(method, url, status, seconds)
+            except Exception as e:
+                logger.error(f"Upstream observer failed: {str(e)}")
+
+    def backoff_delay(self, attempt):
+        """Full-jitter exponential backoff for the given attempt number"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def retry_delay(self, response, attempt):
+        """Delay before retrying a response, preferring server-provided hints"""
+        hinted = self.server_delay(response)
+        if hinted is not None:
+            return min(self.backoff_max, hinted)
+        return self.backoff_delay(attempt)
+
+    @staticmethod
+    def is_rate_limited(response):
+        """GitHub signals secondary rate limits with 403 and zero remaining"""
+        return (
+            response.status_code == 403
+            and response.headers.get('X-RateLimit-Remaining') == '0'
+        )
+
+    @staticmethod
+    def server_delay(response):
+        """Seconds to wait according to Retry-After or X-RateLimit-Reset, if present"""
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        if response.headers.get('X-RateLimit-Remaining') == '0':
+            reset = response.headers.get('X-RateLimit-Reset')
+            if reset and reset.isdigit():
+                return max(0.0, int(reset) - time.time())
+        return None
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+class AsyncUpstreamClient(UpstreamClient):
+    """Non-blocking variant of UpstreamClient built on httpx.AsyncClient"""
+
+    def __init__(self, max_connections=UPSTREAM_ASYNC_MAX_CONNECTIONS, **kwargs):
+        super().__init__(**kwargs)
+        self.max_connections = max_connections
+        self._client = None
+
+    def async_client(self):
+        """Shared httpx client; httpx keeps a keep-alive pool per origin"""
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    async def request(self, method, url, idempotent=None, **kwargs):
+        """Send a request, retrying retryable failures with backoff (non-idempotent ones only if never sent)"""
+        import httpx
+        idempotent = self.is_idempotent(method, idempotent)
+        client = self.async_client()
+        limiter = self.limiter_for(url)
+        breaker = self.breaker_for(url)
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.check()
+            if limiter is not None:
+                await limiter.acquire_async()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                self._notify(method, url, 'error', time.perf_counter() - started)
+                self.record_outcome(breaker)
+                # ConnectError/ConnectTimeout are raised before anything was written to the upstream
+                sent = not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if attempt >= self.max_retries or (sent and not idempotent):
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.warning(f"{method} {url} failed ({str(e)}), retrying in {delay:.2f}s")
+            else:
+                self._notify(method, url, response.status_code, time.perf_counter() - started)
+                self.record_outcome(breaker, response)
+                if attempt >= self.max_retries or not self.should_retry(response, idempotent):
+                    return response
+                delay = self.retry_delay(response, attempt)
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.2f}s")
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide shared UpstreamClient"""
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = UpstreamClient()
+    return _default_client
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Asyncio (ASGI) Serving Mode for the Webhook Handler
+
+Serves the same routes as webhook_handler.py (/health, /webhook/gitlab,
+/trigger/deployment, /jobs/<job_id>, /status, /metrics,
+/deployments/history) from a single event
+loop. Upstream calls go through httpx, so one process can hold hundreds of
+in-flight dispatches instead of one per worker thread. Anything that can
+block (the SQLite stores behind idempotency, dead letters and deployment
+history, log-file reads) runs in a worker thread via asyncio.to_thread, so
+the loop only ever waits on sockets.
+
+Run with:
+    uvicorn webhook_asgi:app --app-dir scripts --host 0.0.0.0 --port 5000
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dispatch_queue import AsyncDispatchQueue
+from upstream_client import AsyncUpstreamClient
+from tracing import STATUS_ERROR
+from webhook_payload import check_size, PayloadTooLarge, WEBHOOK_MAX_BODY_BYTES
+from webhook_handler import (
+    WebhookHandler,
+    DISPATCH_QUEUE_SIZE,
+    metrics,
+    observe_upstream,
+    collect_handler_metrics,
+    process_gitlab_webhook,
+    process_deployment_trigger,
+    job_response,
+    status_response,
+    deployment_history_response
+)
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DISPATCH_CONCURRENCY = int(os.getenv('ASYNC_DISPATCH_CONCURRENCY', 100))
+
+
+class AsyncWebhookHandler(WebhookHandler):
+    def __init__(self):
+        super().__init__(
+            dispatch_queue=AsyncDispatchQueue(
+                concurrency=ASYNC_DISPATCH_CONCURRENCY,
+                max_queue_size=DISPATCH_QUEUE_SIZE
+            ),
+            http_client=AsyncUpstreamClient()
+        )
+
+    async def trigger_github_deployment(self, payload):
+        """Trigger GitHub Actions workflow"""
+        try:
+            url, headers, data = self.github_dispatch_request(payload['event_type'], payload)
+            started = time.perf_counter()
+            response = await self.http.post(url, headers=headers, json=data)
+            # Settling writes the dead-letter store
+            return await asyncio.to_thread(self.github_deployment_result, payload, response,
+                                           (time.perf_counter() - started) * 1000)
+
+        except Exception as e:
+            logger.error(f"Error triggering GitHub deployment: {str(e)}")
+            self.webhook_events.record('github_dispatch', 'exception', payload.get('commit_id'))
+            self.trace_upstream('github.dispatch', payload, None, STATUS_ERROR, error=str(e))
+            await asyncio.to_thread(self.settle_dispatch, 'trigger_github_deployment', payload, error=e)
+            return False
+
+    async def notify_github_completion(self, payload):
+        """Notify GitHub about deployment completion"""
+        try:
+            url, headers, data = self.github_dispatch_request('deployment_completed', payload)
+            started = time.perf_counter()
+            response = await self.http.post(url, headers=headers, json=data)
+            return await asyncio.to_thread(self.github_completion_result, payload, response,
+                                           (time.perf_counter() - started) * 1000)
+
+        except Exception as e:
+            logger.error(f"Error notifying GitHub: {str(e)}")
+            self.webhook_events.record('github_completion', 'exception')
+            self.trace_upstream('github.notify_completion', payload, None, STATUS_ERROR, error=str(e))
+            await asyncio.to_thread(self.settle_dispatch, 'notify_github_completion', payload, error=e)
+            return {'status': 'error', 'message': 'Error notifying GitHub'}
+
+    async def deploy_platforms(self, payload):
+        """Platform deploys are subprocess-bound; run them off the event loop"""
+        return await asyncio.to_thread(WebhookHandler.deploy_platforms, self, payload)
+
+    async def trigger_gitlab_deployment(self, payload):
+        """Trigger GitLab CI pipeline from GitHub Actions"""
+        try:
+            url, headers, data = self.gitlab_trigger_request(payload)
+            started = time.perf_counter()
+            response = await self.http.post(url, headers=headers, json=data)
+            return await asyncio.to_thread(self.gitlab_deployment_result, payload, response,
+                                           (time.perf_counter() - started) * 1000)
+
+        except Exception as e:
+            logger.error(f"Error triggering GitLab deployment: {str(e)}")
+            self.webhook_events.record('gitlab_trigger', 'exception', payload.get('commit_id'))
+            self.trace_upstream('gitlab.trigger', payload, None, STATUS_ERROR, error=str(e))
+            await asyncio.to_thread(self.settle_dispatch, 'trigger_gitlab_deployment', payload, error=e)
+            return False
+
+
+class Headers(dict):
+    """Case-insensitive view of ASGI request headers"""
+
+    def __init__(self, raw_headers):
+        super().__init__(
+            (name.decode('latin-1').lower(), value.decode('latin-1'))
+            for name, value in raw_headers
+        )
+
+    def get(self, name, default=None):
+        return super().get(name.lower(), default)
+
+
+async_handler = AsyncWebhookHandler()
+
+
+async def read_body(receive, limit=WEBHOOK_MAX_BODY_BYTES):
+    """Whole request body; raises PayloadTooLarge as soon as it passes the limit"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > limit:
+            raise PayloadTooLarge(size, limit)
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def send_response(send, status_code, body, content_type='application/json'):
+    if content_type == 'application/json':
+        body = json.dumps(body).encode()
+    elif isinstance(body, str):
+        body = body.encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status_code,
+        'headers': [
+            (b'content-type', content_type.encode()),
+            (b'content-length', str(len(body)).encode())
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            async_handler.dispatch_queue.start()
+            async_handler.http.observers.append(observe_upstream)
+            metrics.register_collector(lambda: collect_handler_metrics(async_handler), name='handler')
+            # Dispatches dead-lettered before a restart go out once their upstream answers
+            await asyncio.to_thread(async_handler.replay_dead_letters)
+            logger.info("Async webhook handler started")
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            async_handler.coalescer.flush_all()
+            await async_handler.dispatch_queue.join()
+            await async_handler.dispatch_queue.stop()
+            await async_handler.http.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def route_request(scope, receive):
+    """Dispatch to the shared route logic; returns (route, status_code, body, content_type)"""
+    method = scope['method']
+    path = scope['path']
+
+    if path == '/health' and method == 'GET':
+        return path, 200, {
+            'status': 'healthy',
+            'timestamp': datetime.utcnow().isoformat(),
+            'service': 'webhook-handler'
+        }, 'application/json'
+
+    if path == '/webhook/gitlab' and method == 'POST':
+        headers = Headers(scope['headers'])
+        try:
+            check_size(headers.get('Content-Length'))
+            body = await read_body(receive)
+        except PayloadTooLarge as e:
+            return path, 413, {'error': str(e)}, 'application/json'
+        # Idempotency lookups and stores may hit SQLite
+        result, status_code = await asyncio.to_thread(process_gitlab_webhook, async_handler, headers, body)
+        return path, status_code, result, 'application/json'
+
+    if path == '/trigger/deployment' and method == 'POST':
+        try:
+            body = await read_body(receive)
+        except PayloadTooLarge as e:
+            return path, 413, {'error': str(e)}, 'application/json'
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+        result, status_code = process_deployment_trigger(async_handler, data)
+        return path, status_code, result, 'application/json'
+
+    if path.startswith('/jobs/') and method == 'GET':
+        result, status_code = job_response(async_handler, path[len('/jobs/'):])
+        return '/jobs/<job_id>', status_code, result, 'application/json'
+
+    if path == '/status' and method == 'GET':
+        params = parse_qs(scope.get('query_string', b'').decode())
+        try:
+            limit = int(params.get('limit', ['10'])[0])
+        except ValueError:
+            limit = 10
+        kind = params.get('kind', [None])[0]
+        # Reads the dead-letter store, and the log file on a cold start
+        return path, 200, await asyncio.to_thread(status_response, async_handler, limit, kind), 'application/json'
+
+    if path == '/deployments/history' and method == 'GET':
+        params = parse_qs(scope.get('query_string', b'').decode())
+        try:
+            limit = int(params.get('limit', ['20'])[0])
+        except ValueError:
+            limit = 20
+        result, status_code = await asyncio.to_thread(deployment_history_response, async_handler, limit,
+                                                      params.get('platform', [None])[0])
+        return path, status_code, result, 'application/json'
+
+    if path == '/metrics' and method == 'GET':
+        return path, 200, metrics.render(), 'text/plain; version=0.0.4'
+
+    if path in ('/health', '/webhook/gitlab', '/trigger/deployment', '/status', '/metrics', '/deployments/history'):
+        return path, 405, {'error': 'Method not allowed'}, 'application/json'
+    return 'unmatched', 404, {'error': 'Not found'}, 'application/json'
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    started = time.perf_counter()
+    try:
+        route, status_code, body, content_type = await route_request(scope, receive)
+    except Exception as e:
+        logger.error(f"Error handling {scope['method']} {scope['path']}: {str(e)}")
+        route, status_code, body, content_type = scope['path'], 500, {'error': 'Internal server error'}, 'application/json'
+
+    await send_response(send, status_code, body, content_type)
+    metrics.observe('webhook_http_request_duration_seconds', time.perf_counter() - started, {'route': route})
+    metrics.inc('webhook_http_requests_total', {
+        'route': route,
+        'method': scope['method'],
+        'status': str(status_code)
+    })
@@ -7,26 +7,44 @@ automated deployment workflows in the infrastructure repository.
 """
 
 import os
-import json
+import sys
 import logging
 import hmac
 import hashlib
+import time
+import sqlite3
+import threading
+from collections import deque
 from datetime import datetime
-from flask import Flask, request, jsonify
-import requests
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('webhook.log'),
-        logging.StreamHandler()
-    ]
-)
+from urllib.parse import urlsplit
+from flask import Flask, request, jsonify, g, Response
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dispatch_queue import DispatchQueue, QueueFullError
+from upstream_client import get_client, UpstreamClient, RETRY_STATUS_CODES
+from circuit_breaker import CLOSED, OPEN
+from dead_letter import DeadLetterStore, dead_letter_key, DEAD_LETTER_DB
+from push_coalescer import PushCoalescer, parse_windows
+from idempotency_cache import IdempotencyCache, delivery_key
+from event_buffer import EventRingBuffer, tail_log_lines
+from metrics import MetricsRegistry
+from deployment_history import DeploymentHistory, DEPLOY_HISTORY_DB
+from structured_logging import configure_logging, logging_stats
+from tracing import Tracer, STATUS_ERROR, timestamp_ns
+from webhook_payload import (parse_gitlab_event, pipeline_variables, check_size, PayloadTooLarge,
+                             WEBHOOK_MAX_BODY_BYTES)
+import deploy_orchestrator
+
+LOG_FILE = os.getenv('LOG_FILE', 'webhook.log')
+
+# Request threads only enqueue records; a listener thread writes JSON lines
+configure_logging(LOG_FILE)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# Werkzeug refuses bodies over the limit (including chunked ones) before buffering them
+app.config['MAX_CONTENT_LENGTH'] = WEBHOOK_MAX_BODY_BYTES
 
 # Configuration
 GITLAB_WEBHOOK_SECRET = os.getenv('GITLAB_WEBHOOK_SECRET', '')
@@ -35,16 +53,83 @@ INFRA_REPO_OWNER = os.getenv('INFRA_REPO_OWNER', 'peacefulrobot')
 INFRA_REPO_NAME = os.getenv('INFRA_REPO_NAME', 'peacefulrobot-infra')
 GITLAB_TOKEN = os.getenv('GITLAB_TOKEN', '')
 GITLAB_PROJECT_ID = os.getenv('GITLAB_PROJECT_ID', '')
+GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+GITLAB_API_URL = os.getenv('GITLAB_API_URL', 'https://gitlab.com/api/v4').rstrip('/')
+DISPATCH_WORKERS = int(os.getenv('DISPATCH_WORKERS', 4))
+DISPATCH_QUEUE_SIZE = int(os.getenv('DISPATCH_QUEUE_SIZE', 1000))
+COALESCE_WINDOWS = parse_windows(os.getenv('COALESCE_WINDOWS', 'content_updated=30'))
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', 86400))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', 10000))
+IDEMPOTENCY_DB = os.getenv('IDEMPOTENCY_DB', '')
+EVENT_BUFFER_SIZE = int(os.getenv('EVENT_BUFFER_SIZE', 500))
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+DEPLOY_CONTENT_DIR = os.getenv('DEPLOY_CONTENT_DIR', '')
+DEAD_LETTER_REPLAY_BATCH = int(os.getenv('DEAD_LETTER_REPLAY_BATCH', 50))
+
+UPSTREAM_NAMES = {
+    urlsplit(GITHUB_API_URL).netloc: 'github',
+    urlsplit(GITLAB_API_URL).netloc: 'gitlab',
+    'api.godaddy.com': 'godaddy'
+}
+
+# Upstream each dispatch job calls; dead letters are replayed per upstream when its breaker closes
+JOB_UPSTREAMS = {
+    'trigger_github_deployment': 'github',
+    'notify_github_completion': 'github',
+    'trigger_gitlab_deployment': 'gitlab'
+}
+
+# Metrics
+metrics = MetricsRegistry(multiproc_dir=METRICS_DIR or None)
+metrics.counter('webhook_http_requests_total', 'HTTP requests by route, method and status')
+metrics.histogram('webhook_http_request_duration_seconds', 'HTTP request latency by route')
+metrics.counter('webhook_upstream_responses_total', 'Upstream API responses by upstream, endpoint and status')
+metrics.histogram('webhook_upstream_request_duration_seconds', 'Upstream API call latency by upstream and endpoint')
+metrics.histogram('webhook_signature_verify_seconds', 'GitLab webhook signature verification time')
+metrics.gauge('webhook_dispatch_queue_depth', 'Dispatch jobs waiting for a worker')
+metrics.counter('webhook_coalesced_dispatches_saved_total', 'Dispatches avoided by push coalescing')
+metrics.counter('webhook_duplicate_deliveries_total', 'Webhook re-deliveries answered from the idempotency cache')
+metrics.gauge('webhook_dead_letters_pending', 'Failed dispatches waiting in the dead-letter store')
+metrics.gauge('webhook_upstream_circuit_open', 'Whether the circuit breaker for an upstream is open (1) or not (0)')
+
+# Spans for ingest -> dispatch -> pipeline -> platform deploy, exported off the request thread
+tracer = Tracer()
 
 class WebhookHandler:
-    def __init__(self):
-        self.webhook_events = []
+    def __init__(self, dispatch_queue=None, http_client=None):
+        self.webhook_events = EventRingBuffer(capacity=EVENT_BUFFER_SIZE)
+        self.http = http_client or get_client()
+        self.dispatch_queue = dispatch_queue or DispatchQueue(
+            workers=DISPATCH_WORKERS,
+            max_queue_size=DISPATCH_QUEUE_SIZE
+        )
+        self.coalescer = PushCoalescer(self.queue_github_deployment, windows=COALESCE_WINDOWS)
+        self.idempotency = IdempotencyCache(
+            max_entries=IDEMPOTENCY_MAX_ENTRIES,
+            ttl=IDEMPOTENCY_TTL,
+            db_path=IDEMPOTENCY_DB or None
+        )
+        # Read side of the history deploy_orchestrator appends to; '' disables the endpoint
+        self.deployment_history = DeploymentHistory(DEPLOY_HISTORY_DB) if DEPLOY_HISTORY_DB else None
+        self.tracer = tracer
+        # Retryable dispatch failures wait here until their upstream recovers; '' disables
+        self.dead_letters = DeadLetterStore(DEAD_LETTER_DB) if DEAD_LETTER_DB else None
+        # Per upstream: claimed entries still to replay, and the (key, started) of the one in flight
+        self._replay_backlog = {}
+        self._replay_current = {}
+        # Per upstream: the timer that retries its dead letters when no new traffic would
+        self._replay_timers = {}
+        self._replay_lock = threading.Lock()
+        self.http.breaker_listeners.append(self.upstream_state_changed)
+        # Direct platform deploys share one content dir, so run one at a time
+        self._deploy_lock = threading.Lock()
+        if not GITLAB_WEBHOOK_SECRET:
+            logger.warning("No webhook secret configured; GitLab signatures are not verified")
         
     def verify_gitlab_signature(self, payload, signature):
         """Verify GitLab webhook signature"""
         if not GITLAB_WEBHOOK_SECRET:
-            logger.warning("No webhook secret configured")
-            return True  # Allow in development
+            return True  # Allow in development (warned once at startup)
             
         expected_signature = hmac.new(
             GITLAB_WEBHOOK_SECRET.encode(),
@@ -54,30 +139,40 @@ class WebhookHandler:
         
         return hmac.compare_digest(f'sha256={expected_signature}', signature)
     
-    def handle_gitlab_webhook(self, data):
-        """Handle GitLab webhook events"""
+    def handle_gitlab_webhook(self, data, span=None):
+        """Handle GitLab webhook events; `span` is the delivery's ingest span"""
         event_type = data.get('object_kind', '')
-        logger.info(f"Received GitLab webhook: {event_type}")
         
         if event_type == 'push':
-            return self.handle_gitlab_push(data)
+            result = self.handle_gitlab_push(data, span)
         elif event_type == 'pipeline':
-            return self.handle_gitlab_pipeline(data)
+            result = self.handle_gitlab_pipeline(data, span)
         else:
-            logger.info(f"Unhandled GitLab event type: {event_type}")
-            return {'status': 'ignored', 'message': f'Event type {event_type} not handled'}
+            result = {'status': 'ignored', 'message': f'Event type {event_type} not handled'}
+        
+        # One structured line per event instead of one per handling step
+        logger.info(f"GitLab {event_type or 'unknown'} {result.get('status')}", extra={'fields': {
+            'event': event_type,
+            'status': result.get('status'),
+            'ref': result.get('ref'),
+            'commit_id': result.get('commit_id'),
+            'batch_id': result.get('batch_id'),
+            'job_id': result.get('job_id'),
+            'trace_id': span.trace_id if span is not None else None
+        }})
+        if span is not None:
+            span.set(event=event_type, outcome=result.get('status'), commit=result.get('commit_id'))
+        self.webhook_events.record(f'gitlab_{event_type or "unknown"}', result.get('status'), result.get('commit_id'))
+        return result
     
-    def handle_gitlab_push(self, data):
+    def handle_gitlab_push(self, data, span=None):
         """Handle GitLab push events (content updates)"""
         ref = data.get('ref', '')
         commits = data.get('commits', [])
         
-        logger.info(f"Push to {ref} with {len(commits)} commits")
-        
         # Only trigger on main branch
         if ref != 'refs/heads/main':
-            logger.info(f"Ignoring push to branch {ref}")
-            return {'status': 'ignored', 'message': f'Not main branch: {ref}'}
+            return {'status': 'ignored', 'message': f'Not main branch: {ref}', 'ref': ref}
         
         # Get latest commit info
         if commits:
@@ -90,8 +185,7 @@ class WebhookHandler:
             commit_message = 'No commit message'
             author = 'Unknown'
         
-        # Trigger GitHub Actions workflow
-        success = self.trigger_github_deployment({
+        payload = {
             'event_type': 'content_updated',
             'source': 'gitlab_push',
             'commit_id': commit_id,
@@ -99,238 +193,687 @@ class WebhookHandler:
             'author': author,
             'branch': ref,
             'timestamp': datetime.utcnow().isoformat()
-        })
+        }
+        if span is not None:
+            # Travels in client_payload so the workflow can continue the trace
+            payload.update(trace_id=span.trace_id, traceparent=span.traceparent)
         
-        if success:
-            logger.info(f"Successfully triggered deployment for commit {commit_id}")
-            return {
-                'status': 'triggered',
-                'message': 'Deployment triggered successfully',
-                'commit_id': commit_id
-            }
-        else:
-            logger.error(f"Failed to trigger deployment for commit {commit_id}")
-            return {
-                'status': 'error',
-                'message': 'Failed to trigger deployment',
-                'commit_id': commit_id
-            }
+        # Coalesce with other recent pushes, then queue the GitHub Actions trigger
+        batch = self.coalescer.submit('content_updated', ref, payload)
+        
+        return {
+            'status': 'accepted',
+            'message': 'Deployment queued',
+            'ref': ref,
+            'commit_id': commit_id,
+            'batch_id': batch.id,
+            'job_id': batch.job_id
+        }
     
-    def handle_gitlab_pipeline(self, data):
+    def queue_github_deployment(self, payload):
+        """Queue a GitHub Actions trigger and return its job id (None if it had to be dead-lettered)"""
+        try:
+            job = self.dispatch_queue.submit(
+                'trigger_github_deployment',
+                self.trigger_github_deployment,
+                payload
+            )
+        except QueueFullError as e:
+            # Coalescing timers have no caller to hand a 503 to; keep the push for replay instead
+            if self.dead_letters is None:
+                raise
+            self.settle_dispatch('trigger_github_deployment', payload, error=e)
+            return None
+        return job.id
+    
+    def handle_gitlab_pipeline(self, data, span=None):
         """Handle GitLab pipeline events"""
         object_attributes = data.get('object_attributes', {})
         status = object_attributes.get('status', '')
         ref = object_attributes.get('ref', '')
+        commit_id = object_attributes.get('sha') or None
         
-        logger.info(f"Pipeline {status} on {ref}")
+        if status in ('success', 'failed') and span is not None:
+            # Continue the trace that triggered this pipeline (echoed back in its trigger variables),
+            # timed by GitLab's own clock
+            traceparent = pipeline_variables(object_attributes).get('TRACEPARENT')
+            span.join(traceparent)
+            self.tracer.record(
+                'gitlab.pipeline', traceparent or span.traceparent,
+                timestamp_ns(object_attributes.get('created_at')), timestamp_ns(object_attributes.get('finished_at')),
+                STATUS_ERROR if status == 'failed' else None, commit=commit_id,
+                pipeline_id=object_attributes.get('id'), outcome=status
+            )
         
-        if status == 'success' and ref == 'main':
-            # Notify GitHub that GitLab deployment completed
-            return self.notify_github_completion({
+        if (status == 'success' and ref == 'main') or status == 'failed':
+            # Notify GitHub about deployment completion or failure
+            payload = {
                 'source': 'gitlab_pipeline',
-                'status': 'success',
+                'status': status,
                 'ref': ref,
+                'commit_id': commit_id,
                 'timestamp': datetime.utcnow().isoformat()
-            })
-        elif status == 'failed':
-            # Notify GitHub about deployment failure
-            return self.notify_github_completion({
-                'source': 'gitlab_pipeline',
-                'status': 'failed',
+            }
+            if span is not None:
+                payload.update(trace_id=span.trace_id, traceparent=span.traceparent)
+            job = self.dispatch_queue.submit(
+                'notify_github_completion',
+                self.notify_github_completion,
+                payload
+            )
+            return {
+                'status': 'accepted',
+                'message': 'GitHub notification queued',
                 'ref': ref,
-                'timestamp': datetime.utcnow().isoformat()
-            })
+                'commit_id': commit_id,
+                'job_id': job.id
+            }
         
-        return {'status': 'ignored', 'message': f'Pipeline status {status} not handled'}
+        return {'status': 'ignored', 'message': f'Pipeline status {status} not handled', 'ref': ref}
+    
+    def deploy_platforms(self, payload):
+        """Run the parallel platform deploy from DEPLOY_CONTENT_DIR on this host"""
+        with self._deploy_lock:
+            result = deploy_orchestrator.deploy(DEPLOY_CONTENT_DIR, payload.get('platforms'),
+                                               force=bool(payload.get('force')),
+                                               commit=payload.get('commit_id'))
+        deploy_orchestrator.trace_deployment(self.tracer, result, payload.get('traceparent'))
+        self.webhook_events.record(
+            'platform_deploy', result['status'], payload.get('commit_id'),
+            latency_ms=(result.get('wall_seconds') or 0) * 1000,
+            platforms={name: outcome['status'] for name, outcome in result['results'].items()}
+        )
+        return {
+            'status': 'error' if result['status'] == 'failed' else 'success',
+            'deployment': result
+        }
     
     def trigger_github_deployment(self, payload):
         """Trigger GitHub Actions workflow"""
         try:
-            url = f"https://api.github.com/repos/{INFRA_REPO_OWNER}/{INFRA_REPO_NAME}/dispatches"
-            headers = {
-                'Authorization': f'token {GITHUB_TOKEN}',
-                'Accept': 'application/vnd.github.v3+json'
-            }
-            
-            data = {
-                'event_type': payload['event_type'],
-                'client_payload': payload
-            }
-            
-            response = requests.post(url, headers=headers, json=data)
-            
-            if response.status_code == 204:
-                logger.info("Successfully triggered GitHub Actions workflow")
-                return True
-            else:
-                logger.error(f"Failed to trigger GitHub workflow: {response.status_code} - {response.text}")
-                return False
-                
+            url, headers, data = self.github_dispatch_request(payload['event_type'], payload)
+            started = time.perf_counter()
+            response = self.http.post(url, headers=headers, json=data)
+            return self.github_deployment_result(payload, response, (time.perf_counter() - started) * 1000)
+        
         except Exception as e:
             logger.error(f"Error triggering GitHub deployment: {str(e)}")
+            self.webhook_events.record('github_dispatch', 'exception', payload.get('commit_id'))
+            self.trace_upstream('github.dispatch', payload, None, STATUS_ERROR, error=str(e))
+            self.settle_dispatch('trigger_github_deployment', payload, error=e)
             return False
     
     def notify_github_completion(self, payload):
         """Notify GitHub about deployment completion"""
         try:
-            url = f"https://api.github.com/repos/{INFRA_REPO_OWNER}/{INFRA_REPO_NAME}/dispatches"
-            headers = {
-                'Authorization': f'token {GITHUB_TOKEN}',
-                'Accept': 'application/vnd.github.v3+json'
-            }
-            
-            data = {
-                'event_type': 'deployment_completed',
-                'client_payload': payload
-            }
-            
-            response = requests.post(url, headers=headers, json=data)
-            
-            if response.status_code == 204:
-                logger.info("Successfully notified GitHub about deployment completion")
-                return {'status': 'success', 'message': 'GitHub notified'}
-            else:
-                logger.error(f"Failed to notify GitHub: {response.status_code} - {response.text}")
-                return {'status': 'error', 'message': 'Failed to notify GitHub'}
-                
+            url, headers, data = self.github_dispatch_request('deployment_completed', payload)
+            started = time.perf_counter()
+            response = self.http.post(url, headers=headers, json=data)
+            return self.github_completion_result(payload, response, (time.perf_counter() - started) * 1000)
+        
         except Exception as e:
             logger.error(f"Error notifying GitHub: {str(e)}")
+            self.webhook_events.record('github_completion', 'exception')
+            self.trace_upstream('github.notify_completion', payload, None, STATUS_ERROR, error=str(e))
+            self.settle_dispatch('notify_github_completion', payload, error=e)
             return {'status': 'error', 'message': 'Error notifying GitHub'}
     
     def trigger_gitlab_deployment(self, payload):
         """Trigger GitLab CI pipeline from GitHub Actions"""
         try:
-            url = f"https://gitlab.com/api/v4/projects/{GITLAB_PROJECT_ID}/trigger/pipeline"
-            headers = {
-                'PRIVATE-TOKEN': GITLAB_TOKEN,
-                'Content-Type': 'application/json'
-            }
-            
-            data = {
-                'ref': 'main',
-                'variables': {
-                    'WEBHOOK_EVENT': payload.get('event_type', 'github_trigger'),
-                    'DEPLOYMENT_SOURCE': 'github_actions',
-                    'SYNC_COMMIT': payload.get('commit_id', ''),
-                    'TIMESTAMP': payload.get('timestamp', datetime.utcnow().isoformat())
-                }
-            }
-            
-            response = requests.post(url, headers=headers, json=data)
-            
-            if response.status_code == 201:
-                pipeline_id = response.json().get('id')
-                logger.info(f"Successfully triggered GitLab pipeline {pipeline_id}")
-                return True
-            else:
-                logger.error(f"Failed to trigger GitLab pipeline: {response.status_code} - {response.text}")
-                return False
-                
+            url, headers, data = self.gitlab_trigger_request(payload)
+            started = time.perf_counter()
+            response = self.http.post(url, headers=headers, json=data)
+            return self.gitlab_deployment_result(payload, response, (time.perf_counter() - started) * 1000)
+        
         except Exception as e:
             logger.error(f"Error triggering GitLab deployment: {str(e)}")
+            self.webhook_events.record('gitlab_trigger', 'exception', payload.get('commit_id'))
+            self.trace_upstream('gitlab.trigger', payload, None, STATUS_ERROR, error=str(e))
+            self.settle_dispatch('trigger_gitlab_deployment', payload, error=e)
+            return False
+    
+    def settle_dispatch(self, job, payload, response=None, error=None):
+        """Dead-letter a retryable failure, or drop the commit's dead letter once the dispatch is settled"""
+        if self.dead_letters is None:
+            return
+        upstream = JOB_UPSTREAMS[job]
+        key = dead_letter_key(job, payload)
+        retryable = error is not None or (
+            response is not None
+            and (response.status_code in RETRY_STATUS_CODES or UpstreamClient.is_rate_limited(response))
+        )
+        with self._replay_lock:
+            current = self._replay_current.get(upstream)
+            replayed = current is not None and current[0] == key
+            if replayed:
+                del self._replay_current[upstream]
+        try:
+            if retryable:
+                reason = str(error) if error is not None else f'HTTP {response.status_code}'
+                self.dead_letters.add(upstream, job, payload, reason, key)
+                logger.warning(f"Dead-lettered {job} for {payload.get('commit_id') or key}: {reason}")
+            else:
+                self.dead_letters.resolve(key)
+        except sqlite3.Error as e:
+            logger.error(f"Error updating dead-letter store: {str(e)}")
+            return
+        if not retryable:
+            # The upstream answered, so whatever it missed earlier can go out now
+            self.replay_next(upstream)
+            return
+        if replayed:
+            # Still failing: hand the rest of the batch back until the breaker closes again
+            self.release_replays(upstream)
+        # With no further pushes nothing else would call this upstream again; probe it on a timer
+        self.schedule_replay_probe(upstream)
+    
+    def replay_next(self, upstream):
+        """Submit the oldest dead letter for an upstream, one at a time so replays keep their order"""
+        if self.dead_letters is None:
+            return False
+        with self._replay_lock:
+            current = self._replay_current.get(upstream)
+            if current is not None and time.monotonic() - current[1] < self.dead_letters.lease:
+                return False
+            backlog = self._replay_backlog.setdefault(upstream, deque())
+            if not backlog:
+                try:
+                    backlog.extend(self.dead_letters.claim(upstream, DEAD_LETTER_REPLAY_BATCH))
+                except sqlite3.Error as e:
+                    logger.error(f"Error claiming dead letters: {str(e)}")
+                if backlog:
+                    logger.info(f"Replaying {len(backlog)} dead-lettered dispatch(es) for {upstream}")
+            if not backlog:
+                self._replay_current.pop(upstream, None)
+                return False
+            entry = backlog.popleft()
+            self._replay_current[upstream] = (entry['key'], time.monotonic())
+        try:
+            self.dispatch_queue.submit(f"replay_{entry['job']}", getattr(self, entry['job']), entry['payload'])
+        except QueueFullError:
+            backlog.appendleft(entry)
+            self.release_replays(upstream)
+            return False
+        return True
+    
+    def release_replays(self, upstream):
+        """Stop replaying an upstream and make its claimed entries available again"""
+        with self._replay_lock:
+            backlog = self._replay_backlog.pop(upstream, deque())
+            self._replay_current.pop(upstream, None)
+        if backlog:
+            try:
+                self.dead_letters.release([entry['key'] for entry in backlog])
+            except sqlite3.Error as e:
+                logger.error(f"Error releasing dead letters: {str(e)}")
+    
+    def replay_dead_letters(self):
+        """Start replaying every upstream's dead letters (e.g. those left over from before a restart)"""
+        for upstream in sorted(set(JOB_UPSTREAMS.values())):
+            if not self.replay_next(upstream):
+                self.schedule_replay_probe(upstream)
+    
+    def schedule_replay_probe(self, upstream):
+        """Retry an upstream's dead letters after one breaker reset timeout, even if no new push arrives"""
+        if self.dead_letters is None:
+            return
+        with self._replay_lock:
+            if upstream in self._replay_timers:
+                return
+            timer = threading.Timer(max(1.0, self.http.breaker_reset), self.probe_replays, [upstream])
+            timer.daemon = True
+            self._replay_timers[upstream] = timer
+        timer.start()
+    
+    def probe_replays(self, upstream):
+        """Timer callback: replay the oldest dead letter, which doubles as the half-open breaker probe.
+        
+        A failed replay dead-letters the entry again and re-arms the timer; a
+        successful one replays the rest in order. The timer is also re-armed
+        while entries are waiting but none could be started (one in flight, or
+        leased by another worker).
+        """
+        with self._replay_lock:
+            self._replay_timers.pop(upstream, None)
+        try:
+            pending = self.dead_letters.stats()['by_upstream'].get(upstream, 0)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading dead-letter store: {str(e)}")
+            pending = 1
+        if pending and not self.replay_next(upstream):
+            self.schedule_replay_probe(upstream)
+    
+    def upstream_state_changed(self, netloc, previous, state):
+        """Circuit breaker listener: replay what an upstream missed as soon as it is healthy again"""
+        upstream = UPSTREAM_NAMES.get(netloc, netloc)
+        if state == CLOSED:
+            self.replay_next(upstream)
+        elif state == OPEN:
+            self.schedule_replay_probe(upstream)
+    
+    def trace_upstream(self, name, payload, latency_ms, status=None, **attributes):
+        """Span for one upstream call (plus the time it sat in the coalescer/queue) under the payload's trace"""
+        ended = time.time_ns()
+        started = ended - int((latency_ms or 0) * 1e6)
+        queued = timestamp_ns(payload.get('timestamp'))
+        if queued and queued < started:
+            self.tracer.record('dispatch.wait', payload.get('traceparent'), queued, started,
+                               commit=payload.get('commit_id'), job=name)
+        self.tracer.record(name, payload.get('traceparent'), started, ended, status,
+                           commit=payload.get('commit_id'), **attributes)
+    
+    def github_dispatch_request(self, event_type, payload):
+        """URL, headers and body for a GitHub repository_dispatch"""
+        url = f"{GITHUB_API_URL}/repos/{INFRA_REPO_OWNER}/{INFRA_REPO_NAME}/dispatches"
+        headers = {
+            'Authorization': f'token {GITHUB_TOKEN}',
+            'Accept': 'application/vnd.github.v3+json'
+        }
+        
+        data = {
+            'event_type': event_type,
+            'client_payload': payload
+        }
+        return url, headers, data
+    
+    def gitlab_trigger_request(self, payload):
+        """URL, headers and body for a GitLab pipeline trigger"""
+        url = f"{GITLAB_API_URL}/projects/{GITLAB_PROJECT_ID}/trigger/pipeline"
+        headers = {
+            'PRIVATE-TOKEN': GITLAB_TOKEN,
+            'Content-Type': 'application/json'
+        }
+        
+        data = {
+            'ref': 'main',
+            'variables': {
+                'WEBHOOK_EVENT': payload.get('event_type', 'github_trigger'),
+                'DEPLOYMENT_SOURCE': 'github_actions',
+                'SYNC_COMMIT': payload.get('commit_id', ''),
+                # Echoed back on the pipeline webhook so its span joins this trace
+                'TRACE_ID': payload.get('trace_id', ''),
+                'TRACEPARENT': payload.get('traceparent', ''),
+                'TIMESTAMP': payload.get('timestamp', datetime.utcnow().isoformat())
+            }
+        }
+        return url, headers, data
+    
+    def github_deployment_result(self, payload, response, latency_ms):
+        """Interpret the GitHub response to a content dispatch"""
+        if response.status_code == 204:
+            logger.info("Successfully triggered GitHub Actions workflow")
+            self.webhook_events.record('github_dispatch', 'success', payload.get('commit_id'), latency_ms)
+            self.trace_upstream('github.dispatch', payload, latency_ms, status_code=204)
+            self.settle_dispatch('trigger_github_deployment', payload, response)
+            return True
+        else:
+            logger.error(f"Failed to trigger GitHub workflow: {response.status_code} - {response.text}")
+            self.webhook_events.record('github_dispatch', 'error', payload.get('commit_id'), latency_ms,
+                                       status_code=response.status_code)
+            self.trace_upstream('github.dispatch', payload, latency_ms, STATUS_ERROR, status_code=response.status_code)
+            self.settle_dispatch('trigger_github_deployment', payload, response)
+            return False
+    
+    def github_completion_result(self, payload, response, latency_ms):
+        """Interpret the GitHub response to a deployment_completed dispatch"""
+        if response.status_code == 204:
+            logger.info("Successfully notified GitHub about deployment completion")
+            self.webhook_events.record('github_completion', 'success', latency_ms=latency_ms)
+            self.trace_upstream('github.notify_completion', payload, latency_ms, status_code=204)
+            self.settle_dispatch('notify_github_completion', payload, response)
+            return {'status': 'success', 'message': 'GitHub notified'}
+        else:
+            logger.error(f"Failed to notify GitHub: {response.status_code} - {response.text}")
+            self.webhook_events.record('github_completion', 'error', latency_ms=latency_ms,
+                                       status_code=response.status_code)
+            self.trace_upstream('github.notify_completion', payload, latency_ms, STATUS_ERROR,
+                                status_code=response.status_code)
+            self.settle_dispatch('notify_github_completion', payload, response)
+            return {'status': 'error', 'message': 'Failed to notify GitHub'}
+    
+    def gitlab_deployment_result(self, payload, response, latency_ms):
+        """Interpret the GitLab response to a pipeline trigger"""
+        if response.status_code == 201:
+            pipeline_id = response.json().get('id')
+            logger.info(f"Successfully triggered GitLab pipeline {pipeline_id}")
+            self.webhook_events.record('gitlab_trigger', 'success', payload.get('commit_id'), latency_ms,
+                                       pipeline_id=pipeline_id)
+            self.trace_upstream('gitlab.trigger', payload, latency_ms, status_code=201, pipeline_id=pipeline_id)
+            self.settle_dispatch('trigger_gitlab_deployment', payload, response)
+            return True
+        else:
+            logger.error(f"Failed to trigger GitLab pipeline: {response.status_code} - {response.text}")
+            self.webhook_events.record('gitlab_trigger', 'error', payload.get('commit_id'), latency_ms,
+                                       status_code=response.status_code)
+            self.trace_upstream('gitlab.trigger', payload, latency_ms, STATUS_ERROR, status_code=response.status_code)
+            self.settle_dispatch('trigger_gitlab_deployment', payload, response)
             return False
 
-# Initialize webhook handler
-webhook_handler = WebhookHandler()
+# Built on first request rather than at import, so importing this module
+# (webhook_asgi, tools, tests) opens no stores and builds no second handler
+_webhook_handler = None
+_webhook_handler_lock = threading.Lock()
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.utcnow().isoformat(),
-        'service': 'webhook-handler'
-    })
+def get_webhook_handler():
+    """The process-wide WebhookHandler behind the Flask routes.
+    
+    Building it also starts replaying dead letters left by an earlier process,
+    once per process however the app is served (__main__, gunicorn workers);
+    the store's leases keep workers sharing the file from replaying an entry twice.
+    """
+    global _webhook_handler
+    if _webhook_handler is None:
+        with _webhook_handler_lock:
+            if _webhook_handler is None:
+                handler = WebhookHandler()
+                handler.http.observers.append(observe_upstream)
+                metrics.register_collector(lambda: collect_handler_metrics(handler), name='handler')
+                # Dispatches dead-lettered before a restart go out once their upstream answers
+                handler.replay_dead_letters()
+                _webhook_handler = handler
+    return _webhook_handler
 
-@app.route('/webhook/gitlab', methods=['POST'])
-def gitlab_webhook():
-    """GitLab webhook endpoint"""
+def observe_upstream(method, url, status, seconds):
+    """Record latency and status of one upstream API attempt"""
+    parts = urlsplit(url)
+    path = parts.path
+    if path.endswith('/dispatches'):
+        endpoint = 'dispatches'
+    elif path.endswith('/trigger/pipeline'):
+        endpoint = 'trigger_pipeline'
+    elif '/records' in path:
+        endpoint = 'records'
+    else:
+        endpoint = 'other'
+    labels = {'upstream': UPSTREAM_NAMES.get(parts.netloc, parts.netloc), 'endpoint': endpoint}
+    metrics.observe('webhook_upstream_request_duration_seconds', seconds, labels)
+    metrics.inc('webhook_upstream_responses_total', dict(labels, status=str(status)))
+
+def collect_handler_metrics(handler):
+    """Refresh gauges from handler state at scrape time"""
+    metrics.set('webhook_dispatch_queue_depth', handler.dispatch_queue.depth())
+    metrics.set('webhook_coalesced_dispatches_saved_total', handler.coalescer.dispatches_saved)
+    if handler.dead_letters is not None:
+        metrics.set('webhook_dead_letters_pending', handler.dead_letters.stats()['pending'])
+    for netloc, breaker in handler.http.breaker_stats().items():
+        metrics.set('webhook_upstream_circuit_open', int(breaker['state'] == OPEN),
+                    {'upstream': UPSTREAM_NAMES.get(netloc, netloc)})
+
+metrics.start()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe('webhook_http_request_duration_seconds', time.perf_counter() - started, {'route': route})
+        metrics.inc('webhook_http_requests_total', {
+            'route': route,
+            'method': request.method,
+            'status': str(response.status_code)
+        })
+    return response
+
+def cached_delivery(handler, key):
+    """Replay the stored response for an already-processed delivery"""
+    cached = handler.idempotency.get(key)
+    if cached is None:
+        return None
+    body, status_code = cached
+    logger.info(f"Duplicate delivery {key}, answering from cache")
+    metrics.inc('webhook_duplicate_deliveries_total')
+    return dict(body, duplicate=True), status_code
+
+def finish_ingest(handler, span, response):
+    """Export the ingest span tree with the HTTP status the delivery produced"""
+    status_code = response[1]
+    span.set(status_code=status_code)
+    handler.tracer.export(span.finish(STATUS_ERROR if status_code >= 500 else None))
+    return response
+
+def process_gitlab_webhook(handler, headers, body):
+    """Verify, deduplicate and handle a GitLab delivery; returns (response, status_code)"""
+    span = handler.tracer.start('webhook.ingest', source='gitlab', delivery=headers.get('X-Gitlab-Event-UUID'))
+    return finish_ingest(handler, span, handle_gitlab_delivery(handler, headers, body, span))
+
+def handle_gitlab_delivery(handler, headers, body, span):
+    """process_gitlab_webhook minus the ingest span bookkeeping"""
     try:
         # Verify signature if configured
-        signature = request.headers.get('X-Gitlab-Token', '')
-        if not webhook_handler.verify_gitlab_signature(request.get_data(), signature):
+        signature = headers.get('X-Gitlab-Token', '')
+        verify = span.child('webhook.verify_signature')
+        with metrics.time('webhook_signature_verify_seconds'):
+            valid = handler.verify_gitlab_signature(body, signature)
+        verify.finish()
+        if not valid:
             logger.warning("Invalid webhook signature")
-            return jsonify({'error': 'Invalid signature'}), 401
+            return {'error': 'Invalid signature'}, 401
+        
+        # Answer re-deliveries without re-running the dispatch path
+        key = delivery_key(headers, None)
+        cached = cached_delivery(handler, key)
+        if cached:
+            return cached
         
-        # Process webhook
-        data = request.get_json()
+        # Process webhook: one parse, reduced to the fields the handlers read
+        try:
+            data = parse_gitlab_event(body)
+        except PayloadTooLarge as e:
+            return {'error': str(e)}, 413
+        except ValueError:
+            return {'error': 'Invalid JSON payload'}, 400
         if not data:
-            return jsonify({'error': 'No JSON data received'}), 400
+            return {'error': 'No JSON data received'}, 400
         
-        result = webhook_handler.handle_gitlab_webhook(data)
-        return jsonify(result)
+        if key is None:
+            key = delivery_key(headers, data)
+            cached = cached_delivery(handler, key)
+            if cached:
+                return cached
         
+        result = handler.handle_gitlab_webhook(data, span)
+        status_code = 202 if result.get('status') == 'accepted' else 200
+        handler.idempotency.put(key, result, status_code)
+        return result, status_code
+    
+    except QueueFullError as e:
+        logger.error(f"Rejecting GitLab webhook: {str(e)}")
+        return {'error': 'Dispatch queue full, retry later'}, 503
     except Exception as e:
         logger.error(f"Error processing GitLab webhook: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return {'error': 'Internal server error'}, 500
 
-@app.route('/trigger/deployment', methods=['POST'])
-def trigger_deployment():
-    """Manual deployment trigger endpoint"""
+def process_deployment_trigger(handler, data):
+    """Queue a manual deployment trigger; returns (response, status_code)"""
+    traceparent = data.get('traceparent') if isinstance(data, dict) else None
+    span = handler.tracer.start('webhook.ingest', traceparent, source='trigger')
+    if isinstance(data, dict):
+        # Continue the caller's trace (e.g. the GitHub workflow) and hand it on to the dispatch
+        span.set(commit=data.get('commit_id'))
+        data.update(trace_id=span.trace_id, traceparent=span.traceparent)
+    return finish_ingest(handler, span, queue_deployment_trigger(handler, data))
+
+def queue_deployment_trigger(handler, data):
+    """process_deployment_trigger minus the ingest span bookkeeping"""
     try:
-        data = request.get_json()
         if not data:
-            return jsonify({'error': 'No JSON data received'}), 400
+            return {'error': 'No JSON data received'}, 400
+        if not isinstance(data, dict):
+            return {'error': 'Invalid JSON payload'}, 400
         
         event_type = data.get('event_type', 'manual_trigger')
         
-        # Trigger deployment based on source
-        if data.get('source') == 'github_actions':
+        # Queue deployment based on target/source
+        if data.get('target') == 'platforms':
+            # Deploy straight to the hosting platforms from this host
+            if not DEPLOY_CONTENT_DIR:
+                return {'error': 'Direct platform deploys are not configured (DEPLOY_CONTENT_DIR)'}, 400
+            unknown = [name for name in data.get('platforms') or [] if name not in deploy_orchestrator.PLATFORMS_BY_NAME]
+            if unknown:
+                return {'error': f"Unknown platform(s): {', '.join(unknown)}"}, 400
+            job = handler.dispatch_queue.submit(
+                'deploy_platforms',
+                handler.deploy_platforms,
+                data
+            )
+        elif data.get('source') == 'github_actions':
             # Trigger GitLab deployment
-            success = webhook_handler.trigger_gitlab_deployment(data)
+            job = handler.dispatch_queue.submit(
+                'trigger_gitlab_deployment',
+                handler.trigger_gitlab_deployment,
+                data
+            )
         else:
             # Trigger GitHub deployment
-            success = webhook_handler.trigger_github_deployment(data)
+            data.setdefault('event_type', event_type)
+            job = handler.dispatch_queue.submit(
+                'trigger_github_deployment',
+                handler.trigger_github_deployment,
+                data
+            )
         
-        if success:
-            return jsonify({
-                'status': 'triggered',
-                'message': f'Deployment triggered: {event_type}'
-            })
-        else:
-            return jsonify({
-                'status': 'error',
-                'message': f'Failed to trigger deployment: {event_type}'
-            }), 500
-            
+        return {
+            'status': 'accepted',
+            'message': f'Deployment queued: {event_type}',
+            'job_id': job.id
+        }, 202
+    
+    except QueueFullError as e:
+        logger.error(f"Rejecting deployment trigger: {str(e)}")
+        return {'error': 'Dispatch queue full, retry later'}, 503
     except Exception as e:
         logger.error(f"Error triggering deployment: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return {'error': 'Internal server error'}, 500
+
+def job_response(handler, job_id):
+    """Look up a dispatch job or coalescing batch; returns (response, status_code)"""
+    job = handler.dispatch_queue.get_job(job_id)
+    if job is None:
+        # Coalesced pushes are tracked by batch until their window closes
+        job = handler.coalescer.get_batch(job_id)
+    if job is None:
+        return {'error': 'Job not found'}, 404
+    return job, 200
+
+def status_response(handler, limit=10, kind=None):
+    """Status payload with recent events and component stats"""
+    limit = max(0, min(limit, EVENT_BUFFER_SIZE))
+    
+    # Serve recent events from the in-memory ring buffer
+    events = handler.webhook_events.recent(limit, kind)
+    if not kind and not len(handler.webhook_events) and limit:
+        # Cold start: fall back to the tail of the log file ([-0:] would be all of it), newest first like the ring
+        events = tail_log_lines(LOG_FILE, contains='INFO')[-limit:][::-1]
+    
+    return {
+        'status': 'running',
+        'timestamp': datetime.utcnow().isoformat(),
+        'recent_events': events,
+        'dispatch_queue': handler.dispatch_queue.stats(),
+        'coalescing': handler.coalescer.stats(),
+        'idempotency': handler.idempotency.stats(),
+        'circuit_breakers': {UPSTREAM_NAMES.get(netloc, netloc): stats
+                             for netloc, stats in handler.http.breaker_stats().items()},
+        'dead_letters': handler.dead_letters.stats() if handler.dead_letters is not None else None,
+        'logging': logging_stats(),
+        'configuration': {
+            'gitlab_token_configured': bool(GITLAB_TOKEN),
+            'github_token_configured': bool(GITHUB_TOKEN),
+            'webhook_secret_configured': bool(GITLAB_WEBHOOK_SECRET)
+        }
+    }
+
+def deployment_history_response(handler, limit=20, platform=None):
+    """Per-platform deploy aggregates plus the most recent deployments; returns (response, status_code)"""
+    if handler.deployment_history is None:
+        return {'error': 'Deployment history not configured'}, 404
+    limit = max(1, min(limit, 200))
+    return {
+        'timestamp': datetime.utcnow().isoformat(),
+        'platforms': handler.deployment_history.platform_stats(platform),
+        'recent': handler.deployment_history.recent(limit, platform)
+    }, 200
+
+@app.errorhandler(413)
+def payload_too_large(error):
+    """JSON body for bodies Werkzeug cut off at MAX_CONTENT_LENGTH"""
+    return jsonify({'error': f'Payload exceeds the {WEBHOOK_MAX_BODY_BYTES} byte limit'}), 413
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.utcnow().isoformat(),
+        'service': 'webhook-handler'
+    })
+
+@app.route('/webhook/gitlab', methods=['POST'])
+def gitlab_webhook():
+    """GitLab webhook endpoint"""
+    try:
+        check_size(request.content_length)
+    except PayloadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    result, status_code = process_gitlab_webhook(get_webhook_handler(), request.headers, request.get_data(cache=False))
+    return jsonify(result), status_code
+
+@app.route('/trigger/deployment', methods=['POST'])
+def trigger_deployment():
+    """Manual deployment trigger endpoint"""
+    result, status_code = process_deployment_trigger(get_webhook_handler(), request.get_json(silent=True))
+    return jsonify(result), status_code
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Dispatch job state endpoint"""
+    result, status_code = job_response(get_webhook_handler(), job_id)
+    return jsonify(result), status_code
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics endpoint"""
+    # Registers the handler's gauge collector before the first scrape
+    get_webhook_handler()
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/status', methods=['GET'])
 def status():
     """Status endpoint with recent events"""
     try:
-        # Read recent webhook log entries
-        events = []
-        if os.path.exists('webhook.log'):
-            with open('webhook.log', 'r') as f:
-                lines = f.readlines()
-                # Get last 20 lines
-                for line in lines[-20:]:
-                    if 'INFO' in line:
-                        events.append(line.strip())
-        
-        return jsonify({
-            'status': 'running',
-            'timestamp': datetime.utcnow().isoformat(),
-            'recent_events': events[-10:],  # Last 10 events
-            'configuration': {
-                'gitlab_token_configured': bool(GITLAB_TOKEN),
-                'github_token_configured': bool(GITHUB_TOKEN),
-                'webhook_secret_configured': bool(GITLAB_WEBHOOK_SECRET)
-            }
-        })
-        
+        limit = request.args.get('limit', 10, type=int)
+        kind = request.args.get('kind')
+        return jsonify(status_response(get_webhook_handler(), limit, kind))
+    
     except Exception as e:
         logger.error(f"Error getting status: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/deployments/history', methods=['GET'])
+def deployment_history():
+    """Deployment history endpoint with per-platform p50/p95 and failure rate"""
+    try:
+        limit = request.args.get('limit', 20, type=int)
+        platform = request.args.get('platform')
+        result, status_code = deployment_history_response(get_webhook_handler(), limit, platform)
+        return jsonify(result), status_code
+    
+    except Exception as e:
+        logger.error(f"Error getting deployment history: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('DEBUG', 'false').lower() == 'true'
     
     logger.info(f"Starting webhook handler on port {port}")
     logger.info(f"Debug mode: {debug}")
+    # Built before serving so leftover dead letters replay without waiting for a request
+    get_webhook_handler()
     
     app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Webhook Payload Parsing
+
+One bounded read and one parse per delivery. Bodies over
+WEBHOOK_MAX_BODY_BYTES are refused before they are buffered. JSON is parsed
+with orjson when it is installed (falling back to the standard library),
+and GitLab events are immediately reduced to the handful of fields the
+handlers use, so a push carrying hundreds of commits does not stay
+materialized while the delivery is processed.
+"""
+
+import os
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+WEBHOOK_MAX_BODY_BYTES = int(os.getenv('WEBHOOK_MAX_BODY_BYTES', 5 * 1024 * 1024))
+
+# Trigger variables the pipeline hook echoes back (set by gitlab_trigger_request and the workflow)
+TRACE_VARIABLES = ('TRACE_ID', 'TRACEPARENT')
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+class PayloadTooLarge(ValueError):
+    def __init__(self, size, limit=WEBHOOK_MAX_BODY_BYTES):
+        self.size = size
+        self.limit = limit
+        super().__init__(f'Payload of {size} bytes exceeds the {limit} byte limit')
+
+
+def loads(body):
+    """Parse JSON bytes with the fastest available backend; raises ValueError on bad JSON"""
+    if orjson is not None:
+        # orjson.JSONDecodeError subclasses ValueError
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def check_size(content_length, limit=WEBHOOK_MAX_BODY_BYTES):
+    """Refuse a declared Content-Length over the limit before reading anything"""
+    if content_length is not None and int(content_length) > limit:
+        raise PayloadTooLarge(int(content_length), limit)
+
+
+def commit_summary(commit):
+    author = commit.get('author') or {}
+    return {
+        'id': commit.get('id', ''),
+        'message': commit.get('message', ''),
+        'author': {'name': author.get('name', 'Unknown')}
+    }
+
+
+def pipeline_variables(attributes):
+    """GitLab's object_attributes.variables ([{key, value}, ...]) as a dict"""
+    return {item.get('key'): item.get('value') for item in attributes.get('variables') or []
+            if isinstance(item, dict)}
+
+
+def extract_gitlab_event(data):
+    """Only the fields the GitLab handlers and delivery keys read; raises ValueError unless data is an object"""
+    if not isinstance(data, dict):
+        raise ValueError(f'Expected a JSON object, got {type(data).__name__}')
+    kind = data.get('object_kind', '')
+    event = {'object_kind': kind}
+    if kind == 'push':
+        commits = data.get('commits') or []
+        event.update({
+            'ref': data.get('ref', ''),
+            'after': data.get('after', ''),
+            # GitLab caps `commits` at 20; total_commits_count is the real size of the push
+            'total_commits_count': data.get('total_commits_count', len(commits)),
+            'commits': [commit_summary(commits[-1])] if commits else []
+        })
+    elif kind == 'pipeline':
+        attributes = data.get('object_attributes') or {}
+        # Pipelines we triggered carry the trace context back in their variables; keep just those
+        variables = pipeline_variables(attributes)
+        event['object_attributes'] = {
+            'id': attributes.get('id'),
+            'status': attributes.get('status', ''),
+            'ref': attributes.get('ref', ''),
+            'sha': attributes.get('sha', ''),
+            'created_at': attributes.get('created_at'),
+            'finished_at': attributes.get('finished_at'),
+            'variables': [{'key': key, 'value': variables[key]} for key in TRACE_VARIABLES if variables.get(key)]
+        }
+    return event
+
+
+def parse_gitlab_event(body):
+    """Raw delivery bytes -> reduced event dict (None for an empty body); ValueError for anything but an object"""
+    if not body:
+        return None
+    if len(body) > WEBHOOK_MAX_BODY_BYTES:
+        raise PayloadTooLarge(len(body))
+    return extract_gitlab_event(loads(body))
@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scripts'))
+# After scripts/, whose rate_limiter module shares a name with the benchmark's
+sys.path.append(os.path.join(ROOT_DIR, 'benchmarks'))
+sys.path.append(os.path.join(ROOT_DIR, 'tools'))
+
+# Read at import time by the webhook modules: keep logs, traces and stores out of the working tree
+STATE_DIR = tempfile.mkdtemp(prefix='webhook_test_')
+os.environ['LOG_FILE'] = os.path.join(STATE_DIR, 'webhook.log')
+os.environ['DEPLOY_HISTORY_DB'] = os.path.join(STATE_DIR, 'deployment_history.db')
+os.environ['DEAD_LETTER_DB'] = os.path.join(STATE_DIR, 'dead_letters.db')
+os.environ['TRACE_FILE'] = os.path.join(STATE_DIR, 'deployment_traces.jsonl')
+os.environ['GITLAB_WEBHOOK_SECRET'] = ''
@@ -0,0 +1,28 @@
+import pytest
+
+from asset_optimizer import minify_css
+
+
+@pytest.mark.parametrize('css, expected', [
+    ('a { color :red; }', 'a{color:red}'),
+    ('a {\n  color : red ;\n  margin : 0 auto\n}', 'a{color:red;margin:0 auto}'),
+    ('@font-face { font-family : "A B" }', '@font-face{font-family:"A B"}'),
+    ('@media (min-width: 600px) { a :hover { color : red } }', '@media (min-width:600px){a :hover{color:red}}'),
+    ('@supports (display: grid) { div :first-child { display : grid } }',
+     '@supports (display:grid){div :first-child{display:grid}}'),
+])
+def test_space_before_colon_is_dropped_only_in_declarations(css, expected):
+    assert minify_css(css) == expected
+
+
+def test_descendant_pseudo_class_selector_keeps_its_space():
+    assert minify_css('nav :focus , a{color : blue}') == 'nav :focus,a{color:blue}'
+
+
+def test_strings_and_preserved_comments_are_untouched():
+    assert minify_css('/*! keep : me */ a{content : "x : y"}') == '/*! keep : me */ a{content:"x : y"}'
+
+
+def test_preserved_comment_before_an_at_rule():
+    assert minify_css('/*! x */ @media print { a :hover { color : red } }') == \
+        '/*! x */ @media print{a :hover{color:red}}'
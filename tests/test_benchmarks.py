@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT_DIR
+from fake_upstream import FakeUpstream
+from harness import percentile
+
+LOAD_TEST = os.path.join(ROOT_DIR, 'benchmarks', 'load_test.py')
+
+
+def test_fake_upstream_rate_limits_fails_and_counts_by_endpoint():
+    upstream = FakeUpstream(rate_limit_rate=1.0, retry_after=7)
+    assert upstream.respond('POST', '/repos/o/r/dispatches', b'{}') == (429, {'Retry-After': '7'},
+                                                                         {'message': 'rate limited'})
+    upstream.rate_limit_rate, upstream.error_rate = 0.0, 1.0
+    assert upstream.respond('POST', '/api/v4/projects/1/trigger/pipeline', b'')[0] == 502
+    upstream.error_rate = 0.0
+    assert upstream.respond('POST', '/api/v4/projects/1/trigger/pipeline', b'')[0] == 201
+
+    assert upstream.stats() == {'github_dispatches 429': 1, 'gitlab_trigger_pipeline 201': 1,
+                                'gitlab_trigger_pipeline 502': 1, 'total': 3}
+    upstream.server.server_close()
+
+
+def test_percentile():
+    assert percentile([], 0.5) == 0.0
+    assert percentile(range(1, 101), 0.5) == 51
+    assert percentile([3, 1, 2], 0.99) == 3
+
+
+@pytest.mark.parametrize('mode', ['sync', 'async'])
+def test_load_test_reports_a_full_offline_run(mode, tmp_path):
+    output = tmp_path / 'report.json'
+    completed = subprocess.run(
+        [sys.executable, LOAD_TEST, '--mode', mode, '--requests', '40', '--concurrency', '4', '--latency', '0',
+         '--mix', 'push=1', '--duplicate-rate', '0.5', '--output', str(output)],
+        cwd=tmp_path, capture_output=True, text=True, timeout=120
+    )
+    assert completed.returncode == 0, completed.stderr
+
+    report = json.loads(output.read_text())
+    assert report['config']['mode'] == mode
+    assert report['errors'] == 0
+    assert sum(report['status_counts'].values()) == 40
+    # Re-deliveries are answered from the idempotency cache, not dispatched again
+    assert 0 < report['upstream_calls']['total'] < 40
+    assert report['latency_ms']['p50'] <= report['latency_ms']['p99']
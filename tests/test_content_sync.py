@@ -0,0 +1,51 @@
+import os
+import subprocess
+
+import pytest
+
+from content_sync import ContentSync, SyncError
+
+
+def git(target, *args):
+    return subprocess.run(['git', '-C', target, *args], capture_output=True, text=True, check=True).stdout
+
+
+@pytest.fixture
+def target(tmp_path):
+    git(str(tmp_path), 'init', '--quiet')
+    git(str(tmp_path), 'config', 'user.email', 'sync@example.com')
+    git(str(tmp_path), 'config', 'user.name', 'sync')
+    for path in ('index.html', 'old.html'):
+        (tmp_path / path).write_text(path)
+    git(str(tmp_path), 'add', 'index.html', 'old.html')
+    git(str(tmp_path), 'commit', '--quiet', '-m', 'initial')
+    return str(tmp_path)
+
+
+def report(changed, removed):
+    return {'changed': changed, 'removed': removed, 'content_commit': 'abc123'}
+
+
+def test_removal_of_a_never_tracked_path_is_skipped(target):
+    sync = ContentSync(target, mirror=object())
+    with open(os.path.join(target, 'index.html'), 'w') as f:
+        f.write('new')
+    os.remove(os.path.join(target, 'old.html'))
+
+    assert sync.commit_changes(report(['index.html'], ['old.html', 'never-tracked.html']))
+    assert git(target, 'ls-files').split() == ['index.html']
+    assert git(target, 'status', '--porcelain') == ''
+
+
+def test_only_untracked_removals_is_not_a_commit(target):
+    sync = ContentSync(target, mirror=object())
+
+    assert not sync.commit_changes(report([], ['never-tracked.html']))
+    assert git(target, 'rev-list', '--count', 'HEAD').strip() == '1'
+
+
+def test_git_failures_raise_sync_error(target):
+    sync = ContentSync(target, mirror=object())
+
+    with pytest.raises(SyncError, match='git add failed'):
+        sync.commit_changes(report(['missing.html'], []))
@@ -0,0 +1,137 @@
+import os
+import time
+
+import pytest
+
+import webhook_handler
+from circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from dead_letter import DeadLetterStore, dead_letter_key
+from fake_upstream import FakeUpstream
+from upstream_client import UpstreamClient
+
+PAYLOAD = {'event_type': 'content_updated', 'commit_id': 'c' * 40}
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / 'dead_letters.db')
+
+
+def test_repeated_failures_for_a_commit_keep_one_entry(store_path):
+    store = DeadLetterStore(store_path)
+    first = store.add('github', 'trigger_github_deployment', PAYLOAD, 'HTTP 502')
+    second = store.add('github', 'trigger_github_deployment', dict(PAYLOAD, ref='main'), 'HTTP 503')
+    assert first == second == dead_letter_key('trigger_github_deployment', PAYLOAD)
+    [entry] = store.entries()
+    assert entry['attempts'] == 2
+    assert entry['reason'] == 'HTTP 503'
+
+
+def test_claimed_entries_are_skipped_by_other_workers_until_the_lease_ends(store_path):
+    worker_a = DeadLetterStore(store_path, lease=0.3)
+    worker_b = DeadLetterStore(store_path, lease=0.3)
+    for commit in ('a', 'b', 'c'):
+        worker_a.add('github', 'trigger_github_deployment', dict(PAYLOAD, commit_id=commit), 'HTTP 502')
+
+    claimed = worker_a.claim('github', limit=2)
+    assert [entry['payload']['commit_id'] for entry in claimed] == ['a', 'b']
+    assert [entry['payload']['commit_id'] for entry in worker_b.claim('github')] == ['c']
+    assert worker_b.claim('github') == []
+
+    time.sleep(0.35)
+    assert [entry['payload']['commit_id'] for entry in worker_b.claim('github')] == ['a', 'b', 'c']
+
+
+def test_released_and_refailed_entries_are_claimable_again(store_path):
+    store = DeadLetterStore(store_path)
+    key = store.add('github', 'trigger_github_deployment', PAYLOAD, 'HTTP 502')
+    store.claim('github')
+    assert store.claim('github') == []
+    store.release([key])
+    assert [entry['key'] for entry in store.claim('github')] == [key]
+    store.add('github', 'trigger_github_deployment', PAYLOAD, 'HTTP 502')
+    assert [entry['key'] for entry in store.claim('github')] == [key]
+    assert store.resolve(key)
+    assert store.stats()['pending'] == 0
+
+
+def test_an_idle_store_does_not_create_its_file(store_path):
+    DeadLetterStore(store_path)
+    assert not os.path.exists(store_path)
+
+
+def test_breaker_opens_probes_and_closes():
+    changes = []
+    breaker = CircuitBreaker('api.github.com', failure_threshold=2, reset_timeout=0.1)
+    breaker.listeners.append(lambda name, previous, state: changes.append((previous, state)))
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    time.sleep(0.12)
+    assert breaker.allow()
+    assert not breaker.allow(), 'only one half-open probe at a time'
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.12)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert changes == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+    assert breaker.stats()['times_opened'] == 2
+
+
+@pytest.fixture
+def fresh_handler(monkeypatch, store_path):
+    """get_webhook_handler() as a new worker would run it, against a stand-in GitHub"""
+    upstream = FakeUpstream().start()
+    monkeypatch.setattr(webhook_handler, 'GITHUB_API_URL', upstream.url)
+    monkeypatch.setattr(webhook_handler, 'DEAD_LETTER_DB', store_path)
+    monkeypatch.setattr(webhook_handler, 'get_client', lambda: UpstreamClient(max_retries=0))
+    monkeypatch.setattr(webhook_handler, '_webhook_handler', None)
+    yield upstream
+    handler = webhook_handler._webhook_handler
+    if handler is not None:
+        handler.dispatch_queue.join()
+        for timer in list(handler._replay_timers.values()):
+            timer.cancel()
+    upstream.stop()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_a_new_worker_replays_dead_letters_left_by_the_previous_process(fresh_handler, store_path):
+    leftover = DeadLetterStore(store_path)
+    for commit in ('a', 'b'):
+        leftover.add('github', 'trigger_github_deployment', dict(PAYLOAD, commit_id=commit), 'HTTP 502')
+
+    webhook_handler.get_webhook_handler()
+
+    assert wait_for(lambda: leftover.stats()['pending'] == 0)
+    assert fresh_handler.stats()['total'] == 2
+
+
+def test_workers_sharing_the_store_do_not_replay_an_entry_twice(fresh_handler, store_path):
+    leftover = DeadLetterStore(store_path)
+    leftover.add('github', 'trigger_github_deployment', PAYLOAD, 'HTTP 502')
+    # Another worker already holds the lease on it
+    DeadLetterStore(store_path).claim('github')
+
+    handler = webhook_handler.get_webhook_handler()
+
+    time.sleep(0.3)
+    assert fresh_handler.stats()['total'] == 0
+    assert leftover.stats()['pending'] == 1
+    assert 'github' in handler._replay_timers, 'a probe is scheduled for when the lease runs out'
@@ -0,0 +1,178 @@
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import deploy_orchestrator
+from deploy_orchestrator import (Platform, content_digest, deploy, parse_timeouts, PLATFORM_SUCCEEDED,
+                                 PLATFORM_FAILED, PLATFORM_TIMED_OUT, PLATFORM_UNCHANGED, PLATFORM_UNSUPPORTED)
+
+
+@pytest.fixture
+def site(tmp_path):
+    content = tmp_path / 'site'
+    content.mkdir()
+    (content / 'index.html').write_text('<html>Content-Security-Policy X-Frame-Options</html>')
+    return content
+
+
+@pytest.fixture
+def platforms(monkeypatch):
+    """Stand-in platforms that record what they were asked to deploy"""
+    deployed = []
+
+    def ship(name):
+        def run(content_dir, timeout):
+            deployed.append(name)
+        return run
+
+    def broken(content_dir, timeout):
+        raise RuntimeError('upload rejected')
+
+    def slow(content_dir, timeout):
+        time.sleep(0.3)
+        deployed.append('slow')
+
+    def hanging(content_dir):
+        return [[sys.executable, '-c', 'import time; time.sleep(10)']]
+
+    stand_ins = {
+        'alpha': Platform('alpha', run=ship('alpha')),
+        'slow': Platform('slow', run=slow, incremental=False),
+        'slower': Platform('slower', run=slow, incremental=False),
+        'hanging': Platform('hanging', commands=hanging),
+        'beta': Platform('beta', run=ship('beta')),
+        'broken': Platform('broken', run=broken),
+        'azure-static-apps': deploy_orchestrator.PLATFORMS_BY_NAME['azure-static-apps']
+    }
+    monkeypatch.setattr(deploy_orchestrator, 'PLATFORMS_BY_NAME', stand_ins)
+    monkeypatch.setenv('AZURE_STATIC_WEB_APPS_API_TOKEN', 'token')
+    return deployed
+
+
+def run_deploy(site, names, **kwargs):
+    return deploy(str(site), names, str(site.parent / 'status.json'), history_db='', **kwargs)
+
+
+def test_platforms_already_serving_the_digest_are_skipped(site, platforms):
+    first = run_deploy(site, ['alpha', 'beta'])
+    assert first['results']['alpha']['status'] == PLATFORM_SUCCEEDED
+    assert set(first['deployed']) == {'alpha', 'beta'}
+
+    second = run_deploy(site, ['alpha', 'beta'])
+    assert {outcome['status'] for outcome in second['results'].values()} == {PLATFORM_UNCHANGED}
+    assert sorted(platforms) == ['alpha', 'beta']
+
+    (site / 'about.html').write_text('<p>new page</p>')
+    third = run_deploy(site, ['alpha'])
+    assert third['results']['alpha']['status'] == PLATFORM_SUCCEEDED
+    assert third['deployed']['alpha']['digest'] != third['deployed']['beta']['digest']
+
+
+def test_force_redeploys_unchanged_content(site, platforms):
+    run_deploy(site, ['alpha'])
+    result = run_deploy(site, ['alpha'], force=True)
+    assert result['results']['alpha']['status'] == PLATFORM_SUCCEEDED
+    assert platforms == ['alpha', 'alpha']
+
+
+def test_a_failed_deploy_records_no_digest(site, platforms):
+    result = run_deploy(site, ['alpha', 'broken'])
+    assert result['results']['broken']['status'] == PLATFORM_FAILED
+    assert 'broken' not in result['deployed']
+    assert result['status'] == 'partial_failure'
+    assert run_deploy(site, ['broken'])['results']['broken']['status'] == PLATFORM_FAILED
+
+
+def test_platforms_deployed_elsewhere_are_unsupported_and_never_current(site, platforms):
+    result = run_deploy(site, ['azure-static-apps'])
+    outcome = result['results']['azure-static-apps']
+    assert outcome['status'] == PLATFORM_UNSUPPORTED
+    assert 'GitHub Actions' in outcome['deployed_by']
+    assert result['deployed'] == {}
+    assert result['platforms'] == []
+    assert result['status'] == 'completed'
+
+
+def test_digest_counts_shipped_dotfiles_but_not_metadata(site):
+    well_known = site / '.well-known'
+    well_known.mkdir()
+    (well_known / 'security.txt').write_text('Contact: mailto:security@example.com\n')
+    before = content_digest(str(site))
+
+    (well_known / 'security.txt').write_text('Contact: mailto:abuse@example.com\n')
+    assert content_digest(str(site)) != before
+    changed = content_digest(str(site))
+
+    (site / '.git').mkdir()
+    (site / '.git' / 'HEAD').write_text('ref: refs/heads/main\n')
+    (site / 'deployment_status.json').write_text(json.dumps({'status': 'completed'}))
+    (site / '.deployment_status.abc123').write_text('{')
+    (site / '.DS_Store').write_bytes(b'\0')
+    assert content_digest(str(site)) == changed
+
+
+def test_gitlab_pages_copy_ships_well_known(site):
+    (site / '.well-known').mkdir()
+    (site / '.well-known' / 'security.txt').write_text('Contact: mailto:security@example.com\n')
+    (site / '.git').mkdir()
+    deploy_orchestrator.copy_to_gitlab_pages(str(site), 10)
+    public = site.parent / 'public'
+    assert (public / '.well-known' / 'security.txt').exists()
+    assert not os.path.exists(public / '.git')
+
+
+def test_platforms_deploy_concurrently(site, platforms):
+    started = time.monotonic()
+    result = run_deploy(site, ['slow', 'slower', 'alpha'])
+    elapsed = time.monotonic() - started
+
+    assert platforms.count('slow') == 2
+    assert elapsed < 0.55
+    assert result['wall_seconds'] < 0.55
+    assert set(result['platforms']) == {'slow', 'slower', 'alpha'}
+
+
+def test_a_hanging_platform_times_out_without_holding_up_the_others(site, platforms):
+    started = time.monotonic()
+    result = run_deploy(site, ['hanging', 'alpha'], timeouts={'hanging': 0.5})
+
+    assert time.monotonic() - started < 5
+    assert result['results']['hanging']['status'] == PLATFORM_TIMED_OUT
+    assert result['results']['alpha']['status'] == PLATFORM_SUCCEEDED
+    assert result['errors'] == [{'platform': 'hanging', 'error': 'hanging deployment timed out after 0.5s'}]
+    assert parse_timeouts('vercel=300, netlify=120,') == {'vercel': 300.0, 'netlify': 120.0}
+
+
+def test_the_status_file_is_always_complete_json(site, platforms):
+    status_file = site.parent / 'status.json'
+    done = threading.Event()
+    reads = []
+
+    def watch():
+        while not done.is_set():
+            if status_file.exists():
+                reads.append(json.loads(status_file.read_text()))
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    try:
+        for _ in range(5):
+            run_deploy(site, ['slow', 'slower', 'alpha'])
+    finally:
+        done.set()
+        watcher.join()
+
+    assert reads
+    assert json.loads(status_file.read_text())['status'] == 'completed'
+    assert not list(site.parent.glob('.deployment_status.*'))
+
+
+def test_missing_index_fails_before_any_platform_runs(site, platforms):
+    (site / 'index.html').unlink()
+    result = run_deploy(site, ['alpha'])
+    assert result['status'] == 'failed'
+    assert platforms == []
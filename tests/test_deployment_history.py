@@ -0,0 +1,71 @@
+import pytest
+
+from deployment_history import DeploymentHistory, histogram_percentile, latency_bucket, bucket_upper_bound
+
+
+def status(deployment_id, started_at, ended_at=None, **runs):
+    return {'deployment_id': deployment_id, 'status': 'completed', 'started_at': started_at,
+            'ended_at': ended_at or started_at + 60, 'wall_seconds': 60, 'digest': 'abc',
+            'results': {platform: dict(run, started_at=started_at) for platform, run in runs.items()}}
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = DeploymentHistory(str(tmp_path / 'history.db'))
+    yield history
+    history.close()
+
+
+def test_buckets_are_within_ten_percent():
+    for seconds in (0.02, 1.0, 37.5, 600):
+        upper = bucket_upper_bound(latency_bucket(seconds))
+        assert seconds <= upper * 1.000001 < seconds * 1.1 + 1e-9
+    assert histogram_percentile([], 0.5) is None
+
+
+def test_percentiles_and_failure_rate_ignore_skipped_runs(history):
+    for number in range(100):
+        history.record(status(str(number), 1700000000 + number,
+                              vercel={'status': 'failed' if number % 10 == 0 else 'success',
+                                      'seconds': float(number + 1), 'bytes': 1000},
+                              netlify={'status': 'unchanged', 'seconds': 0.0}))
+
+    vercel = history.platform_stats()['vercel']
+    assert (vercel['runs'], vercel['attempts'], vercel['failures']) == (100, 100, 10)
+    assert vercel['failure_rate'] == 0.1
+    assert 50 <= vercel['p50_seconds'] <= 55
+    assert 95 <= vercel['p95_seconds'] <= 104.5
+    assert vercel['mean_seconds'] == 50.5
+    assert vercel['bytes_shipped'] == 100000
+
+    netlify = history.platform_stats('netlify')['netlify']
+    assert (netlify['runs'], netlify['skipped']) == (100, 100)
+    assert netlify['failure_rate'] is None
+    assert netlify['p50_seconds'] is None
+
+
+def test_history_is_append_only_and_newest_first(history):
+    assert history.record(status('1', 1700000000, vercel={'status': 'success', 'seconds': 10}))
+    assert history.record(status('2', 1700000100, netlify={'status': 'timeout', 'seconds': 600,
+                                                           'error': 'timed out'}))
+    assert not history.record(status('1', 1700000000, vercel={'status': 'failed', 'seconds': 1}))
+
+    assert [entry['deployment_id'] for entry in history.recent()] == ['2', '1']
+    [only] = history.recent(platform='vercel')
+    assert only['platforms'] == {'vercel': {'outcome': 'success', 'started_at': 1700000000, 'ended_at': None,
+                                            'seconds': 10, 'bytes': 0, 'error': None}}
+    assert history.platform_stats()['vercel']['runs'] == 1
+    assert history.platform_stats()['netlify']['failure_rate'] == 1.0
+
+
+def test_status_file_timestamps_are_parsed(history):
+    history.record(status('1', '2025-01-01T00:00:00Z', '2025-01-01T00:01:00Z',
+                          vercel={'status': 'success', 'seconds': 5}))
+    [entry] = history.recent()
+    assert entry['started_at'] == 1735689600.0
+    assert entry['ended_at'] == 1735689660.0
+
+
+def test_an_unused_history_creates_no_file(tmp_path):
+    DeploymentHistory(str(tmp_path / 'history.db')).close()
+    assert not (tmp_path / 'history.db').exists()
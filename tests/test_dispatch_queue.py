@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from dispatch_queue import DispatchQueue, QueueFullError, JOB_SUCCEEDED, JOB_FAILED
+
+
+def test_jobs_run_in_the_background_and_report_their_result():
+    dispatch_queue = DispatchQueue(workers=2)
+    job = dispatch_queue.submit('dispatch', lambda commit: {'status': 'success', 'commit': commit}, 'abc')
+    dispatch_queue.join()
+
+    state = dispatch_queue.get_job(job.id)
+    assert state['state'] == JOB_SUCCEEDED
+    assert state['result'] == {'status': 'success', 'commit': 'abc'}
+    assert state['started_at'] and state['finished_at']
+    assert dispatch_queue.get_job('unknown') is None
+
+
+def test_false_error_results_and_exceptions_mark_the_job_failed():
+    dispatch_queue = DispatchQueue(workers=1)
+
+    def boom():
+        raise RuntimeError('upstream unavailable')
+
+    jobs = [dispatch_queue.submit('false', lambda: False),
+            dispatch_queue.submit('error', lambda: {'status': 'error'}),
+            dispatch_queue.submit('raises', boom)]
+    dispatch_queue.join()
+
+    assert [dispatch_queue.get_job(job.id)['state'] for job in jobs] == [JOB_FAILED] * 3
+    assert dispatch_queue.get_job(jobs[2].id)['error'] == 'upstream unavailable'
+    stats = dispatch_queue.stats()
+    assert stats[JOB_FAILED] == 3
+    assert stats['depth'] == 0
+
+
+def test_a_full_queue_rejects_instead_of_blocking():
+    dispatch_queue = DispatchQueue(workers=1, max_queue_size=2)
+    gate, running = threading.Event(), threading.Event()
+
+    def blocker():
+        running.set()
+        gate.wait(5)
+        return True
+
+    dispatch_queue.submit('blocker', blocker)
+    assert running.wait(5)
+    queued = [dispatch_queue.submit('job', lambda: True) for _ in range(2)]
+    with pytest.raises(QueueFullError):
+        dispatch_queue.submit('job', lambda: True)
+    assert dispatch_queue.depth() == 2
+    assert len([job for job in queued if dispatch_queue.get_job(job.id)]) == 2
+
+    gate.set()
+    dispatch_queue.join()
+    assert dispatch_queue.stats()[JOB_SUCCEEDED] == 3
+
+
+def test_only_the_newest_finished_jobs_are_kept():
+    dispatch_queue = DispatchQueue(workers=1, max_finished_jobs=3)
+    jobs = [dispatch_queue.submit('job', lambda: True) for _ in range(5)]
+    dispatch_queue.join()
+
+    assert [dispatch_queue.get_job(job.id) is not None for job in jobs] == [False, False, True, True, True]
@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from dns_propagation import check_propagation, expected_answers, format_resolver, parse_resolver
+from fake_dns_server import FakeDNSServer
+
+OLD = {('example.com', 'A'): ['192.0.2.1'], ('www.example.com', 'CNAME'): ['old.example.net']}
+NEW = {('example.com', 'A'): ['192.0.2.2'], ('www.example.com', 'CNAME'): ['example.github.io']}
+RECORDS = [{'type': 'A', 'name': '@', 'data': '192.0.2.2'},
+           {'type': 'CNAME', 'name': 'www', 'data': 'Example.GitHub.io.'},
+           {'type': 'MX', 'name': '@', 'data': 'mail.example.com'}]
+FAST = {'query_timeout': 0.2, 'backoff_base': 0.05, 'backoff_max': 0.1}
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(count, records=OLD, **kwargs):
+        for _ in range(count):
+            started.append(FakeDNSServer(records=records, **kwargs).start())
+        return started
+
+    yield start
+    for server in started:
+        server.stop()
+
+
+def test_expected_answers_cover_a_aaaa_and_cname_only():
+    expected = expected_answers('example.com', RECORDS + [{'type': 'AAAA', 'name': 'v6', 'data': '2001:DB8:0::1'}])
+    assert expected == {('example.com', 'A'): frozenset(['192.0.2.2']),
+                        ('www.example.com', 'CNAME'): frozenset(['example.github.io']),
+                        ('v6.example.com', 'AAAA'): frozenset(['2001:db8::1'])}
+
+
+@pytest.mark.parametrize('value, resolver', [
+    ('1.1.1.1', ('1.1.1.1', 53)),
+    ('127.0.0.1:5353', ('127.0.0.1', 5353)),
+    ('::1', ('::1', 53)),
+    ('[::1]:5353', ('::1', 5353)),
+])
+def test_resolver_addresses_round_trip(value, resolver):
+    assert parse_resolver(value) == resolver
+    assert format_resolver(resolver) == value
+
+
+def test_converged_resolvers_pass_on_the_first_check(servers):
+    resolvers = [server.resolver for server in servers(3, NEW)]
+    report = check_propagation(expected_answers('example.com', RECORDS), resolvers=resolvers, timeout=0, wait_all=True,
+                               **FAST)
+
+    assert report['converged'] is True
+    assert report['resolvers_converged'] == 3
+    assert [result['attempts'] for result in report['results']] == [1, 1, 1]
+
+
+def test_resolvers_are_polled_until_the_new_records_appear(servers):
+    started = servers(3)
+    for delay, server in zip((0.2, 0.4, 0.6), started):
+        server.publish(NEW, after=delay)
+
+    report = check_propagation(expected_answers('example.com', RECORDS),
+                               resolvers=[server.resolver for server in started], timeout=10, wait_all=True, **FAST)
+
+    assert report['resolvers_converged'] == 3
+    seconds = [result['seconds'] for result in report['results']]
+    assert seconds == sorted(seconds)
+    assert seconds[0] >= 0.2
+    assert all(result['attempts'] > 1 for result in report['results'])
+
+
+def test_a_quorum_stops_waiting_for_a_stale_resolver(servers):
+    started = servers(3)
+    started[0].publish(NEW)
+    started[1].publish(NEW)
+    began = time.monotonic()
+
+    report = check_propagation(expected_answers('example.com', RECORDS),
+                               resolvers=[server.resolver for server in started], timeout=30, **FAST)
+
+    assert time.monotonic() - began < 5
+    assert (report['converged'], report['quorum'], report['resolvers_converged']) == (True, 2, 2)
+    stale = report['results'][2]
+    assert stale['converged'] is False
+    assert stale['last_answers'] == {'example.com A': ['192.0.2.1'], 'www.example.com CNAME': ['old.example.net']}
+
+
+def test_dropped_queries_are_retried(servers):
+    [server] = servers(1, NEW, loss_rate=0.5, seed=7)
+    report = check_propagation(expected_answers('example.com', RECORDS), resolvers=[server.resolver], timeout=10,
+                               **FAST)
+
+    assert report['converged'] is True
+    assert server.dropped > 0
+
+
+def test_unconverged_resolvers_fail_at_the_deadline(servers):
+    resolvers = [server.resolver for server in servers(2)]
+    report = check_propagation(expected_answers('example.com', RECORDS), resolvers=resolvers, timeout=0.3, **FAST)
+
+    assert report['converged'] is False
+    assert report['resolvers_converged'] == 0
+    assert report['seconds'] < 2
@@ -0,0 +1,106 @@
+import uuid
+
+import pytest
+
+from fake_upstream import FakeUpstream
+from upstream_client import UpstreamClient
+from dns_reconciler import (DnsReconciler, normalize_config, diff_records, record_value, ZONE_PLANNED,
+                            ZONE_UNCHANGED, ZONE_UPDATED)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    # Account quotas are keyed by API key in a process-wide store; a fresh key gives each test its own
+    monkeypatch.setenv('GODADDY_API_KEY', uuid.uuid4().hex)
+    upstream = FakeUpstream().start()
+    yield upstream
+    upstream.stop()
+
+
+def reconciler_for(upstream, **account):
+    config = normalize_config({
+        'accounts': {'default': dict({'calls_per_minute': 30}, **account)},
+        'domains': {'example.com': {'records': [{'type': 'A', 'name': '@', 'data': '192.0.2.1'}]}}
+    })
+    client = UpstreamClient(max_retries=3, backoff_base=0, breaker_failures=0)
+    return DnsReconciler(config, api_url=upstream.url, http_client=client)
+
+
+def test_account_admits_one_call_at_a_time_by_default(upstream):
+    limiter = reconciler_for(upstream).accounts['default'].limiter
+
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    assert limiter.retry_after() == pytest.approx(2.0, abs=0.1)
+
+
+def test_configured_burst(upstream):
+    limiter = reconciler_for(upstream, burst=3).accounts['default'].limiter
+
+    assert [limiter.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_every_retry_takes_an_account_slot(upstream, monkeypatch):
+    upstream.error_rate = 1.0
+    reconciler = reconciler_for(upstream, calls_per_minute=6000)
+    account = reconciler.accounts['default']
+    slots = []
+    acquire = account.limiter.acquire
+    monkeypatch.setattr(account.limiter, 'acquire', lambda **kwargs: slots.append(kwargs) or acquire(**kwargs))
+
+    response = reconciler.call(account, 'GET', reconciler.records_url('example.com'))
+
+    assert response.status_code == 502
+    assert upstream.stats()['total'] == 4
+    assert len(slots) == 4
+
+
+def test_retry_stops_when_the_account_quota_runs_out(upstream):
+    upstream.error_rate = 1.0
+    reconciler = reconciler_for(upstream)
+    reconciler.limiter_timeout = 0.5
+
+    with pytest.raises(RuntimeError, match='timed out'):
+        reconciler.call(reconciler.accounts['default'], 'GET', reconciler.records_url('example.com'))
+    assert upstream.stats()['total'] == 1
+
+
+def test_record_values_compare_hostnames_loosely():
+    assert record_value({'type': 'CNAME', 'data': 'Example.GitHub.io.', 'ttl': 600}) == \
+        record_value({'type': 'CNAME', 'data': 'example.github.io', 'ttl': '600'})
+    assert record_value({'type': 'TXT', 'data': 'Token'}) != record_value({'type': 'TXT', 'data': 'token'})
+
+
+def test_diff_covers_only_managed_sets_that_differ():
+    current = [{'type': 'A', 'name': '@', 'data': '192.0.2.2', 'ttl': 600},
+               {'type': 'A', 'name': '@', 'data': '192.0.2.1', 'ttl': 600},
+               {'type': 'CNAME', 'name': 'www', 'data': 'old.example.net', 'ttl': 600},
+               {'type': 'MX', 'name': '@', 'data': 'mail.example.com', 'ttl': 600, 'priority': 10}]
+    desired = [{'type': 'A', 'name': '@', 'data': '192.0.2.1', 'ttl': 600},
+               {'type': 'A', 'name': '@', 'data': '192.0.2.2', 'ttl': 600},
+               {'type': 'CNAME', 'name': 'www', 'data': 'example.github.io', 'ttl': 600},
+               {'type': 'TXT', 'name': '@', 'data': 'verify', 'ttl': 600}]
+
+    changes = diff_records(current, desired)
+    assert sorted(changes) == [('CNAME', 'www'), ('TXT', '@')]
+    assert diff_records(current, current) == {}
+
+
+def test_reconcile_writes_changed_sets_only_and_keeps_other_records(upstream):
+    upstream.dns_zones['example.com'] = [{'type': 'MX', 'name': '@', 'data': 'mail.example.com', 'ttl': 600,
+                                          'priority': 10}]
+    reconciler = reconciler_for(upstream, calls_per_minute=6000, burst=10)
+    spec = reconciler.config['domains']['example.com']
+
+    planned = reconciler.reconcile_zone('example.com', spec, dry_run=True)
+    assert planned['status'] == ZONE_PLANNED
+    assert planned['api_calls'] == 1
+    assert [record['type'] for record in upstream.dns_zones['example.com']] == ['MX']
+
+    updated = reconciler.reconcile_zone('example.com', spec)
+    assert updated['status'] == ZONE_UPDATED
+    assert updated['api_calls'] == 2
+    assert sorted(record['type'] for record in upstream.dns_zones['example.com']) == ['A', 'MX']
+
+    again = reconciler.reconcile_zone('example.com', spec)
+    assert (again['status'], again['api_calls']) == (ZONE_UNCHANGED, 1)
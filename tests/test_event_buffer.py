@@ -0,0 +1,62 @@
+import threading
+
+from event_buffer import EventRingBuffer, tail_log_lines
+
+
+def test_recent_is_newest_first_and_bounded():
+    events = EventRingBuffer(capacity=3)
+    for number in range(5):
+        events.record('github_dispatch', 'success', commit_id=str(number))
+
+    assert len(events) == 3
+    assert [event['commit_id'] for event in events.recent(10)] == ['4', '3', '2']
+    assert [event['commit_id'] for event in events.recent(2)] == ['4', '3']
+    assert events.recent(0) == []
+    assert events.recent(-1) == []
+
+
+def test_a_kind_filter_can_return_as_many_events_as_the_buffer_holds():
+    events = EventRingBuffer(capacity=500)
+    for number in range(300):
+        events.record('github_dispatch', 'success', commit_id=str(number))
+        events.record('gitlab_trigger', 'success')
+
+    dispatches = events.recent(500, 'github_dispatch')
+    assert len(dispatches) == 300
+    assert dispatches[0]['commit_id'] == '299'
+    assert events.recent(10, 'unknown') == []
+
+
+def test_latency_and_details_are_kept():
+    events = EventRingBuffer()
+    event = events.record('gitlab_trigger', 'error', 'abc', 123.456, status_code=502)
+    assert event['upstream_latency_ms'] == 123.5
+    assert events.recent(1, 'gitlab_trigger') == [event]
+    assert event['status_code'] == 502
+
+
+def test_concurrent_writers_lose_nothing_within_capacity():
+    events = EventRingBuffer(capacity=4000)
+
+    def write(thread):
+        for number in range(500):
+            events.record(f'kind-{thread % 2}', 'success', commit_id=f'{thread}-{number}')
+
+    threads = [threading.Thread(target=write, args=(thread,)) for thread in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(events) == 4000
+    assert len(events.recent(4000, 'kind-0')) == 2000
+
+
+def test_tail_log_lines_drops_the_partial_first_line(tmp_path):
+    log_file = tmp_path / 'webhook.log'
+    log_file.write_text(''.join(f'INFO line {number:04d}\n' for number in range(1000)))
+
+    lines = tail_log_lines(str(log_file), max_bytes=100)
+    assert lines[-1] == 'INFO line 0999'
+    assert all(line.startswith('INFO line ') and len(line) == 14 for line in lines)
+    assert tail_log_lines(str(tmp_path / 'missing.log')) == []
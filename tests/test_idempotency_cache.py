@@ -0,0 +1,60 @@
+import time
+
+from idempotency_cache import IdempotencyCache, delivery_key
+
+COMMIT = 'c' * 40
+
+
+def test_delivery_key_prefers_the_event_uuid():
+    push = {'object_kind': 'push', 'ref': 'refs/heads/main', 'after': COMMIT}
+    assert delivery_key({'X-Gitlab-Event-UUID': 'abc'}, push) == 'uuid:abc'
+    assert delivery_key({}, push) == f'push:refs/heads/main:{COMMIT}'
+    pipeline = {'object_kind': 'pipeline', 'object_attributes': {'id': 7, 'status': 'success'}}
+    assert delivery_key({}, pipeline) == 'pipeline:7:success'
+    assert delivery_key({}, {'object_kind': 'note'}) is None
+    assert delivery_key({}, None) is None
+
+
+def test_cached_responses_expire_after_the_ttl():
+    cache = IdempotencyCache(ttl=0.05)
+    cache.put('key', {'status': 'success'}, 202)
+    assert cache.get('key') == ({'status': 'success'}, 202)
+    assert cache.get(None) is None
+
+    time.sleep(0.1)
+    assert cache.get('key') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 0)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = IdempotencyCache(max_entries=2)
+    cache.put('a', 'A')
+    cache.put('b', 'B')
+    cache.get('a')
+    cache.put('c', 'C')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == ('A', 200)
+    assert cache.get('c') == ('C', 200)
+
+
+def test_entries_survive_a_restart_with_a_db_path(tmp_path):
+    db_path = str(tmp_path / 'idempotency.db')
+    cache = IdempotencyCache(db_path=db_path)
+    cache.put('kept', {'job_id': 'job-1'}, 202)
+    short = IdempotencyCache(ttl=0.01, db_path=db_path)
+    short.put('expired', {'job_id': 'job-2'})
+    time.sleep(0.05)
+
+    restarted = IdempotencyCache(db_path=db_path)
+    assert restarted.stats()['persistent'] is True
+    assert restarted.get('kept') == ({'job_id': 'job-1'}, 202)
+    assert restarted.get('expired') is None
+
+
+def test_an_unusable_db_path_falls_back_to_memory(tmp_path):
+    cache = IdempotencyCache(db_path=str(tmp_path / 'missing' / 'idempotency.db'))
+    cache.put('key', 'body')
+    assert cache.stats()['persistent'] is False
+    assert cache.get('key') == ('body', 200)
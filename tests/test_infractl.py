@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+import uuid
+
+import pytest
+
+from conftest import ROOT_DIR
+from fake_upstream import FakeUpstream
+
+INFRACTL = os.path.join(ROOT_DIR, 'tools', 'infractl')
+WRAPPER = os.path.join(ROOT_DIR, 'update_godaddy_dns.py')
+RECORDS = [{'type': 'A', 'name': '@', 'data': '192.0.2.10'},
+           {'type': 'CNAME', 'name': 'www', 'data': 'example.github.io'}]
+
+
+@pytest.fixture
+def upstream():
+    upstream = FakeUpstream().start()
+    upstream.dns_zones['example.com'] = [{'type': 'MX', 'name': '@', 'data': 'mail.example.com', 'ttl': 600,
+                                          'priority': 10}]
+    yield upstream
+    upstream.stop()
+
+
+@pytest.fixture
+def zones(tmp_path):
+    path = tmp_path / 'zones.json'
+    path.write_text(json.dumps({'accounts': {'default': {'calls_per_minute': 6000, 'burst': 10}},
+                                'domains': {'example.com': {'records': RECORDS}}}))
+    return str(path)
+
+
+def run(command, cwd, upstream=None, credentials=True):
+    """Run a CLI from cwd (not the repo root) with its output parsed as JSON where it is JSON"""
+    env = {name: value for name, value in os.environ.items()
+           if name not in ('GODADDY_API_KEY', 'GODADDY_API_SECRET', 'CI')}
+    if credentials:
+        env.update(GODADDY_API_KEY=uuid.uuid4().hex, GODADDY_API_SECRET='secret')
+    if upstream is not None:
+        env['GODADDY_API_URL'] = upstream.url
+    completed = subprocess.run([sys.executable] + command, cwd=cwd, env=env, capture_output=True, text=True,
+                               timeout=60)
+    try:
+        output = json.loads(completed.stdout)
+    except ValueError:
+        output = completed.stdout
+    return completed.returncode, output
+
+
+def test_plan_runs_from_any_directory_and_writes_nothing(upstream, zones, tmp_path):
+    status, summary = run([INFRACTL, 'plan', '--json', '--config', zones], tmp_path, upstream)
+
+    assert status == 0
+    [result] = summary['results']
+    assert result['status'] == 'planned'
+    assert {(change['type'], change['name']) for change in result['changes']} == {('A', '@'), ('CNAME', 'www')}
+    assert [record['type'] for record in upstream.dns_zones['example.com']] == ['MX']
+
+
+def test_apply_writes_only_the_differing_sets_then_plans_clean(upstream, zones, tmp_path):
+    status, applied = run([INFRACTL, 'apply', '--yes', '--json', '--config', zones], tmp_path, upstream)
+    assert status == 0
+    assert applied['summary']['by_status'] == {'updated': 1}
+    assert sorted(record['type'] for record in upstream.dns_zones['example.com']) == ['A', 'CNAME', 'MX']
+
+    status, summary = run([INFRACTL, 'plan', '--json', '--config', zones], tmp_path, upstream)
+    assert status == 0
+    assert summary['by_status'] == {'unchanged': 1}
+
+
+def test_usage_errors_exit_2_with_a_json_error(upstream, zones, tmp_path):
+    status, output = run([INFRACTL, 'plan', '--json', '--config', zones], tmp_path, upstream, credentials=False)
+    assert status == 2
+    assert 'credentials' in output['error']
+
+    status, output = run([INFRACTL, 'apply', '--json', '--config', zones], tmp_path, upstream)
+    assert status == 2
+    assert '--yes' in output['error']
+
+    status, output = run([INFRACTL, 'plan', '--json', '--config', str(tmp_path / 'missing.yaml')], tmp_path)
+    assert status == 2
+    assert 'Invalid config' in output['error']
+
+
+def test_unknown_domain_is_a_usage_error(zones, tmp_path):
+    status, output = run([INFRACTL, 'show', '--json', '--config', zones, '--domain', 'other.com'], tmp_path)
+    assert status == 2
+    assert 'other.com' in output['error']
+
+
+def test_compatibility_wrapper_applies_from_any_directory(upstream, zones, tmp_path):
+    status, output = run([WRAPPER, '--full-replace'], tmp_path, upstream)
+    assert status == 2
+    assert 'no longer supported' in output
+
+    status, applied = run([WRAPPER, '--auto-confirm', '--json', '--config', zones], tmp_path, upstream)
+    assert status == 0
+    assert applied['summary']['by_status'] == {'updated': 1}
@@ -0,0 +1,76 @@
+import json
+import os
+
+from metrics import MetricsRegistry
+
+DEAD_PID = 2 ** 22 + 1
+
+
+def registry_with_series(tmp_path=None):
+    registry = MetricsRegistry(multiproc_dir=str(tmp_path) if tmp_path else None)
+    registry.counter('webhook_requests_total', 'Webhook requests')
+    registry.gauge('dispatch_queue_depth', 'Jobs waiting for a worker')
+    registry.histogram('upstream_seconds', 'Upstream latency', buckets=(0.1, 1.0))
+    return registry
+
+
+def write_snapshot(tmp_path, pid, snapshot):
+    (tmp_path / f'metrics-{pid}.json').write_text(json.dumps(snapshot))
+
+
+def test_render_cumulates_histogram_buckets():
+    registry = registry_with_series()
+    registry.inc('webhook_requests_total', {'event': 'push'})
+    registry.inc('webhook_requests_total', {'event': 'push'}, 2)
+    registry.set('dispatch_queue_depth', 3)
+    for seconds in (0.05, 0.5, 5):
+        registry.observe('upstream_seconds', seconds, {'target': 'github'})
+
+    text = registry.render()
+    assert 'webhook_requests_total{event="push"} 3' in text
+    assert 'dispatch_queue_depth 3' in text
+    assert 'upstream_seconds_bucket{target="github",le="0.1"} 1' in text
+    assert 'upstream_seconds_bucket{target="github",le="1"} 2' in text
+    assert 'upstream_seconds_bucket{target="github",le="+Inf"} 3' in text
+    assert 'upstream_seconds_count{target="github"} 3' in text
+    assert '# TYPE upstream_seconds histogram' in text
+
+
+def test_render_merges_other_workers_and_drops_dead_workers_gauges(tmp_path):
+    registry = registry_with_series(tmp_path)
+    registry.inc('webhook_requests_total', {'event': 'push'})
+    registry.set('dispatch_queue_depth', 1)
+    registry.observe('upstream_seconds', 0.05)
+    other = {'webhook_requests_total': [[[['event', 'push']], 4]],
+             'dispatch_queue_depth': [[[], 2]],
+             'upstream_seconds': [[[], [0, 1, 0, 0.5]]]}
+    write_snapshot(tmp_path, os.getppid(), other)
+    write_snapshot(tmp_path, DEAD_PID, other)
+    (tmp_path / 'metrics-garbage.json').write_text('{')
+
+    text = registry.render()
+    assert 'webhook_requests_total{event="push"} 9' in text
+    # The dead worker's requests still happened, but its queue depth is gone
+    assert 'dispatch_queue_depth 3' in text
+    assert 'upstream_seconds_count 3' in text
+    assert 'upstream_seconds_bucket{le="0.1"} 1' in text
+
+
+def test_flush_writes_this_workers_snapshot(tmp_path):
+    registry = registry_with_series(tmp_path)
+    registry.inc('webhook_requests_total')
+    registry.flush()
+
+    snapshot = json.loads((tmp_path / f'metrics-{os.getpid()}.json').read_text())
+    assert snapshot['webhook_requests_total'] == [[[], 1]]
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_a_named_collector_replaces_the_previous_one():
+    registry = registry_with_series()
+    registry.register_collector(lambda: registry.inc('webhook_requests_total'), name='requests')
+    registry.register_collector(lambda: registry.set('dispatch_queue_depth', 7), name='requests')
+
+    text = registry.render()
+    assert 'dispatch_queue_depth 7' in text
+    assert 'webhook_requests_total 1' not in text
@@ -0,0 +1,145 @@
+import uuid
+
+import pytest
+
+from fake_upstream import FakeUpstream
+from upstream_client import UpstreamClient
+from dns_reconciler import DnsReconciler, normalize_config, ZONE_UNCHANGED
+from origin_prober import FailoverController, ProbeSeries
+
+GITLAB = [{'type': 'A', 'name': '@', 'data': '35.185.44.232'}]
+GITHUB = [{'type': 'A', 'name': '@', 'data': f'185.199.{n}.153'} for n in (108, 109)]
+WWW = [{'type': 'CNAME', 'name': 'www', 'data': 'peacefulrobot.github.io'}]
+
+RAW_CONFIG = {
+    'accounts': {'default': {'calls_per_minute': 6000, 'burst': 100}},
+    'targets': {'gitlab_pages': GITLAB, 'github_pages': GITHUB, 'www': WWW},
+    'domains': {'example.com': {'targets': ['gitlab_pages', 'www']}},
+    'failover': {
+        'domain': 'example.com', 'fail_threshold': 2, 'recover_threshold': 3, 'min_hold': 0,
+        'pools': [
+            {'name': 'gitlab_pages', 'target': 'gitlab_pages', 'probe': 'https://gitlab.example/'},
+            {'name': 'github_pages', 'target': 'github_pages', 'probe': 'https://github.example/'}
+        ]
+    }
+}
+
+
+class ProbeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def close(self):
+        pass
+
+
+class ProbeClient:
+    """Origins answer 200 while healthy and refuse the connection otherwise"""
+
+    def __init__(self):
+        self.healthy = {'https://gitlab.example/': True, 'https://github.example/': True}
+
+    def get(self, url, **kwargs):
+        if not self.healthy[url]:
+            raise ConnectionError(f'{url} refused the connection')
+        return ProbeResponse(200)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    monkeypatch.setenv('GODADDY_API_KEY', uuid.uuid4().hex)
+    upstream = FakeUpstream().start()
+    upstream.dns_zones['example.com'] = [dict(record, ttl=600) for record in GITLAB + WWW]
+    yield upstream
+    upstream.stop()
+
+
+@pytest.fixture
+def config():
+    return normalize_config(RAW_CONFIG)
+
+
+def reconciler_for(upstream, config):
+    client = UpstreamClient(max_retries=0, breaker_failures=0)
+    return DnsReconciler(config, api_url=upstream.url, http_client=client)
+
+
+@pytest.fixture
+def controller(upstream, config):
+    controller = FailoverController(config, http_client=ProbeClient(), reconciler=reconciler_for(upstream, config))
+    controller.start_from_dns()
+    return controller
+
+
+def apex(upstream):
+    return sorted(record['data'] for record in upstream.dns_zones['example.com'] if record['name'] == '@')
+
+
+def test_series_tracks_streaks_and_wraps():
+    series = ProbeSeries(capacity=4)
+    for ok in (True, True, False, True, True, True):
+        series.append(0.0, 10.0, ok)
+    assert series.count == 4
+    assert series.availability() == 0.75
+    assert series.consecutive_successes == 3
+    assert series.consecutive_failures == 0
+
+
+def test_apply_leaves_the_failover_record_sets_to_the_prober(config):
+    assert config['domains']['example.com']['records'] == [dict(WWW[0], ttl=600)]
+    assert config['domains']['example.com']['failover_sets'] == [('A', '@')]
+
+
+def test_reconciling_the_config_does_not_undo_a_failover(controller, upstream, config):
+    controller.switch_to(controller.origins[1], 'test')
+    assert apex(upstream) == ['185.199.108.153', '185.199.109.153']
+
+    result = reconciler_for(upstream, config).reconcile_zone('example.com', config['domains']['example.com'])
+
+    assert result['status'] == ZONE_UNCHANGED
+    assert apex(upstream) == ['185.199.108.153', '185.199.109.153']
+
+
+def test_failover_waits_for_the_standby_to_pass_recover_threshold_probes(controller, upstream):
+    assert controller.active.name == 'gitlab_pages'
+    controller.http.healthy['https://gitlab.example/'] = False
+    controller.http.healthy['https://github.example/'] = False
+    controller.step()
+    controller.step()
+
+    # The active origin is down, but one good probe of the standby is not enough
+    controller.http.healthy['https://github.example/'] = True
+    controller.step()
+    controller.step()
+    assert controller.active.name == 'gitlab_pages'
+    assert apex(upstream) == ['35.185.44.232']
+
+    controller.step()
+    assert controller.active.name == 'github_pages'
+    assert apex(upstream) == ['185.199.108.153', '185.199.109.153']
+    assert controller.switches[-1]['reason'] == 'gitlab_pages failed 5 probes'
+
+
+def test_stays_put_when_no_origin_is_healthy(controller, upstream):
+    controller.http.healthy['https://gitlab.example/'] = False
+    controller.http.healthy['https://github.example/'] = False
+    for _ in range(5):
+        controller.step()
+    assert controller.active.name == 'gitlab_pages'
+    assert controller.switches == []
+
+
+def test_fails_back_once_the_preferred_origin_is_stable(controller, upstream):
+    controller.http.healthy['https://gitlab.example/'] = False
+    for _ in range(3):
+        controller.step()
+    assert controller.active.name == 'github_pages'
+
+    controller.http.healthy['https://gitlab.example/'] = True
+    controller.step()
+    controller.step()
+    assert controller.active.name == 'github_pages'
+    controller.step()
+    assert controller.active.name == 'gitlab_pages'
+    assert apex(upstream) == ['35.185.44.232']
+    assert controller.switches[-1]['reason'] == 'gitlab_pages recovered'
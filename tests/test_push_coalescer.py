@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+
+from dispatch_queue import QueueFullError
+from push_coalescer import PushCoalescer, parse_windows
+
+
+class Dispatcher:
+    """Records dispatched payloads; fails while `failing` is set"""
+
+    def __init__(self):
+        self.payloads = []
+        self.failing = False
+        self.dispatched = threading.Event()
+
+    def __call__(self, payload):
+        if self.failing:
+            raise QueueFullError('Dispatch queue is full (1 jobs)')
+        self.payloads.append(payload)
+        self.dispatched.set()
+        return f'job-{len(self.payloads)}'
+
+    def commits(self):
+        return [payload['commit_id'] for payload in self.payloads]
+
+
+def push(coalescer, commit, key='refs/heads/main'):
+    return coalescer.submit('content_updated', key, {'commit_id': commit})
+
+
+@pytest.fixture
+def dispatcher():
+    return Dispatcher()
+
+
+def test_parse_windows():
+    assert parse_windows('content_updated=30, other=0.5,') == {'content_updated': 30.0, 'other': 0.5}
+
+
+def test_a_lone_push_is_dispatched_without_waiting_for_the_window(dispatcher):
+    coalescer = PushCoalescer(dispatcher, windows={'content_updated': 30})
+
+    batch = push(coalescer, 'a')
+
+    assert dispatcher.commits() == ['a']
+    assert batch.job_id == 'job-1'
+    assert coalescer.stats()['pending_batches'] == 0
+    coalescer.flush_all()
+
+
+def test_pushes_inside_the_window_share_one_trailing_dispatch(dispatcher):
+    coalescer = PushCoalescer(dispatcher, windows={'content_updated': 0.2})
+
+    push(coalescer, 'a')
+    trailing = push(coalescer, 'b')
+    assert push(coalescer, 'c') is trailing
+    assert push(coalescer, 'x', key='refs/heads/other').job_id is not None
+    assert dispatcher.commits() == ['a', 'x']
+
+    time.sleep(0.35)
+    assert dispatcher.commits() == ['a', 'x', 'c']
+    assert dispatcher.payloads[-1]['superseded_commits'] == ['b']
+    assert dispatcher.payloads[-1]['coalesced_pushes'] == 2
+    assert coalescer.stats()['dispatches_saved'] == 1
+    assert coalescer.get_batch(trailing.id)['job_id'] == 'job-3'
+    coalescer.flush_all()
+
+
+def test_a_steady_stream_dispatches_once_per_window(dispatcher):
+    coalescer = PushCoalescer(dispatcher, windows={'content_updated': 0.2})
+    deadline = time.monotonic() + 0.9
+    number = 0
+    while time.monotonic() < deadline:
+        push(coalescer, str(number))
+        number += 1
+        time.sleep(0.02)
+    coalescer.flush_all()
+
+    assert 4 <= len(dispatcher.payloads) <= 7
+    assert dispatcher.commits()[-1] == str(number - 1)
+
+
+def test_no_window_dispatches_inline_and_raises_queue_errors(dispatcher):
+    coalescer = PushCoalescer(dispatcher)
+    dispatcher.failing = True
+    with pytest.raises(QueueFullError):
+        push(coalescer, 'a')
+
+
+def test_a_failed_leading_dispatch_leaves_no_window_open(dispatcher):
+    coalescer = PushCoalescer(dispatcher, windows={'content_updated': 30})
+    dispatcher.failing = True
+    with pytest.raises(QueueFullError):
+        push(coalescer, 'a')
+
+    dispatcher.failing = False
+    # GitLab's redelivery goes out straight away again
+    assert push(coalescer, 'a').job_id == 'job-1'
+    coalescer.flush_all()
+
+
+def test_a_failed_timer_flush_is_retried_not_lost(dispatcher):
+    coalescer = PushCoalescer(dispatcher, windows={'content_updated': 0.1})
+    push(coalescer, 'a')
+    push(coalescer, 'b')
+    dispatcher.failing = True
+    dispatcher.dispatched.clear()
+
+    time.sleep(0.2)
+    assert dispatcher.commits() == ['a']
+    assert coalescer.stats()['pending_batches'] == 1
+
+    # A push during the backoff rides along with the retry
+    push(coalescer, 'c')
+    dispatcher.failing = False
+    assert dispatcher.dispatched.wait(3)
+    assert dispatcher.commits() == ['a', 'c']
+    assert dispatcher.payloads[-1]['superseded_commits'] == ['b']
+    coalescer.flush_all()
+
+
+def test_flush_all_sends_pending_batches_and_stops_timers(dispatcher):
+    coalescer = PushCoalescer(dispatcher, windows={'content_updated': 30})
+    push(coalescer, 'a')
+    push(coalescer, 'b')
+
+    coalescer.flush_all()
+
+    assert dispatcher.commits() == ['a', 'b']
+    assert coalescer.stats()['pending_batches'] == 0
+    # The window is closed too, so the next push is a leading edge again
+    assert push(coalescer, 'c').job_id == 'job-3'
+    coalescer.flush_all()
@@ -0,0 +1,59 @@
+import pytest
+
+import rate_limiter
+from rate_limiter import GCRALimiter
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'time', clock.time)
+    return clock
+
+
+def admissions(limiter, clock, start, seconds, step=0.1):
+    """Hammer try_acquire every `step` seconds over [start, start + seconds); returns the admit times"""
+    admitted = []
+    ticks = int(round(seconds / step))
+    for tick in range(ticks):
+        clock.now = start + tick * step
+        if limiter.try_acquire():
+            admitted.append(clock.now)
+    return admitted
+
+
+def busiest_window(times, period):
+    return max(sum(1 for t in times if start <= t < start + period) for start in times)
+
+
+def test_default_burst_never_exceeds_rate_in_any_window(clock):
+    limiter = GCRALimiter(30, 60.0)
+    admitted = admissions(limiter, clock, clock.now, 180)
+
+    assert len([t for t in admitted if t < clock.now - 120]) == 30  # the first full minute
+    assert busiest_window(admitted, 60.0) <= 30
+
+
+def test_explicit_burst_goes_out_at_once_then_paces(clock):
+    limiter = GCRALimiter(30, 60.0, burst=5)
+    start = clock.now
+
+    assert [limiter.try_acquire() for _ in range(6)] == [True] * 5 + [False]
+    assert limiter.retry_after() == pytest.approx(2.0)
+
+    admitted = [start] * 5 + admissions(limiter, clock, start + 0.1, 59.8)
+    # The burst only borrows burst - 1 slots from the steady rate
+    assert busiest_window(admitted, 60.0) == 30 + 5 - 1
+
+
+def test_burst_must_be_positive():
+    with pytest.raises(ValueError):
+        GCRALimiter(30, 60.0, burst=0)
@@ -0,0 +1,70 @@
+import pytest
+
+from record_validator import RecordValidationError, check_zones, validate_zone, validate_zones
+
+GOOD = [{'type': 'A', 'name': '@', 'data': '192.0.2.1', 'ttl': 600},
+        {'type': 'AAAA', 'name': '@', 'data': '2001:db8::1', 'ttl': 600},
+        {'type': 'CNAME', 'name': 'www', 'data': 'example.github.io.', 'ttl': 600},
+        {'type': 'MX', 'name': '@', 'data': 'mail.example.com', 'ttl': 600, 'priority': 10},
+        {'type': 'SRV', 'name': '_sip._tcp', 'data': 'sip.example.com', 'ttl': 600,
+         'priority': 10, 'weight': 5, 'port': 5060},
+        {'type': 'TXT', 'name': '@', 'data': 'v=spf1 -all', 'ttl': 600}]
+
+
+def codes(issues):
+    return [issue.code for issue in issues]
+
+
+def test_a_valid_zone_has_no_issues():
+    assert validate_zone('example.com', GOOD) == []
+    check_zones({'example.com': GOOD})
+
+
+@pytest.mark.parametrize('value, valid', [
+    ('2001:db8::1', True),
+    ('::ffff:192.0.2.1', True),
+    ('2001:db8::g', False),
+    ('192.0.2.1', False),
+    ('2001:db8:::1', False),
+])
+def test_aaaa_data_must_be_ipv6(value, valid):
+    issues = validate_zone('example.com', [{'type': 'AAAA', 'name': '@', 'data': value, 'ttl': 600}])
+    assert codes(issues) == ([] if valid else ['invalid_ipv6'])
+
+
+def test_every_issue_is_reported_at_once():
+    records = [{'type': 'A', 'name': '@', 'data': '256.0.0.1', 'ttl': 600},
+               {'type': 'A', 'name': 'api', 'data': '192.0.2.1', 'ttl': 60},
+               {'type': 'MX', 'name': '@', 'data': 'mail.example.com', 'ttl': 600},
+               {'type': 'SPF', 'name': '@', 'data': 'v=spf1'},
+               {'type': 'TXT', 'name': '@', 'data': 'x' * 256, 'ttl': 600},
+               {'type': 'CNAME', 'name': 'bad name', 'data': 'example.com', 'ttl': 600}]
+
+    assert codes(validate_zone('example.com', records)) == [
+        'invalid_ipv4', 'invalid_ttl', 'invalid_priority', 'invalid_type', 'txt_too_long', 'invalid_name']
+
+
+def test_cname_conflicts_and_duplicates():
+    records = [{'type': 'CNAME', 'name': '@', 'data': 'example.github.io', 'ttl': 600},
+               {'type': 'CNAME', 'name': 'www', 'data': 'a.example.net', 'ttl': 600},
+               {'type': 'CNAME', 'name': 'WWW', 'data': 'b.example.net', 'ttl': 600},
+               {'type': 'TXT', 'name': 'www', 'data': 'verify', 'ttl': 600},
+               {'type': 'A', 'name': 'api', 'data': '192.0.2.1', 'ttl': 600},
+               {'type': 'A', 'name': 'API', 'data': '192.0.2.1', 'ttl': 600}]
+
+    issues = validate_zone('example.com', records)
+    assert codes(issues) == ['cname_at_apex', 'multiple_cname', 'duplicate', 'cname_conflict']
+    assert issues[-1].name == 'www'
+    assert 'TXT' in issues[-1].message
+
+
+def test_check_zones_raises_with_issues_from_every_zone():
+    zones = {'example.com': [{'type': 'A', 'name': '@', 'data': 'example.com', 'ttl': 600}],
+             'not a domain': GOOD}
+    assert len(validate_zones(zones)) == 2
+
+    with pytest.raises(RecordValidationError) as raised:
+        check_zones(zones)
+    assert len(raised.value.issues) == 2
+    assert 'example.com #0 A @' in str(raised.value)
+    assert 'invalid_domain' in str(raised.value)
@@ -0,0 +1,85 @@
+import os
+
+import secret_scanner
+import security_check
+from secret_scanner import scan, scan_file
+
+# Built at runtime so this file does not trip the scanner itself
+GITHUB_TOKEN = 'ghp' + '_' + 'a1B2c3D4e5F6' * 3
+AWS_KEY = 'AKIA' + 'Q3X7Z2K9W4M8P6R1'
+RANDOM_VALUE = 'q8Zr3Tn0Vx5Lk2Wp7Ys4'
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_known_tokens_are_reported_by_line_and_redacted(tmp_path):
+    path = write(tmp_path / 'settings.py', '\n'.join([
+        'import os',
+        f'GITHUB = "{GITHUB_TOKEN}"',
+        f'aws_key = {AWS_KEY}',
+        '-----BEGIN RSA ' + 'PRIVATE KEY-----',
+    ]))
+
+    assert scan_file(path) == [(2, 'github_token', 'ghp_********'),
+                               (3, 'aws_access_key', 'AKIA********'),
+                               (4, 'private_key', '----********')]
+
+
+def test_assignments_need_a_random_looking_value(tmp_path):
+    path = write(tmp_path / 'config.yml', '\n'.join([
+        f"api_key: '{RANDOM_VALUE}'",
+        "api_key: 'your_api_key_goes_here'",
+        "password: 'aaaaaaaaaaaaaaaaaaaa'",
+        f"token = '{GITHUB_TOKEN}'",
+        f"api_key: '{RANDOM_VALUE}'  # secret-scan: allow",
+    ]))
+
+    assert [(line, rule) for line, rule, _ in scan_file(path)] == [(1, 'generic_secret'), (4, 'github_token')]
+
+
+def test_binary_and_empty_files_are_skipped(tmp_path):
+    (tmp_path / 'image.png').write_bytes(b'\x89PNG\0' + GITHUB_TOKEN.encode())
+    (tmp_path / 'empty.txt').write_text('')
+    assert scan_file(str(tmp_path / 'image.png')) == []
+    assert scan_file(str(tmp_path / 'empty.txt')) == []
+
+
+def test_warm_scans_only_rescan_changed_files(tmp_path):
+    write(tmp_path / 'clean.txt', 'nothing to see\n')
+    leaky = tmp_path / 'leaky.env'
+    write(leaky, f'GITHUB={GITHUB_TOKEN}\n')
+    (tmp_path / 'node_modules').mkdir()
+    write(tmp_path / 'node_modules' / 'vendored.js', f'"{GITHUB_TOKEN}"')
+
+    cold = scan(str(tmp_path), '.cache.json', workers=1)
+    assert (cold['files'], cold['scanned']) == (2, 2)
+    assert [finding['path'] for finding in cold['findings']] == ['leaky.env']
+
+    warm = scan(str(tmp_path), '.cache.json', workers=1)
+    assert warm['scanned'] == 0
+    assert warm['findings'] == cold['findings']
+
+    write(leaky, 'GITHUB=\n')
+    os.utime(leaky, ns=(0, 0))
+    changed = scan(str(tmp_path), '.cache.json', workers=1)
+    assert changed['scanned'] == 1
+    assert changed['findings'] == []
+
+
+def test_a_rules_change_invalidates_the_cache(tmp_path, monkeypatch):
+    write(tmp_path / 'clean.txt', 'nothing to see\n')
+    scan(str(tmp_path), '.cache.json', workers=1)
+    monkeypatch.setattr(secret_scanner, 'RULES_VERSION', 'changed')
+    assert scan(str(tmp_path), '.cache.json', workers=1)['scanned'] == 1
+
+
+def test_security_check_fails_on_a_leaked_secret(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write(tmp_path / 'README.md', 'docs only\n')
+    assert security_check.check_secrets() is True
+
+    write(tmp_path / 'deploy.sh', f'export GITHUB_TOKEN={GITHUB_TOKEN}\n')
+    assert security_check.check_secrets() is False
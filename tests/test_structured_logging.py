@@ -0,0 +1,82 @@
+import gzip
+import json
+import logging
+import queue
+
+from structured_logging import DroppingQueueHandler, JSONLinesFormatter, RotatingJSONFileHandler
+
+
+def make_record(message, **fields):
+    record = logging.LogRecord('webhook', logging.INFO, __file__, 1, message, None, None)
+    if fields:
+        record.fields = fields
+    return record
+
+
+def file_handler(path, **kwargs):
+    handler = RotatingJSONFileHandler(str(path), **dict({'max_bytes': 0, 'rotate_seconds': 0}, **kwargs))
+    handler.setFormatter(JSONLinesFormatter())
+    return handler
+
+
+def test_records_are_json_lines_with_their_fields():
+    entry = json.loads(JSONLinesFormatter().format(make_record('Push accepted', commit_id='abc', job_id=None)))
+    assert entry['msg'] == 'Push accepted'
+    assert entry['level'] == 'INFO'
+    assert entry['commit_id'] == 'abc'
+    assert 'job_id' not in entry
+
+
+def test_size_rotation_compresses_the_rotated_file(tmp_path):
+    log_file = tmp_path / 'webhook.log'
+    handler = file_handler(log_file, max_bytes=200, backup_count=2)
+    for number in range(10):
+        handler.handle(make_record(f'event {number}'))
+    handler.close()
+
+    rotated = sorted(path.name for path in tmp_path.iterdir())
+    assert rotated == ['webhook.log', 'webhook.log.1.gz', 'webhook.log.2.gz', 'webhook.log.lock']
+    with gzip.open(tmp_path / 'webhook.log.1.gz', 'rt') as f:
+        assert all(json.loads(line)['msg'].startswith('event ') for line in f)
+
+
+def test_time_rotation(tmp_path, monkeypatch):
+    log_file = tmp_path / 'webhook.log'
+    handler = file_handler(log_file, rotate_seconds=3600, compress=False)
+    handler.handle(make_record('before'))
+    handler.next_rollover = 0
+    handler.handle(make_record('after'))
+    handler.close()
+
+    assert json.loads((tmp_path / 'webhook.log.1').read_text())['msg'] == 'before'
+    assert json.loads(log_file.read_text())['msg'] == 'after'
+    assert handler.next_rollover > 0
+
+
+def test_a_worker_follows_a_rotation_done_by_another(tmp_path):
+    log_file = tmp_path / 'webhook.log'
+    first = file_handler(log_file, compress=False)
+    second = file_handler(log_file, compress=False)
+    first.handle(make_record('first'))
+    second.handle(make_record('second'))
+
+    first.doRollover()
+    # The sibling's own rollover sees the new file and does not rotate it a second time
+    second.doRollover()
+    second.handle(make_record('after'))
+    first.close()
+    second.close()
+
+    assert not (tmp_path / 'webhook.log.2').exists()
+    assert [json.loads(line)['msg'] for line in (tmp_path / 'webhook.log.1').read_text().splitlines()] == \
+        ['first', 'second']
+    assert json.loads(log_file.read_text())['msg'] == 'after'
+
+
+def test_a_full_queue_drops_and_counts_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(2))
+    for number in range(5):
+        handler.handle(make_record(f'event {number}'))
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
@@ -0,0 +1,134 @@
+import json
+import itertools
+
+import pytest
+
+import webhook_handler
+from fake_upstream import FakeUpstream
+from tracing import Tracer, read_spans, commit_breakdown, parse_traceparent
+from upstream_client import UpstreamClient
+from webhook_handler import WebhookHandler, process_gitlab_webhook, process_deployment_trigger
+
+COMMIT = 'a' * 40
+
+
+class InlineJob:
+    def __init__(self, job_id, result):
+        self.id = job_id
+        self.result = result
+
+
+class InlineQueue:
+    """Runs each dispatch on submit, so a test sees its upstream calls and spans straight away"""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+
+    def submit(self, name, func, *args, **kwargs):
+        return InlineJob(f'job-{next(self._ids)}', func(*args, **kwargs))
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    upstream = FakeUpstream().start()
+    monkeypatch.setattr(webhook_handler, 'GITHUB_API_URL', upstream.url)
+    monkeypatch.setattr(webhook_handler, 'GITLAB_API_URL', upstream.url)
+    yield upstream
+    upstream.stop()
+
+
+@pytest.fixture
+def traced(upstream, tmp_path):
+    """(handler, trace file, JSON bodies posted upstream) with every span written inline"""
+    client = UpstreamClient(max_retries=0, breaker_failures=0)
+    posted = []
+    post = client.post
+    client.post = lambda url, **kwargs: posted.append(kwargs.get('json')) or post(url, **kwargs)
+    handler = WebhookHandler(dispatch_queue=InlineQueue(), http_client=client)
+    handler.dead_letters = None
+    path = str(tmp_path / 'traces.jsonl')
+    handler.tracer = Tracer(path, background=False)
+    return handler, path, posted
+
+
+def deliver(handler, event, uuid):
+    body = json.dumps(event).encode()
+    return process_gitlab_webhook(handler, {'X-Gitlab-Event-UUID': uuid}, body)
+
+
+def pipeline_hook(variables):
+    """A pipeline hook as GitLab sends it: trigger variables are a [{key, value}] list"""
+    return {
+        'object_kind': 'pipeline',
+        'object_attributes': {
+            'id': 4711, 'iid': 12, 'ref': 'main', 'tag': False, 'sha': COMMIT, 'source': 'trigger',
+            'status': 'success', 'stages': ['deploy'],
+            'created_at': '2026-10-18 10:00:00 UTC', 'finished_at': '2026-10-18 10:02:30 UTC', 'duration': 150,
+            'variables': [{'key': key, 'value': value} for key, value in variables.items()]
+        },
+        'user': {'name': 'Peaceful Robot', 'username': 'peacefulrobot'},
+        'project': {'id': 1, 'name': 'peacefulrobot.com', 'path_with_namespace': 'peaceful-robot/peacefulrobot.com'},
+        'commit': {'id': COMMIT, 'message': 'Update content'},
+        'builds': [{'id': 1, 'stage': 'deploy', 'name': 'pages', 'status': 'success'}]
+    }
+
+
+def test_push_to_pipeline_completion_is_one_trace(traced):
+    handler, path, posted = traced
+    push = {'object_kind': 'push', 'ref': 'refs/heads/main', 'after': COMMIT, 'total_commits_count': 1,
+            'commits': [{'id': COMMIT, 'message': 'Update content', 'author': {'name': 'Robot'}}]}
+
+    assert deliver(handler, push, 'push-1')[1] in (200, 202)
+    handler.coalescer.flush_all()
+    client_payload = posted[-1]['client_payload']
+    # The workflow forwards client_payload.trace_id/traceparent as trigger variables
+    hook = pipeline_hook({'WEBHOOK_EVENT': 'content_updated', 'DEPLOYMENT_SOURCE': 'github_actions',
+                          'SYNC_COMMIT': COMMIT, 'TRACE_ID': client_payload['trace_id'],
+                          'TRACEPARENT': client_payload['traceparent']})
+    assert deliver(handler, hook, 'pipeline-1')[1] == 202
+    assert posted[-1]['event_type'] == 'deployment_completed'
+
+    spans = read_spans([path])
+    names = [span['name'] for span in spans]
+    for name in ('webhook.ingest', 'github.dispatch', 'gitlab.pipeline', 'github.notify_completion'):
+        assert name in names
+    assert {span['trace_id'] for span in spans} == {client_payload['trace_id']}
+    [report] = commit_breakdown(spans)
+    assert report['commit'] == COMMIT
+    assert report['end_to_end_s'] > 0
+
+
+def test_trigger_variables_carry_the_trace_into_the_pipeline_hook(traced):
+    handler, path, posted = traced
+    workflow_trace = '00-' + 'b' * 32 + '-' + 'c' * 16 + '-01'
+
+    response, status = process_deployment_trigger(handler, {'source': 'github_actions', 'commit_id': COMMIT,
+                                                            'traceparent': workflow_trace})
+    assert status == 202
+    variables = posted[-1]['variables']
+    assert parse_traceparent(variables['TRACEPARENT'])[0] == 'b' * 32
+
+    deliver(handler, pipeline_hook({'TRACE_ID': variables['TRACE_ID'], 'TRACEPARENT': variables['TRACEPARENT']}),
+            'pipeline-2')
+
+    assert {span['trace_id'] for span in read_spans([path])} == {'b' * 32}
+
+
+def test_pipeline_hook_without_trace_variables_starts_its_own_trace(traced):
+    handler, path, posted = traced
+
+    deliver(handler, pipeline_hook({'WEBHOOK_EVENT': 'content_updated'}), 'pipeline-3')
+
+    spans = read_spans([path])
+    assert len({span['trace_id'] for span in spans}) == 1
+    assert {'gitlab.pipeline', 'github.notify_completion'} <= {span['name'] for span in spans}
+
+
+def test_pipeline_span_joins_the_trace_from_the_raw_hook(traced):
+    handler, path, posted = traced
+    span = handler.tracer.start('webhook.ingest', source='gitlab')
+
+    handler.handle_gitlab_webhook(pipeline_hook({'TRACEPARENT': '00-' + 'd' * 32 + '-' + 'e' * 16 + '-01'}), span)
+    handler.tracer.export(span)
+
+    assert {span['trace_id'] for span in read_spans([path])} == {'d' * 32}
@@ -0,0 +1,115 @@
+import socket
+import asyncio
+
+import pytest
+import requests
+
+from fake_upstream import FakeUpstream
+from upstream_client import UpstreamClient, AsyncUpstreamClient
+
+DISPATCH = '/repos/peacefulrobot/peacefulrobot-infra/dispatches'
+RECORDS = '/v1/domains/example.com/records'
+
+
+@pytest.fixture
+def upstream():
+    upstream = FakeUpstream(seed=1).start()
+    yield upstream
+    upstream.stop()
+
+
+def client(**kwargs):
+    options = dict(max_retries=3, backoff_base=0, breaker_failures=0)
+    options.update(kwargs)
+    return UpstreamClient(**options)
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_get_is_retried_on_502(upstream):
+    upstream.error_rate = 1.0
+
+    assert client().get(upstream.url + RECORDS).status_code == 502
+    assert upstream.stats()['total'] == 4
+
+
+def test_post_is_not_retried_on_502(upstream):
+    upstream.error_rate = 1.0
+
+    assert client().post(upstream.url + DISPATCH, json={}).status_code == 502
+    assert upstream.stats()['total'] == 1
+
+
+def test_post_can_opt_in_to_retries(upstream):
+    upstream.error_rate = 1.0
+
+    client().request('POST', upstream.url + DISPATCH, json={}, idempotent=True)
+    assert upstream.stats()['total'] == 4
+
+
+def test_post_is_retried_when_rate_limited(upstream):
+    upstream.rate_limit_rate = 1.0
+    upstream.retry_after = 0
+
+    assert client().post(upstream.url + DISPATCH, json={}).status_code == 429
+    assert upstream.stats()['total'] == 4
+
+
+def test_post_is_retried_on_503_only_with_retry_after(upstream, monkeypatch):
+    answers = {'headers': {}}
+
+    def unavailable(method, path, body):
+        upstream.calls[('github_dispatches', 503)] += 1
+        return 503, answers['headers'], {'message': 'unavailable'}
+
+    monkeypatch.setattr(upstream, 'respond', unavailable)
+
+    client().post(upstream.url + DISPATCH, json={})
+    assert upstream.stats()['total'] == 1
+
+    answers['headers'] = {'Retry-After': '0'}
+    client().post(upstream.url + DISPATCH, json={})
+    assert upstream.stats()['total'] == 1 + 4
+
+
+def test_post_is_not_retried_after_a_read_timeout(upstream):
+    upstream.latency = 0.3
+    attempts = []
+    http = client(read_timeout=0.05)
+    http.observers.append(lambda *args: attempts.append(args))
+
+    with pytest.raises(requests.ReadTimeout):
+        http.post(upstream.url + DISPATCH, json={})
+    assert len(attempts) == 1
+
+    with pytest.raises(requests.ReadTimeout):
+        http.get(upstream.url + RECORDS)
+    assert len(attempts) == 1 + 4
+
+
+def test_post_is_retried_when_the_connection_is_refused():
+    attempts = []
+    http = client()
+    http.observers.append(lambda *args: attempts.append(args))
+
+    with pytest.raises(requests.ConnectionError):
+        http.post(f'http://127.0.0.1:{closed_port()}/trigger/pipeline', json={})
+    assert len(attempts) == 4
+
+
+def test_async_post_is_not_retried_on_502(upstream):
+    upstream.error_rate = 1.0
+
+    async def post():
+        http = AsyncUpstreamClient(max_retries=3, backoff_base=0, breaker_failures=0)
+        try:
+            return (await http.post(upstream.url + DISPATCH, json={})).status_code
+        finally:
+            await http.aclose()
+
+    assert asyncio.run(post()) == 502
+    assert upstream.stats()['total'] == 1
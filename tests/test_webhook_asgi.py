@@ -0,0 +1,213 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import webhook_asgi
+import webhook_handler
+from dead_letter import DeadLetterStore
+from dispatch_queue import AsyncDispatchQueue, QueueFullError, JOB_RUNNING, JOB_SUCCEEDED
+from fake_upstream import FakeUpstream
+
+COMMIT = 'b' * 40
+PUSH = {'object_kind': 'push', 'ref': 'refs/heads/main', 'after': COMMIT, 'total_commits_count': 1,
+        'commits': [{'id': COMMIT, 'message': 'Update content', 'author': {'name': 'Robot'}}]}
+
+
+class LoopThread:
+    """An event loop running in a background thread, as under uvicorn while other threads submit"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.errors = []
+        self.loop.set_exception_handler(lambda loop, context: self.errors.append(context))
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def run(self, coroutine, timeout=5):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+
+@pytest.fixture
+def loop_thread():
+    loop_thread = LoopThread()
+    yield loop_thread
+    loop_thread.close()
+
+
+def test_submits_from_other_threads_respect_the_bound(loop_thread):
+    dispatch_queue = AsyncDispatchQueue(concurrency=1, max_queue_size=5)
+    gate = asyncio.Event()
+
+    async def start():
+        dispatch_queue.start()
+
+    async def blocker():
+        await gate.wait()
+        return True
+
+    async def job():
+        return True
+
+    loop_thread.run(start())
+    running = dispatch_queue.submit('blocker', blocker)
+    while dispatch_queue.get_job(running.id)['state'] != JOB_RUNNING:
+        time.sleep(0.01)
+    # A busy loop: puts from other threads cannot land until it gets round to them
+    loop_thread.loop.call_soon_threadsafe(time.sleep, 0.3)
+    accepted, rejected = [], []
+    barrier = threading.Barrier(4)
+
+    def submit_many():
+        barrier.wait()
+        for _ in range(5):
+            try:
+                accepted.append(dispatch_queue.submit('job', job))
+            except QueueFullError:
+                rejected.append(True)
+
+    threads = [threading.Thread(target=submit_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(accepted) == 5
+    assert len(rejected) == 15
+
+    async def release():
+        gate.set()
+        await dispatch_queue.join()
+
+    loop_thread.run(release())
+    loop_thread.run(dispatch_queue.stop())
+    assert loop_thread.errors == []
+    assert [dispatch_queue.get_job(job.id)['state'] for job in accepted] == [JOB_SUCCEEDED] * len(accepted)
+    assert dispatch_queue.depth() == 0
+
+
+def test_submit_after_the_loop_closed_is_rejected_not_left_queued():
+    dispatch_queue = AsyncDispatchQueue(concurrency=1, max_queue_size=5)
+    loop_thread = LoopThread()
+
+    async def start():
+        dispatch_queue.start()
+
+    async def crash():
+        # The loop dies without a clean shutdown, so the queue still counts as started
+        for task in dispatch_queue._threads:
+            task.cancel()
+        await asyncio.gather(*dispatch_queue._threads, return_exceptions=True)
+
+    loop_thread.run(start())
+    loop_thread.run(crash())
+    loop_thread.close()
+
+    async def job():
+        return True
+
+    with pytest.raises(QueueFullError):
+        dispatch_queue.submit('job', job)
+    assert dispatch_queue.depth() == 0
+    assert dispatch_queue.stats()['queued'] == 0
+
+
+@pytest.fixture
+def upstream(monkeypatch, tmp_path):
+    upstream = FakeUpstream().start()
+    monkeypatch.setattr(webhook_handler, 'GITHUB_API_URL', upstream.url)
+    monkeypatch.setattr(webhook_handler, 'GITLAB_API_URL', upstream.url)
+    monkeypatch.setattr(webhook_handler, 'GITHUB_TOKEN', 'test-token')
+    handler = webhook_asgi.AsyncWebhookHandler()
+    handler.dead_letters = DeadLetterStore(str(tmp_path / 'dead_letters.db'))
+    monkeypatch.setattr(webhook_asgi, 'async_handler', handler)
+    yield upstream
+    for timer in list(handler._replay_timers.values()):
+        timer.cancel()
+    upstream.stop()
+
+
+async def request(method, path, body=b'', headers=()):
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'headers': list(headers)}
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await webhook_asgi.app(scope, receive, send)
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+async def serving(scenario):
+    """Run the ASGI lifespan around scenario(), like uvicorn does"""
+    inbox, outbox = asyncio.Queue(), asyncio.Queue()
+    lifespan = asyncio.create_task(webhook_asgi.app({'type': 'lifespan'}, inbox.get, outbox.put))
+    await inbox.put({'type': 'lifespan.startup'})
+    assert (await outbox.get())['type'] == 'lifespan.startup.complete'
+    try:
+        return await scenario()
+    finally:
+        await inbox.put({'type': 'lifespan.shutdown'})
+        await outbox.get()
+        await lifespan
+
+
+def test_push_is_dispatched_and_redelivery_answered_from_cache(upstream):
+    headers = [(b'x-gitlab-event-uuid', b'delivery-1'), (b'content-type', b'application/json')]
+
+    async def scenario():
+        first = await request('POST', '/webhook/gitlab', json.dumps(PUSH).encode(), headers)
+        again = await request('POST', '/webhook/gitlab', json.dumps(PUSH).encode(), headers)
+        webhook_asgi.async_handler.coalescer.flush_all()
+        await webhook_asgi.async_handler.dispatch_queue.join()
+        return first, again
+
+    first, again = asyncio.run(serving(scenario))
+
+    assert first[0] in (200, 202)
+    assert again[1]['duplicate'] is True
+    assert upstream.stats()['total'] == 1
+
+
+def test_store_calls_run_off_the_event_loop(upstream):
+    upstream.error_rate = 1.0
+    handler = webhook_asgi.async_handler
+    threads = {}
+
+    def spy(name, func):
+        def wrapper(*args, **kwargs):
+            threads.setdefault(name, set()).add(threading.get_ident())
+            return func(*args, **kwargs)
+        return wrapper
+
+    handler.idempotency.get = spy('idempotency', handler.idempotency.get)
+    handler.dead_letters.add = spy('dead_letters', handler.dead_letters.add)
+    handler.dead_letters.stats = spy('status', handler.dead_letters.stats)
+    loop_ids = set()
+
+    async def scenario():
+        loop_ids.add(threading.get_ident())
+        await request('POST', '/webhook/gitlab', json.dumps(PUSH).encode(), [(b'x-gitlab-event-uuid', b'delivery-2')])
+        handler.coalescer.flush_all()
+        await handler.dispatch_queue.join()
+        status = await request('GET', '/status')
+        return status
+
+    status = asyncio.run(serving(scenario))
+
+    assert status[0] == 200
+    assert status[1]['dead_letters']['pending'] == 1
+    assert set(threads) == {'idempotency', 'dead_letters', 'status'}
+    for name, idents in threads.items():
+        assert not idents & loop_ids, f'{name} ran on the event loop'
@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+import webhook_handler
+from event_buffer import EventRingBuffer
+
+NON_OBJECTS = ['[1, 2]', '"x"', '3', 'true']
+
+
+@pytest.fixture
+def client():
+    return webhook_handler.app.test_client()
+
+
+@pytest.mark.parametrize('body', NON_OBJECTS)
+def test_gitlab_webhook_rejects_non_object_json(client, body):
+    response = client.post('/webhook/gitlab', data=body, content_type='application/json')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid JSON payload'}
+
+
+@pytest.mark.parametrize('body', NON_OBJECTS)
+def test_trigger_rejects_non_object_json(client, body):
+    response = client.post('/trigger/deployment', data=body, content_type='application/json')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid JSON payload'}
+
+
+def test_gitlab_webhook_still_accepts_an_object(client):
+    body = json.dumps({'object_kind': 'tag_push'})
+    response = client.post('/webhook/gitlab', data=body, content_type='application/json')
+
+    assert response.status_code == 200
+
+
+@pytest.fixture
+def cold_start(monkeypatch, tmp_path):
+    """No events in memory yet, so /status falls back to the log tail"""
+    log_file = tmp_path / 'webhook.log'
+    log_file.write_text(''.join(f'{{"level": "INFO", "message": "event {number}"}}\n' for number in range(5)))
+    monkeypatch.setattr(webhook_handler, 'LOG_FILE', str(log_file))
+    monkeypatch.setattr(webhook_handler.get_webhook_handler(), 'webhook_events', EventRingBuffer(capacity=10))
+
+
+@pytest.mark.parametrize('limit', [0, -3])
+def test_status_limit_of_zero_or_less_returns_no_events_on_cold_start(client, cold_start, limit):
+    response = client.get(f'/status?limit={limit}')
+
+    assert response.status_code == 200
+    assert response.get_json()['recent_events'] == []
+
+
+def test_status_limit_takes_the_newest_log_lines_on_cold_start(client, cold_start):
+    events = client.get('/status?limit=2').get_json()['recent_events']
+
+    assert [json.loads(line)['message'] for line in events] == ['event 4', 'event 3']
+
+
+def test_importing_the_servers_opens_no_stores(tmp_path):
+    """webhook_asgi builds its own handler; neither import should create the sync one or its SQLite files"""
+    env = {name: value for name, value in os.environ.items()
+           if name not in ('DEPLOY_HISTORY_DB', 'DEAD_LETTER_DB', 'LOG_FILE', 'TRACE_FILE')}
+    env['PYTHONPATH'] = os.path.dirname(webhook_handler.__file__)
+    code = 'import webhook_asgi, webhook_handler; assert webhook_handler._webhook_handler is None'
+    subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env, check=True, capture_output=True)
+
+    assert not any(name.endswith('.db') for name in os.listdir(tmp_path))
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import webhook_handler
+import webhook_payload
+from webhook_payload import PayloadTooLarge, check_size, parse_gitlab_event, WEBHOOK_MAX_BODY_BYTES
+
+
+def commit(number):
+    return {'id': f'{number:040d}', 'message': f'Change {number}', 'timestamp': '2025-01-01T00:00:00Z',
+            'author': {'name': 'Robot', 'email': 'robot@example.com'}, 'added': ['page.html'] * 50}
+
+
+def test_a_push_is_reduced_to_the_head_commit():
+    body = json.dumps({'object_kind': 'push', 'ref': 'refs/heads/main', 'after': 'f' * 40,
+                       'total_commits_count': 250, 'commits': [commit(number) for number in range(20)],
+                       'repository': {'name': 'content'}}).encode()
+
+    assert parse_gitlab_event(body) == {
+        'object_kind': 'push', 'ref': 'refs/heads/main', 'after': 'f' * 40, 'total_commits_count': 250,
+        'commits': [{'id': f'{19:040d}', 'message': 'Change 19', 'author': {'name': 'Robot'}}]
+    }
+
+
+def test_a_pipeline_keeps_only_the_trace_variables():
+    body = json.dumps({'object_kind': 'pipeline', 'object_attributes': {
+        'id': 42, 'status': 'success', 'ref': 'main', 'sha': 'a' * 40, 'stages': ['deploy'],
+        'variables': [{'key': 'TRACEPARENT', 'value': '00-abc-def-01'}, {'key': 'DEPLOY_TOKEN', 'value': 'x'}]
+    }}).encode()
+
+    attributes = parse_gitlab_event(body)['object_attributes']
+    assert attributes['id'] == 42
+    assert attributes['variables'] == [{'key': 'TRACEPARENT', 'value': '00-abc-def-01'}]
+    assert 'stages' not in attributes
+
+
+@pytest.mark.parametrize('body', [b'{', b'[1, 2]', b'"push"'])
+def test_anything_but_a_json_object_is_a_value_error(body):
+    with pytest.raises(ValueError):
+        parse_gitlab_event(body)
+
+
+def test_empty_bodies_parse_to_none():
+    assert parse_gitlab_event(b'') is None
+
+
+def test_oversized_bodies_are_refused(monkeypatch):
+    check_size(None)
+    check_size(WEBHOOK_MAX_BODY_BYTES)
+    with pytest.raises(PayloadTooLarge) as raised:
+        check_size(WEBHOOK_MAX_BODY_BYTES + 1)
+    assert raised.value.size == WEBHOOK_MAX_BODY_BYTES + 1
+
+    monkeypatch.setattr(webhook_payload, 'WEBHOOK_MAX_BODY_BYTES', 10)
+    with pytest.raises(PayloadTooLarge):
+        parse_gitlab_event(b'{"object_kind": "push"}')
+
+
+def test_the_endpoint_answers_413_for_an_oversized_body():
+    client = webhook_handler.app.test_client()
+    response = client.post('/webhook/gitlab', data=b' ' * (WEBHOOK_MAX_BODY_BYTES + 1),
+                           content_type='application/json')
+
+    assert response.status_code == 413
+    assert 'exceeds' in response.get_json()['error']
@@ -0,0 +1,12 @@
+"""
+Peaceful Robot Infrastructure CLI
+
+One entry point for the DNS and security tools:
+
+    python -m tools.infractl show|plan|apply|verify|security-check [--json]   (from the repository root)
+    python path/to/tools/infractl show|plan|...                              (from anywhere)
+
+Only the standard library is imported up front; the HTTP stack, YAML and
+the secret scanner are loaded by the subcommands that use them, and the
+zone config and credentials are read when a command needs them.
+"""
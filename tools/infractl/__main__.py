@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Works both as `python -m tools.infractl` and as `python tools/infractl`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from infractl.cli import main
+
+sys.exit(main())
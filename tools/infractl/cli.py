@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Infrastructure CLI Subcommands
+
+    show            current GoDaddy records for each configured zone
+    plan            diff the zones against dns_zones.yaml without writing
+    apply           write the record sets that differ (asks first unless --yes or CI=true)
+    verify          wait until public resolvers serve the desired records
+    security-check  the pre-commit security checks, including the secret scan
+
+Every subcommand takes --json, which prints one JSON document on stdout
+(logs go to stderr). Exit status: 0 ok, 1 a zone/check/propagation failed,
+2 bad config, credentials or usage.
+
+Usage (from the repository root; elsewhere run `python path/to/tools/infractl ...`):
+    python -m tools.infractl plan --json
+    python -m tools.infractl apply --yes --wait-propagation
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(TOOLS_DIR)
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scripts'))
+
+DNS_ZONES_FILE = os.getenv('DNS_ZONES_FILE', os.path.join(ROOT_DIR, 'dns_zones.yaml'))
+
+logger = logging.getLogger('infractl')
+
+
+class CommandError(Exception):
+    pass
+
+
+def emit(args, data, print_text):
+    if args.json:
+        print(json.dumps(data, indent=2, default=str))
+    else:
+        print_text(data)
+
+
+def load_zones(args):
+    """Parse the zone config for this invocation; nothing is read at import time"""
+    from dns_reconciler import load_config
+
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:
+        raise CommandError(f"Invalid config {args.config}: {str(e)}")
+    unknown = [domain for domain in args.domain or [] if domain not in config['domains']]
+    if unknown:
+        raise CommandError(f"Not in {args.config}: {', '.join(unknown)}")
+    return config
+
+
+def selected_domains(config, args):
+    return [domain for domain in config['domains'] if not args.domain or domain in args.domain]
+
+
+def reconciler_for(config, domains):
+    """DnsReconciler for the config, once the accounts those domains use have credentials"""
+    from dns_reconciler import DnsReconciler
+
+    reconciler = DnsReconciler(config)
+    accounts = {config['domains'][domain]['account'] for domain in domains}
+    missing = sorted(name for name in accounts
+                     if not (reconciler.accounts[name].api_key and reconciler.accounts[name].api_secret))
+    if missing:
+        raise CommandError(f"GoDaddy API credentials not set for account(s): {', '.join(missing)} "
+                           f"(GODADDY_API_KEY / GODADDY_API_SECRET, or the env vars named in the config)")
+    return reconciler
+
+
+def fetch_zone(reconciler, domain, spec):
+    account = reconciler.accounts[spec['account']]
+    try:
+        response = reconciler.call(account, 'GET', reconciler.records_url(domain))
+        if response.status_code != 200:
+            return {'domain': domain, 'records': None, 'error': f'GET records returned {response.status_code}'}
+        return {'domain': domain, 'records': response.json(), 'error': None}
+    except Exception as e:
+        logger.error(f"Error fetching {domain}: {str(e)}")
+        return {'domain': domain, 'records': None, 'error': str(e)}
+
+
+def print_zones(data):
+    for zone in data['zones']:
+        print(f"\n{zone['domain']}")
+        if zone['error']:
+            print(f"  error: {zone['error']}")
+            continue
+        for record in zone['records']:
+            print(f"  {record['type']:<6} {record['name']:<24} {record['ttl']:>6}  {record['data']}")
+
+
+def cmd_show(args):
+    config = load_zones(args)
+    domains = selected_domains(config, args)
+    reconciler = reconciler_for(config, domains)
+    zones = [fetch_zone(reconciler, domain, config['domains'][domain]) for domain in domains]
+    emit(args, {'zones': zones}, print_zones)
+    return 1 if any(zone['error'] for zone in zones) else 0
+
+
+def reconcile(reconciler, domains, dry_run):
+    from dns_reconciler import summarize
+
+    started = time.perf_counter()
+    results = reconciler.reconcile_all(dry_run=dry_run, domains=domains)
+    return summarize(results, time.perf_counter() - started)
+
+
+def cmd_plan(args):
+    from dns_reconciler import print_summary, ZONE_FAILED
+
+    config = load_zones(args)
+    domains = selected_domains(config, args)
+    summary = reconcile(reconciler_for(config, domains), domains, dry_run=True)
+    emit(args, summary, print_summary)
+    return 1 if summary['by_status'].get(ZONE_FAILED) else 0
+
+
+def confirm(plan):
+    from dns_reconciler import print_summary
+
+    print_summary(plan)
+    response = input("\nApply these changes? (yes/no): ")
+    return response.lower() in ['yes', 'y']
+
+
+def check_domains(config, domains, args, **kwargs):
+    from dns_propagation import check_propagation, expected_answers
+
+    expected = {}
+    for domain in domains:
+        expected.update(expected_answers(domain, config['domains'][domain]['records']))
+    if not expected:
+        raise CommandError('No A, AAAA or CNAME records to verify')
+    # Unset options fall back to the DNS_VERIFY_* defaults, which live with (and load with) dns_propagation
+    for option in ('quorum', 'timeout'):
+        if getattr(args, option) is not None:
+            kwargs[option] = getattr(args, option)
+    return check_propagation(expected, resolvers=args.resolver, **kwargs)
+
+
+def print_apply(data):
+    from dns_reconciler import print_summary, ZONE_FAILED
+
+    if data['summary'] is None:
+        print("Cancelled; nothing was written.")
+        return
+    print_summary(data['summary'])
+    if data['propagation'] is not None:
+        from dns_propagation import print_report
+
+        print()
+        print_report(data['propagation'])
+    elif not data['summary']['by_status'].get(ZONE_FAILED):
+        print("\nNext: python -m tools.infractl verify (waits until public resolvers serve the new records)")
+
+
+def cmd_apply(args):
+    from dns_reconciler import ZONE_FAILED
+
+    auto_confirm = args.yes or os.getenv('CI') == 'true'
+    if args.json and not auto_confirm:
+        raise CommandError('apply --json needs --yes (or CI=true); there is no prompt in JSON mode')
+    config = load_zones(args)
+    domains = selected_domains(config, args)
+    reconciler = reconciler_for(config, domains)
+    result = {'summary': None, 'propagation': None}
+
+    # Without a prompt there is nothing to show first, so skip the extra read of every zone
+    if not auto_confirm:
+        plan = reconcile(reconciler, domains, dry_run=True)
+        if plan['by_status'].get(ZONE_FAILED):
+            emit(args, {'summary': plan, 'propagation': None}, print_apply)
+            return 1
+        if not any(zone['changes'] for zone in plan['results']):
+            result['summary'] = plan
+        elif not confirm(plan):
+            emit(args, result, print_apply)
+            return 0
+
+    if result['summary'] is None:
+        result['summary'] = reconcile(reconciler, domains, dry_run=False)
+    failed = bool(result['summary']['by_status'].get(ZONE_FAILED))
+    if args.wait_propagation and not failed:
+        result['propagation'] = check_domains(config, domains, args)
+        failed = not result['propagation']['converged']
+    emit(args, result, print_apply)
+    return 1 if failed else 0
+
+
+def cmd_verify(args):
+    from dns_propagation import print_report
+
+    config = load_zones(args)
+    report = check_domains(config, selected_domains(config, args), args, wait_all=args.wait_all)
+    emit(args, report, print_report)
+    return 0 if report['converged'] else 1
+
+
+def cmd_security_check(args):
+    from security_check import run_checks
+
+    logger.info("Starting security configuration check...")
+    checks = run_checks()
+    passed = all(checks.values())
+    if args.json:
+        emit(args, {'passed': passed, 'checks': checks}, None)
+    elif passed:
+        logger.info("All security checks passed")
+    else:
+        logger.error("Security configuration check failed")
+    return 0 if passed else 1
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--json', action='store_true', help='print one JSON document on stdout')
+
+    zones = argparse.ArgumentParser(add_help=False)
+    zones.add_argument('--config', default=DNS_ZONES_FILE, help='zone config (default: dns_zones.yaml)')
+    zones.add_argument('--domain', action='append', help='only this domain (repeatable)')
+
+    propagation = argparse.ArgumentParser(add_help=False)
+    propagation.add_argument('--resolver', action='append',
+                             help='resolver address, host[:port] (repeatable; default DNS_VERIFY_RESOLVERS)')
+    propagation.add_argument('--quorum', type=int,
+                             help='resolvers that must agree (default: DNS_VERIFY_QUORUM, else a majority)')
+    propagation.add_argument('--timeout', type=float,
+                             help='seconds to keep polling; 0 checks once (default: DNS_VERIFY_TIMEOUT)')
+
+    parser = argparse.ArgumentParser(prog='infractl', description='Peaceful Robot DNS and security tools')
+    commands = parser.add_subparsers(dest='command', metavar='command', required=True)
+
+    show = commands.add_parser('show', parents=[common, zones], help='print the current GoDaddy records')
+    show.set_defaults(func=cmd_show)
+
+    plan = commands.add_parser('plan', parents=[common, zones], help='diff zones against the config, no writes')
+    plan.set_defaults(func=cmd_plan)
+
+    apply = commands.add_parser('apply', parents=[common, zones, propagation],
+                                help='write the record sets that differ from the config')
+    apply.add_argument('--yes', '--auto-confirm', action='store_true', help='do not ask before writing')
+    apply.add_argument('--wait-propagation', action='store_true',
+                       help='then wait until a quorum of resolvers serves the new records')
+    apply.set_defaults(func=cmd_apply)
+
+    verify = commands.add_parser('verify', parents=[common, zones, propagation],
+                                 help='wait until public resolvers serve the configured records')
+    verify.add_argument('--wait-all', action='store_true', help='keep polling the rest after the quorum')
+    verify.set_defaults(func=cmd_verify)
+
+    security = commands.add_parser('security-check', parents=[common], help='run the pre-commit security checks')
+    security.set_defaults(func=cmd_security_check)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        return args.func(args)
+    except CommandError as e:
+        if args.json:
+            print(json.dumps({'error': str(e)}))
+        else:
+            print(str(e), file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Incremental Repository Secret Scanner
+
+Looks for leaked credentials (GoDaddy, GitHub, GitLab, AWS, Slack, private
+keys) and high-entropy secret assignments in every tracked or untracked,
+non-ignored file. All rules are one precompiled alternation run over a
+memory-mapped file, so each file is read once. Files are scanned across a
+process pool, and results are cached per file keyed on (size, mtime_ns),
+so a warm run only stats the tree and rescans what changed.
+
+A line containing `secret-scan: allow` is never reported.
+
+Usage:
+    python tools/secret_scanner.py [root] [--no-cache] [--workers N] [--json]
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import mmap
+import time
+import hashlib
+import argparse
+import subprocess
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+SECRET_SCAN_CACHE = os.getenv('SECRET_SCAN_CACHE', '.secret_scan_cache.json')
+SECRET_SCAN_WORKERS = int(os.getenv('SECRET_SCAN_WORKERS', os.cpu_count() or 1))
+# Below this many files to rescan, a pool costs more to start than it saves
+POOL_MIN_FILES = 64
+MAX_FILE_BYTES = 50 * 1024 * 1024
+BINARY_SNIFF_BYTES = 8192
+ENTROPY_THRESHOLD = 3.5
+HIGH_ENTROPY_THRESHOLD = 4.5
+ALLOW_MARKER = b'secret-scan: allow'
+SKIP_DIRS = frozenset(['.git', 'node_modules', '__pycache__', '.venv', 'venv', '.tox'])
+
+# (rule, pattern, needs entropy check); the secret itself is group 'v' when present
+RULES = (
+    ('github_token', rb'\bgh[pousr]_[A-Za-z0-9]{36,255}\b', False),
+    ('github_fine_grained_pat', rb'\bgithub_pat_[A-Za-z0-9_]{82}\b', False),
+    ('gitlab_token', rb'\bgl(?:pat|ptt|dt|rt|cbt|soat|ft|imt|agent)-[A-Za-z0-9_-]{20,}\b', False),
+    ('gitlab_runner_token', rb'\bGR1348941[A-Za-z0-9_-]{20,}\b', False),
+    ('godaddy_credential', rb'(?i:godaddy[_-]?api[_-]?(?:key|secret))["\']?\s*[:=]\s*["\']?(?P<v>[A-Za-z0-9_]{16,})', True),
+    ('godaddy_sso_header', rb'sso-key\s+(?P<v>[A-Za-z0-9_]{16,}):[A-Za-z0-9_]{16,}', True),
+    ('aws_access_key', rb'\b(?:AKIA|ASIA)[0-9A-Z]{16}\b', False),
+    ('slack_token', rb'\bxox[abposr]-[A-Za-z0-9-]{10,}\b', False),
+    ('private_key', rb'-----BEGIN (?:RSA |EC |DSA |OPENSSH |PGP |ENCRYPTED )?PRIVATE KEY(?: BLOCK)?-----', False),
+    ('generic_secret', rb'(?i:secret|token|passw(?:or)?d|api[_-]?key|access[_-]?key)["\']?\s*[:=]\s*'
+                       rb'["\'](?P<v>[A-Za-z0-9+/=_.~-]{16,})["\']', True),
+)
+# Lowercase literals at least one of which every rule match contains. Python's re is slow on
+# long alternations, so the combined pattern only runs on lines where bytes.find spots one of these.
+KEYWORDS = (
+    b'ghp_', b'gho_', b'ghu_', b'ghs_', b'ghr_', b'github_pat_', b'glpat-', b'glptt-', b'gldt-', b'glrt-',
+    b'glcbt-', b'glsoat-', b'glft-', b'glimt-', b'glagent-', b'gr1348941', b'godaddy', b'sso-key', b'akia',
+    b'asia', b'xox', b'private key', b'secret', b'token', b'passw', b'apikey', b'api_key', b'api-key',
+    b'accesskey', b'access_key', b'access-key'
+)
+
+COMBINED_RE = re.compile(b'|'.join(
+    b'(?P<r%d>%s)' % (index, pattern.replace(b'(?P<v>', b'(?P<v%d>' % index))
+    for index, (_, pattern, _) in enumerate(RULES)
+))
+# Entropy detection for secrets with no recognisable prefix or keyword: long quoted tokens
+HIGH_ENTROPY_RE = re.compile(rb'["\']([A-Za-z0-9+/=_-]{32,})["\']')
+# Integrity hashes and similar values that are high-entropy by design
+BENIGN_PREFIXES = (b'sha256-', b'sha384-', b'sha512-')
+# Documentation placeholders ("your_api_key", "glpat-access-token") are not secrets
+PLACEHOLDER_RE = re.compile(rb'(?i)your|example|placeholder|changeme|dummy|sample|xxxx|<|\$\{|\.\.\.')
+HAS_DIGIT_RE = re.compile(rb'[0-9]')
+HAS_LETTER_RE = re.compile(rb'[A-Za-z]')
+# Cached results are dropped whenever the rules change
+RULES_VERSION = hashlib.sha256(repr((
+    RULES, KEYWORDS, HIGH_ENTROPY_RE.pattern, PLACEHOLDER_RE.pattern, ENTROPY_THRESHOLD, HIGH_ENTROPY_THRESHOLD
+)).encode()).hexdigest()[:16]
+
+
+def shannon_entropy(value):
+    if not value:
+        return 0.0
+    length = len(value)
+    return -sum(count / length * math.log2(count / length) for count in Counter(value).values())
+
+
+def looks_random(value, threshold):
+    """Entropy rules only report values that look generated: mixed letters and digits, no placeholder words"""
+    return (shannon_entropy(value) >= threshold
+            and HAS_DIGIT_RE.search(value) is not None and HAS_LETTER_RE.search(value) is not None
+            and not value.startswith(BENIGN_PREFIXES) and PLACEHOLDER_RE.search(value) is None)
+
+
+def redact(value):
+    value = value.decode('utf-8', 'replace')
+    return value[:4] + '*' * min(8, max(0, len(value) - 4))
+
+
+def candidate_lines(lowered):
+    """Start offsets of lines containing a rule keyword"""
+    starts = set()
+    for keyword in KEYWORDS:
+        index = lowered.find(keyword)
+        while index != -1:
+            starts.add(lowered.rfind(b'\n', 0, index) + 1)
+            index = lowered.find(keyword, index + len(keyword))
+    return sorted(starts)
+
+
+def rule_matches(data, start, end):
+    """(offset, rule, value) for the combined rules within data[start:end]"""
+    search = COMBINED_RE.search
+    offset = start
+    while True:
+        match = search(data, offset, end)
+        if match is None:
+            return
+        index = int(match.lastgroup[1:])
+        rule, _, needs_entropy = RULES[index]
+        value = match.group(f'v{index}') if needs_entropy else match.group()
+        if needs_entropy and not looks_random(value, ENTROPY_THRESHOLD):
+            # A weaker rule can shadow a specific token later in the same span; retry from the next byte
+            offset = match.start() + 1
+            continue
+        offset = match.end()
+        if needs_entropy:
+            # Name the token by its own format when it has one ("TOKEN = 'ghp_...'" is a GitHub token)
+            specific = COMBINED_RE.fullmatch(value)
+            if specific is not None:
+                rule = RULES[int(specific.lastgroup[1:])][0]
+        yield match.start(), rule, value
+
+
+def scan_file(path):
+    """[(line, rule, redacted)] for one file; binary, empty and oversized files yield nothing"""
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0 or size > MAX_FILE_BYTES:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data.find(b'\0', 0, BINARY_SNIFF_BYTES) != -1:
+                    return []
+                lowered = data[:].lower()
+                hits = []
+                for line_start in candidate_lines(lowered):
+                    line_end = lowered.find(b'\n', line_start)
+                    hits.extend(rule_matches(data, line_start, size if line_end == -1 else line_end))
+                reported = {value for _, _, value in hits}
+                for match in HIGH_ENTROPY_RE.finditer(data):
+                    value = match.group(1)
+                    if value not in reported and looks_random(value, HIGH_ENTROPY_THRESHOLD):
+                        hits.append((match.start(1), 'high_entropy_string', value))
+    except (OSError, ValueError):
+        return []
+
+    findings = []
+    line = 1
+    position = 0
+    for offset, rule, value in sorted(hits):
+        line_start = lowered.rfind(b'\n', 0, offset) + 1
+        line_end = lowered.find(b'\n', offset)
+        if lowered.find(ALLOW_MARKER, line_start, size if line_end == -1 else line_end) != -1:
+            continue
+        line += lowered.count(b'\n', position, offset)
+        position = offset
+        findings.append((line, rule, redact(value)))
+    return findings
+
+
+def list_files(root):
+    """Tracked plus untracked-but-not-ignored files (git), or a filtered walk outside a repository"""
+    try:
+        output = subprocess.run(
+            ['git', '-C', root, 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+            capture_output=True, check=True
+        ).stdout
+        return sorted({path for path in output.decode('utf-8', 'surrogateescape').split('\0') if path})
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    paths = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        paths.extend(os.path.relpath(os.path.join(directory, name), root) for name in files)
+    return sorted(paths)
+
+
+def load_cache(path):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('rules_version') != RULES_VERSION:
+        return {}
+    return cache.get('files', {})
+
+
+def save_cache(path, files):
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump({'rules_version': RULES_VERSION, 'files': files}, f, separators=(',', ':'))
+    os.replace(temporary, path)
+
+
+def scan(root='.', cache_path=SECRET_SCAN_CACHE, workers=SECRET_SCAN_WORKERS):
+    """Scan the tree; returns {'findings': [...], 'files': n, 'scanned': n, 'seconds': s}"""
+    started = time.perf_counter()
+    cache = load_cache(os.path.join(root, cache_path)) if cache_path else {}
+    entries = {}
+    stale = []
+    cache_name = os.path.basename(cache_path) if cache_path else None
+    for path in list_files(root):
+        if path == cache_name:
+            continue
+        try:
+            stat = os.stat(os.path.join(root, path))
+        except OSError:
+            continue
+        key = [stat.st_size, stat.st_mtime_ns]
+        cached = cache.get(path)
+        if cached is not None and cached[:2] == key:
+            entries[path] = cached
+        else:
+            entries[path] = key + [None]
+            stale.append(path)
+
+    absolute = [os.path.join(root, path) for path in stale]
+    if len(stale) >= POOL_MIN_FILES and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(scan_file, absolute, chunksize=max(1, len(stale) // (workers * 8))))
+    else:
+        results = [scan_file(path) for path in absolute]
+    for path, findings in zip(stale, results):
+        entries[path][2] = [list(finding) for finding in findings]
+
+    if cache_path and (stale or len(entries) != len(cache)):
+        save_cache(os.path.join(root, cache_path), entries)
+
+    findings = [
+        {'path': path, 'line': line, 'rule': rule, 'match': match}
+        for path, entry in sorted(entries.items()) for line, rule, match in entry[2]
+    ]
+    return {'findings': findings, 'files': len(entries), 'scanned': len(stale),
+            'seconds': round(time.perf_counter() - started, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scan the repository for leaked credentials')
+    parser.add_argument('root', nargs='?', default='.')
+    parser.add_argument('--no-cache', action='store_true', help='rescan every file and do not write the cache')
+    parser.add_argument('--workers', type=int, default=SECRET_SCAN_WORKERS)
+    parser.add_argument('--json', action='store_true', help='print the full result as JSON')
+    args = parser.parse_args()
+
+    result = scan(args.root, None if args.no_cache else SECRET_SCAN_CACHE, args.workers)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for finding in result['findings']:
+            print(f"{finding['path']}:{finding['line']}: {finding['rule']} ({finding['match']})")
+        print(f"{len(result['findings'])} potential secret(s) in {result['files']} files "
+              f"({result['scanned']} scanned) in {result['seconds']}s")
+    sys.exit(1 if result['findings'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,10 @@ import re
 from pathlib import Path
 import logging
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from secret_scanner import scan
+
 def setup_logging():
     logging.basicConfig(
         level=logging.INFO,
@@ -63,25 +67,42 @@ def check_security_policy():
         return False
     return True
 
+def check_secrets():
+    # Incremental: only files whose size or mtime changed since the last run are rescanned
+    result = scan('.')
+    for finding in result['findings']:
+        logging.error(f"Possible {finding['rule']} in {finding['path']}:{finding['line']} ({finding['match']})")
+    logging.info(f"Scanned {result['scanned']} of {result['files']} files for secrets in {result['seconds']}s")
+    if result['findings']:
+        logging.error("Remove the secrets, or mark false positives with a 'secret-scan: allow' comment")
+        return False
+    return True
+
+CHECKS = {
+    "Environment Variables": check_environment_variables,
+    "File Permissions": check_file_permissions,
+    "Gitignore Configuration": check_gitignore,
+    "Security Policy": check_security_policy,
+    "Secret Scan": check_secrets
+}
+
+def run_checks():
+    """Run every check in order; returns {check name: passed}"""
+    results = {}
+    for check_name, check_func in CHECKS.items():
+        logging.info(f"Running check: {check_name}")
+        results[check_name] = bool(check_func())
+        if results[check_name]:
+            logging.info(f"Check passed: {check_name}")
+        else:
+            logging.error(f"Check failed: {check_name}")
+    return results
+
 def main():
     setup_logging()
     logging.info("Starting security configuration check...")
     
-    checks = {
-        "Environment Variables": check_environment_variables,
-        "File Permissions": check_file_permissions,
-        "Gitignore Configuration": check_gitignore,
-        "Security Policy": check_security_policy
-    }
-    
-    success = True
-    for check_name, check_func in checks.items():
-        logging.info(f"Running check: {check_name}")
-        if not check_func():
-            success = False
-            logging.error(f"Check failed: {check_name}")
-        else:
-            logging.info(f"Check passed: {check_name}")
+    success = all(run_checks().values())
     
     if not success:
         logging.error("Security configuration check failed")